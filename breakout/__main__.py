@@ -7,6 +7,9 @@ This is the module with the application code.  Make sure that this module is
 in a folder with the following files:
 
     controller.py (the primary controller class)
+    model.py      (the game rules, independent of the view)
+    levels.py     (packs of levels to play)
+    replay.py     (recording and playing back input)
     graphics.py   (the graphics widgets for the view)
     graphics.kv   (the layout code for the view)
 
@@ -17,11 +20,23 @@ In addition, you should have the following subfolders
     Images        (image files to use in the game)
 
 Moving any of these folders or files will prevent the game from working properly"""
+import time
+STARTED = time.time() # When start-up began, for the start-up report
+
 from kivy.app import App
 from kivy.config import Config
+from kivy.clock import Clock
 import controller
+import graphics
+import json
+import levels
+import replay
 import sys
 
+# The command line options, and the number of values that follow each.  The
+# arguments that are left are the board size (see fix_bricks).
+OPTIONS = {'--record': 1, '--level': 2, '--balls': 1, '--fps': 1, '--profile': 0, '--startup': 0, '--cpu': 0}
+
 
 class BreakoutApp(App):
     """Application class for Breakout.
@@ -29,14 +44,58 @@ class BreakoutApp(App):
     Extends the Kivy App class.  It integrates the .kv file with .py methods
     It is invoked at start-up and then never used again."""
     _controller = None # The controller class (held as field to prevent garbage collection)
+    _record = None # The file to record the input to, or None
+    _level = None # The levels.Level to play, or None for the board of the constants
+    _balls = 1 # The number of balls each serve puts into play
+    _profile = False # Whether to time every frame and show the times on screen
+    _startup = False # Whether to print the start-up report after the first frame, and quit
+    _cpu = False # Whether to print the CPU used in each state of the game when the app stops
+    _fps = None # The frame rate to aim for, or None for the default; the frame stats are printed when the app stops
 
     def build(self):
         """Creates the new Window and instantiates the game controller."""""
         Config.set('graphics', 'width', str(controller.GAME_WIDTH))
         Config.set('graphics', 'height', str(controller.GAME_HEIGHT))
-        self._controller = controller.Breakout()
+        if not self._fps is None:
+            Config.set('graphics', 'maxfps', str(int(self._fps)))
+        recorder = None if self._record is None else replay.Recorder(self._record)
+        self._controller = controller.Breakout(recorder = recorder, level = self._level, balls = self._balls)
         return self._controller.view
 
+    def on_start(self):
+        """Sets the frame rate, and turns on frame timing once the window exists, if asked for."""
+        if not self._fps is None:
+            self._controller.set_frame_rate(self._fps)
+        if self._profile:
+            self._controller.profile(True, overlay = True)
+        if self._startup:
+            Clock.schedule_interval(self._reportStartup, 0)
+
+    def _reportStartup(self, dt):
+        """Prints the start-up report as JSON and stops the app, once the first frame is drawn."""
+        report = graphics.startup_report(STARTED)
+        if 'first_frame' in report:
+            print json.dumps(report, sort_keys=True)
+            self.stop()
+            return False
+
+    def on_pause(self):
+        """Pauses the game, and its timers, while the app is in the background."""
+        self._controller.pause()
+        return True
+
+    def on_resume(self):
+        """Resumes the game where it left off."""
+        self._controller.resume()
+
+    def on_stop(self):
+        """Writes out the recording of the game, if there is one, and prints the CPU and frame reports if asked for."""
+        self._controller.close()
+        if self._cpu:
+            print json.dumps(self._controller.cpu.report(), sort_keys=True, indent=1)
+        if not self._fps is None:
+            print json.dumps(self._controller.scheduler.stats(), sort_keys=True, indent=1)
+
 
 def fix_bricks(args):
     """Changes constants BRICKS_IN_ROW, BRICK_ROWS, and BRICK_WIDTH to match command line arguments
@@ -55,17 +114,91 @@ def fix_bricks(args):
 
         controller.BRICKS_IN_ROW = new_value
 
+    Both elements are converted before either constant is changed, so a bad
+    argument leaves all three constants alone.  Take the options out of the
+    command line first (see positional_args).
+
     Precondition: args is a list of strings."""
+    if len(args) != 3:
+        return
     try:
-        controller.BRICK_ROWS = int(args[2])
-        controller.BRICKS_IN_ROW = int(args[1])
-        controller.BRICK_WIDTH = controller.GAME_WIDTH / controller.BRICKS_IN_ROW - controller.BRICK_SEP_H
+        columns = int(args[1])
+        rows = int(args[2])
     except ValueError:
-        pass
-    except IndexError:
-        pass
+        return
+    if columns > 0 and rows > 0:
+        controller.BRICK_ROWS = rows
+        controller.BRICKS_IN_ROW = columns
+        controller.BRICK_WIDTH = controller.GAME_WIDTH / controller.BRICKS_IN_ROW - controller.BRICK_SEP_H
+
+def positional_args(args):
+    """Returns: a copy of args without the options in OPTIONS and the values that follow them
+
+    Precondition: args is a list of strings."""
+    result = []
+    i = 0
+    while i < len(args):
+        if args[i] in OPTIONS:
+            i += 1 + OPTIONS[args[i]]
+        else:
+            result.append(args[i])
+            i += 1
+    return result
+
+def record_file(args):
+    """Returns: the file name after the option --record in args, or None if there is none
+
+    Precondition: args is a list of strings."""
+    if '--record' in args and args.index('--record') + 1 < len(args):
+        return args[args.index('--record') + 1]
+    return None
+
+def ball_count(args):
+    """Returns: the number of balls after the option --balls in args, or 1 if there is none
+
+    Precondition: args is a list of strings; if --balls is in args, it is
+    followed by an int > 0."""
+    if '--balls' in args and args.index('--balls') + 1 < len(args):
+        return int(args[args.index('--balls') + 1])
+    return 1
+
+def frame_rate(args):
+    """Returns: the frame rate after the option --fps in args, or None if there is none
+
+    Precondition: args is a list of strings; if --fps is in args, it is
+    followed by a number > 0."""
+    if '--fps' in args and args.index('--fps') + 1 < len(args):
+        return float(args[args.index('--fps') + 1])
+    return None
+
+def load_level(args):
+    """Returns: the level named by the options --level PACK NUMBER in args, or None if there are none
+
+    The level is read from the pack file PACK (see levels.py).
+
+    Precondition: args is a list of strings; if --level is in args, it is
+    followed by the name of a pack and the number of a level in it."""
+    if not '--level' in args:
+        return None
+    i = args.index('--level')
+    with levels.LevelPack(args[i + 1]) as pack:
+        return pack[int(args[i + 2])]
 
 # Application code
 if __name__ == '__main__':
-    fix_bricks(sys.argv)
-    BreakoutApp().run()
+    fix_bricks(positional_args(sys.argv))
+    app = BreakoutApp()
+    app._level = load_level(sys.argv)
+    app._record = record_file(sys.argv)
+    if not app._level is None and not app._record is None:
+        print 'A game from a level cannot be recorded'
+        sys.exit(1)
+    app._balls = ball_count(sys.argv)
+    if app._balls != 1 and not app._record is None:
+        print 'A multi-ball game cannot be recorded'
+        sys.exit(1)
+    app._profile = '--profile' in sys.argv
+    app._startup = '--startup' in sys.argv
+    app._cpu = '--cpu' in sys.argv
+    app._fps = frame_rate(sys.argv)
+    app.run()
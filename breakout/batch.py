@@ -0,0 +1,264 @@
+# batch.py
+# Tech Kuo(thk42) and Charles Lai(cjl223)
+# 10-18-26
+"""Batched games module for Breakout
+
+This module contains a class that plays many independent games of Breakout in
+lockstep, for training and tuning paddle AIs.  The state of every game is held
+in NumPy arrays, and one call to `GameBatch.step` advances all of them by one
+frame with the same rules as model.Game.step.
+
+Unlike model.Game, a batch never waits between balls: a new ball is served
+as soon as one is lost (or after `serve_delay` frames, if given)."""
+import numpy
+from model import *
+
+
+# CLASSES
+class GameBatch(object):
+    """Instance is a set of n independent games of Breakout on the same board.
+
+        Method reset starts new games.
+
+        Method step moves every paddle and advances every game by a frame.
+
+    The action for a game is the x-coordinate that its paddle should move its
+    left edge to (it is kept inside the game display, as in Game.move_paddle).
+    An observation is a row of 5 floats: the ball position x and y, the ball
+    velocity vx and vy, and the paddle x.  The reward is the number of bricks
+    removed in the frame.  A game is done when it has no lives or no bricks
+    left; it then stays unchanged until it is reset.
+
+    Games in the batch can be reproduced: the serves of the batch are drawn
+    from a numpy.random.RandomState made from the seed."""
+    # FIELDS.  The arrays are public, but should be treated as read-only.
+
+    # Number of games
+    # Invariant: Value is an int > 0
+    n = 1
+
+    # Ball position and velocity of each game
+    # Invariant: float64 arrays of length n
+    x = None
+    y = None
+    vx = None
+    vy = None
+
+    # The x-coordinate of the left edge of the paddle of each game
+    # Invariant: A float64 array of length n
+    paddle = None
+
+    # Which bricks are still in play in each game
+    # Invariant: A bool array of shape (n, number of bricks); brick i is brick i
+    # of the model.BrickField for the board
+    alive = None
+
+    # Lives left in each game
+    # Invariant: An int array of length n with values between 0 and NUMBER_TURNS
+    lives = None
+
+    # Bricks left in each game
+    # Invariant: An int array of length n; the row sums of alive
+    remaining = None
+
+    # Frames until the ball of each game is served; 0 if the ball is in play
+    # Invariant: An int array of length n with values >= 0
+    waiting = None
+
+    # Whether each game is over
+    # Invariant: A bool array of length n; True exactly when lives or remaining is 0
+    done = None
+
+    # Frames the next ball waits after a ball is lost
+    # Invariant: Value is an int >= 0
+    _delay = 0
+
+    # The board, laid out by model.Game
+    # Invariant: A BrickField with a grid
+    _field = None
+
+    # The random numbers for the serves
+    # Invariant: A numpy.random.RandomState
+    _random = None
+
+    @property
+    def field(self):
+        """The BrickField with the layout of the board (all bricks alive)"""
+        return self._field
+
+    def __init__(self, n, columns=None, rows=None, brick_width=None, seed=None, serve_delay=0):
+        """Constructor: a batch of n new games on a board of the given size
+
+        The board arguments are the same as for model.Game.  The games are
+        started, with a ball in play in every game.
+
+        Precondition: n is an int > 0; the board arguments satisfy the
+        preconditions of model.Game; seed is None or an int >= 0; serve_delay
+        is an int >= 0"""
+        layout = Game(columns, rows, brick_width)
+        layout.start()
+        self._field = layout.bricks
+        self._random = numpy.random.RandomState(seed)
+        self._delay = serve_delay
+        self.n = n
+        self.x = numpy.zeros(n)
+        self.y = numpy.zeros(n)
+        self.vx = numpy.zeros(n)
+        self.vy = numpy.zeros(n)
+        self.paddle = numpy.zeros(n)
+        self.alive = numpy.zeros((n, self._field.size), dtype=numpy.bool_)
+        self.lives = numpy.zeros(n, dtype=numpy.int_)
+        self.remaining = numpy.zeros(n, dtype=numpy.int_)
+        self.waiting = numpy.zeros(n, dtype=numpy.int_)
+        self.done = numpy.zeros(n, dtype=numpy.bool_)
+        self.reset()
+
+    def reset(self, which=None):
+        """Returns: the observations after starting new games
+
+        If which is None, every game is restarted.  Otherwise only the games
+        where which is True are.
+
+        Precondition: which is None or a bool array of length n"""
+        if which is None:
+            which = numpy.ones(self.n, dtype=numpy.bool_)
+        self.alive[which] = True
+        self.lives[which] = NUMBER_TURNS
+        self.remaining[which] = self._field.size
+        self.paddle[which] = GAME_WIDTH/2-PADDLE_WIDTH/2
+        self.done[which] = False
+        self.waiting[which] = 0
+        self._serve(which)
+        return self.observe()
+
+    def observe(self):
+        """Returns: the observations of every game, an (n,5) float array"""
+        return numpy.column_stack((self.x, self.y, self.vx, self.vy, self.paddle))
+
+    def step(self, actions):
+        """Returns: a tuple (observations, rewards, done) after advancing every game one frame
+
+        The paddles are moved to actions first.  Games that are done, or are
+        waiting for a serve, do not move.  rewards is an int array of the
+        bricks removed in each game, and done a bool array (the same as the
+        attribute done).
+
+        Precondition: actions is a sequence of n numbers"""
+        self.paddle[:] = numpy.clip(actions, 0, GAME_WIDTH-PADDLE_WIDTH)
+        rewards = numpy.zeros(self.n, dtype=numpy.int_)
+
+        serving = ~self.done & (self.waiting > 0)
+        self.waiting[serving] -= 1
+        self._serve(serving & (self.waiting == 0))
+
+        play = ~self.done & (self.waiting == 0)
+        if not play.any():
+            return (self.observe(), rewards, self.done.copy())
+        bx = self.x[play]
+        by = self.y[play]
+        vx = self.vx[play]
+        vy = self.vy[play]
+        paddle = self.paddle[play]
+        games = numpy.flatnonzero(play)
+
+        x = bx + vx
+        y = by + vy
+        lost = y <= 0 #check bottom boundary
+
+        hit = y + BALL_DIAMETER >= GAME_HEIGHT #check top boundary
+        vy = numpy.where(hit, -vy, vy)
+        y = numpy.where(hit, by + vy, y)
+        hit = x + BALL_DIAMETER >= GAME_WIDTH #check right boundary
+        vx = numpy.where(hit, -vx, vx)
+        x = numpy.where(hit, bx + vx, x)
+        hit = x <= 0 #check left boundary
+        vx = numpy.where(hit, -vx, vx)
+        x = numpy.where(hit, bx + vx, x)
+
+        touching = self._touchPaddle(x, y, paddle) #check paddle
+        hit = touching & (vy < 0)
+        vy = numpy.where(hit, -vy, vy)
+        y = numpy.where(hit, by + vy, y)
+
+        touching = self._touchPaddle(x, y, paddle) #check bricks
+        brick = self._firstHit(games, x, y)
+        hit = ~touching & (brick >= 0) & ~lost
+        vy = numpy.where(hit, -vy, vy)
+        y = numpy.where(hit, by + vy, y)
+        self.alive[games[hit], brick[hit]] = False
+        rewards[games[hit]] = 1
+        self.remaining[games[hit]] -= 1
+
+        self.x[play] = x
+        self.y[play] = y
+        self.vx[play] = vx
+        self.vy[play] = vy
+
+        # Lose a life, and serve again if there are lives left
+        lost = games[lost]
+        self.lives[lost] -= 1
+        self.done[lost] = self.lives[lost] == 0
+        again = lost[self.lives[lost] > 0]
+        if self._delay > 0:
+            self.waiting[again] = self._delay
+        else:
+            which = numpy.zeros(self.n, dtype=numpy.bool_)
+            which[again] = True
+            self._serve(which)
+        self.done |= self.remaining == 0
+        return (self.observe(), rewards, self.done.copy())
+
+    # HELPER METHODS
+    def _serve(self, which):
+        """Puts a new ball in play in the games where which is True
+
+        The ball is placed and aimed as in Game.serve.
+
+        Precondition: which is a bool array of length n"""
+        count = int(which.sum())
+        if count == 0:
+            return
+        speed = self._random.uniform(1.0, 5.0, count)
+        self.x[which] = GAME_WIDTH/2-BALL_DIAMETER/2
+        self.y[which] = BALL_SERVE_Y
+        self.vx[which] = speed * self._random.choice([-1, 1], count)
+        self.vy[which] = BALL_SERVE_VY
+
+    def _touchPaddle(self, x, y, paddle):
+        """Returns: a bool array that is True where a bottom corner of the ball touches the paddle
+
+        Precondition: x, y and paddle are float arrays of the same length"""
+        low = PADDLE_OFFSET
+        high = PADDLE_OFFSET + PADDLE_HEIGHT
+        ycorner = (low <= y) & (y <= high)
+        left = (paddle <= x) & (x <= paddle + PADDLE_WIDTH)
+        right = (paddle <= x + BALL_DIAMETER) & (x + BALL_DIAMETER <= paddle + PADDLE_WIDTH)
+        return ycorner & (left | right)
+
+    def _firstHit(self, games, x, y):
+        """Returns: an int array of the first live brick hit by a corner of each ball, or -1
+
+        This tests the same grid cells as BrickGrid.find, for all of the
+        corners of all of the balls at once.
+
+        Precondition: games is an int array of game numbers; x and y are float
+        arrays of ball positions for those games"""
+        field = self._field
+        grid = field.grid
+        size = field.size
+        first = numpy.empty(len(games), dtype=numpy.int_)
+        first.fill(size)
+        for (cx, cy) in ((x, y), (x + BALL_DIAMETER, y), (x, y + BALL_DIAMETER), (x + BALL_DIAMETER, y + BALL_DIAMETER)):
+            col = numpy.floor((cx - grid.left) / grid.pitch_x).astype(numpy.int_)
+            row = numpy.floor((grid.top - cy) / grid.pitch_y).astype(numpy.int_)
+            for r in (row-1, row):
+                for c in (col-1, col):
+                    inside = (0 <= r) & (r < grid.rows) & (0 <= c) & (c < grid.columns)
+                    index = numpy.where(inside, r*grid.columns+c, 0)
+                    left = field.x[index]
+                    bottom = field.y[index]
+                    hit = (inside & self.alive[games, index] &
+                           (left <= cx) & (cx <= left + field.width[index]) &
+                           (bottom <= cy) & (cy <= bottom + field.height[index]))
+                    first = numpy.where(hit & (index < first), index, first)
+        return numpy.where(first < size, first, -1)
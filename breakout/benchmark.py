@@ -0,0 +1,560 @@
+# benchmark.py
+# Tech Kuo(thk42) and Charles Lai(cjl223)
+# 10-18-26
+"""Benchmark module for Breakout
+
+This module times Breakout frame by frame over a grid of cases: board sizes
+(from 10x10 up to 200x200), ball speeds, and the fraction of bricks still in
+play.  Each case plays a seeded game for a fixed number of frames, with the
+paddle following the ball, and reports the frames per second, the median
+(p50) and 99th percentile (p99) frame times, and the allocations per frame.
+
+There are two modes.  By default each frame is a call to Breakout.update in
+controller.py, with the bricks, paddle and ball widgets being kept up to date
+(this needs Kivy; no window is shown).  With --headless, each frame is a call
+to model.Game.step, which needs no Kivy and times the collision code alone.
+
+Allocations are counted two ways.  "widgets" is the number of graphics
+objects made per frame (Breakout.allocations; None when headless), and
+"objects" is the net growth per frame in Python objects tracked by the
+garbage collector (which is turned off while timing).
+
+The results are printed as JSON.  They can be saved as a baseline with
+--save, and checked against a saved baseline with --baseline: any case that
+is slower than the baseline by more than the tolerance, or allocates more,
+is reported, and the exit status is 1.  Timings on a shared machine drift
+by a third or more for seconds at a time, so the whole grid is timed RUNS
+times over and each case reports the median of its runs, both when a
+baseline is saved and when one is checked.  Every report also times a fixed
+loop of plain Python, and the baseline timings are scaled by how much
+faster or slower that loop ran, so that a machine that is busy (or just
+slower) as a whole does not look like a regression.
+
+Usage from the command line:
+
+    python benchmark.py [--headless] [--frames N] [--quick] [--balls N] [--runs N]
+                        [--save FILE] [--baseline [FILE]] [--tolerance T]
+    python benchmark.py --idle
+
+With --balls, every serve puts N balls into play (a multi-ball game), and
+the paddle follows the first of them.  A case is only compared with a
+baseline case with the same number of balls.
+
+With --idle, the grid is not timed.  Instead a headless stand-in for the
+frame loop of GameController is run for IDLE_SECONDS in each of three
+states, and the CPU time it used in each is printed (see idle_report).
+
+The stored baseline benchmark_baseline.json (the default for --baseline,
+found next to this module) was made with --headless --runs 9.
+Timings depend on the machine, so make a new baseline on the machine where
+the checks are run."""
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import time
+import timeit
+from model import *
+
+# CONSTANTS
+
+# Board sizes, as (columns, rows)
+BOARDS = [(10, 10), (25, 25), (50, 50), (100, 100), (200, 200)]
+# Ball speeds, as multiples of the serve speed
+SPEEDS = [1.0, 2.0]
+# Fractions of the bricks left in play at the start
+LIVE = [1.0, 0.5, 0.1]
+# Smaller grid for --quick
+QUICK_BOARDS = [(10, 10), (50, 50)]
+QUICK_SPEEDS = [1.0]
+QUICK_LIVE = [1.0]
+
+# Frames timed per pass, after WARMUP_FRAMES untimed frames.  The grid is
+# timed RUNS times, one pass per case each time, and each case keeps the
+# median of its passes.  Passes of one case are spread out over the whole
+# benchmark, so a few seconds of other work on the machine only slows some of
+# them.  REPEAT is the number of passes of the calibration loop.
+FRAMES = 1000
+WARMUP_FRAMES = 60
+RUNS = 5
+REPEAT = 5
+
+# A case regresses if it is slower than its baseline by more than this
+# fraction.  Even the medians of unchanged code drift by about a fifth from
+# one minute to the next on a shared machine, so smaller changes are not
+# reported.
+TOLERANCE = 0.35
+
+# The seed of every game, so that each case plays the same frames every run
+SEED = 12345
+
+# The baseline that is checked in, next to this module
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+
+# Iterations of the calibration loop
+CALIBRATION = 200000
+
+# Seconds idle_report runs each state for.  os.times counts CPU time in ticks
+# of 10 ms, so this is long enough for a tick to be 0.1% of it.
+IDLE_SECONDS = 10.0
+
+
+# FUNCTIONS
+def board(columns, rows):
+    """Returns: the board tuple (columns, rows, brick_width) for a board of the given size
+
+    The brick width is computed as in fix_bricks in __main__.py, except that
+    it is at least 1.  Past about 50 columns the formula gives bricks of no
+    width, and such boards run off the right of the screen.  The grid index
+    never looks up the bricks past the right wall, so on these boards only
+    the columns on screen are part of the work of a frame; the extra
+    columns cost memory and layout time, not frame time.
+
+    Precondition: columns and rows are ints > 0"""
+    return (columns, rows, max(GAME_WIDTH / columns - BRICK_SEP_H, 1))
+
+
+def follow(game):
+    """Returns: the paddle position that centers the paddle under the ball
+
+    Precondition: game is a started model.Game"""
+    if game.ball is None:
+        return game.paddle.x
+    return game.ball.x + BALL_DIAMETER/2 - PADDLE_WIDTH/2
+
+
+def percentile(times, fraction):
+    """Returns: the value at the given fraction of the way through the sorted list times
+
+    Precondition: times is a non-empty sorted list of numbers; fraction is a
+    number between 0 and 1"""
+    return times[min(int(fraction * len(times)), len(times) - 1)]
+
+
+def measure(make, frames=FRAMES):
+    """Returns: a dictionary of the timings of frames frames of play with a new driver from make()
+
+    The keys are fps, p50_ms, p99_ms, widgets and objects (see the module
+    description).  The garbage collector is turned off while timing.  To
+    smooth out noise, run calls this several times and takes the median.
+
+    Precondition: make is a function with no arguments that returns a new
+    _ModelDriver or _ControllerDriver; frames is an int > 0"""
+    clock = timeit.default_timer
+    driver = make()
+    for y in range(WARMUP_FRAMES):
+        driver.frame()
+    times = []
+    widgets = 0
+    gc.collect()
+    gc.disable()
+    try:
+        objects = gc.get_count()[0]
+        for y in range(frames):
+            start = clock()
+            widgets += driver.frame()
+            times.append(clock() - start)
+        objects = gc.get_count()[0] - objects
+    finally:
+        gc.enable()
+    total = sum(times)
+    times.sort()
+    return {'fps': frames / total if total > 0 else float('inf'),
+            'p50_ms': 1000 * percentile(times, 0.50),
+            'p99_ms': 1000 * percentile(times, 0.99),
+            'widgets': None if not driver.counts_widgets else widgets / float(frames),
+            'objects': objects / float(frames)}
+
+
+def calibrate(repeat=REPEAT):
+    """Returns: the best time in ms, over repeat runs, of a fixed loop of plain Python
+
+    Precondition: repeat is an int > 0"""
+    clock = timeit.default_timer
+    best = None
+    for x in range(repeat):
+        start = clock()
+        total = 0
+        for i in xrange(CALIBRATION):
+            total += i * i % 7
+        time = 1000 * (clock() - start)
+        best = time if best is None else min(best, time)
+    return best
+
+
+def run(headless=False, frames=FRAMES, boards=BOARDS, speeds=SPEEDS, live=LIVE, balls=1, runs=RUNS):
+    """Returns: the benchmark report, a dictionary that can be written as JSON
+
+    Times every combination of board, speed and live fraction, with balls
+    balls served at a time.  The grid is timed runs times over, with one
+    pass of each case every time, and each timing of a case is the median
+    of its runs (see `median`).  The report has the mode, the number of
+    frames and runs, and a list of results, one a case.
+
+    Precondition: headless is a bool; frames and runs are ints > 0; boards
+    is a list of (columns, rows) tuples; speeds and live are lists of
+    numbers > 0; balls is an int > 0"""
+    kind = _ModelDriver if headless else _ControllerDriver
+    cases = [(columns, rows, speed, fraction) for (columns, rows) in boards for speed in speeds for fraction in live]
+    passes = [[] for case in cases]
+    calibrations = [calibrate()]
+    for x in range(runs):
+        for (case, (columns, rows, speed, fraction)) in zip(passes, cases):
+            make = lambda: kind(board(columns, rows), speed, fraction, balls)
+            case.append(measure(make, frames))
+        calibrations.append(calibrate())
+    results = []
+    for (case, (columns, rows, speed, fraction)) in zip(passes, cases):
+        result = {'columns': columns, 'rows': rows, 'speed': speed, 'live': fraction, 'balls': balls}
+        for key in case[0]:
+            result[key] = median([timing[key] for timing in case])
+        results.append(result)
+    return {'mode': 'headless' if headless else 'controller', 'frames': frames, 'runs': runs,
+            'calibration_ms': median(calibrations), 'results': results}
+
+
+def median(values):
+    """Returns: the median of values, or None if values holds None
+
+    Precondition: values is a non-empty list of numbers, or of Nones"""
+    if None in values:
+        return None
+    values = sorted(values)
+    middle = len(values)/2
+    return values[middle] if len(values) % 2 == 1 else (values[middle-1] + values[middle]) / 2.0
+
+
+def compare(report, baseline, tolerance=TOLERANCE):
+    """Returns: a list of strings describing every case of report that regressed from baseline
+
+    A case regresses if its fps is lower than the baseline fps by more than
+    the fraction tolerance, if its p50 frame time is higher by more than
+    that fraction, if its p99 frame time is more than twice that much higher
+    (it is noisier), or if it makes more widgets or objects per frame.  Cases
+    that are not in the baseline (or were run in another mode) are skipped.
+    Allocations are only compared if both reports timed the same number of
+    frames, as the allocations of the set-up are spread over the frames.
+    The baseline timings are first scaled by the ratio of the calibration
+    times of the two reports.
+
+    Precondition: report and baseline are reports returned by `run`;
+    tolerance is a number >= 0"""
+    if report['mode'] != baseline['mode']:
+        return []
+    scale = baseline['calibration_ms'] / report['calibration_ms']
+    cases = {}
+    for result in baseline['results']:
+        cases[_key(result)] = result
+    problems = []
+    for result in report['results']:
+        base = cases.get(_key(result))
+        if base is None:
+            continue
+        name = '%(columns)dx%(rows)d speed %(speed)g live %(live)g balls %(balls)d' % result
+        fps = base['fps'] * scale
+        if result['fps'] < fps * (1 - tolerance):
+            problems.append('%s: %.0f fps, baseline %.0f' % (name, result['fps'], fps))
+        for (key, allowed) in (('p50_ms', tolerance), ('p99_ms', 2*tolerance)):
+            time = base[key] / scale
+            if result[key] > time * (1 + allowed):
+                problems.append('%s: %s %.3f ms, baseline %.3f' % (name, key[:3], result[key], time))
+        for field in ('widgets', 'objects'):
+            if report['frames'] != baseline['frames']:
+                break
+            if result[field] is not None and base[field] is not None and result[field] > base[field] + 0.01:
+                problems.append('%s: %.2f %s per frame, baseline %.2f' % (name, result[field], field, base[field]))
+    return problems
+
+
+def idle_report(seconds=IDLE_SECONDS):
+    """Returns: a dictionary of the CPU used by a stand-in for the frame loop in each state
+
+    This needs no Kivy.  The loop ticks FRAME_RATE times a second, sleeping
+    between ticks, and each tick does the model work of a frame of
+    Breakout.update.  Each state is run for seconds seconds of wall time:
+
+        'playing': a ball is in play; every tick steps the game and moves
+        the paddle under the ball
+
+        'waiting_polled': the game waits for a serve and the loop keeps
+        ticking, as GameController did before it could go idle
+
+        'waiting_asleep': the game waits for a serve and the loop is
+        stopped, as GameController._sleep does; it wakes once, when the
+        serve is due
+
+    Each value is a dictionary with the keys cpu, wall (seconds) and percent,
+    as in graphics.CpuMeter.report.  The CPU time is that of the process
+    (os.times).  Kivy's own work in a frame (its clock, events and drawing)
+    is not part of the stand-in, so under Kivy the cost of a polled frame,
+    and so the saving from sleeping, is larger.
+
+    Precondition: seconds is a number > 0"""
+    game = Game(seed=SEED)
+    game.start()
+    game.serve()
+    stepper = FixedStep(PHYSICS_RATE, MAX_CATCHUP_STEPS)
+    report = {}
+    report['playing'] = _tick(lambda dt: _playFrame(game, stepper, dt), seconds)
+    game.reset()
+    game.start()
+    report['waiting_polled'] = _tick(lambda dt: stepper.reset(), seconds)
+    start = _usage()
+    time.sleep(seconds)
+    report['waiting_asleep'] = _usage(start)
+    return report
+
+
+def _tick(frame, seconds):
+    """Returns: the CPU used (as in idle_report) by calling frame(dt) FRAME_RATE times a second for seconds seconds
+
+    Precondition: frame is a function of the time since the last tick;
+    seconds is a number > 0"""
+    clock = timeit.default_timer
+    start = _usage()
+    begin = last = clock()
+    ticks = 0
+    while last - begin < seconds:
+        now = clock()
+        frame(now - last)
+        last = now
+        ticks += 1
+        time.sleep(max(begin + ticks / float(FRAME_RATE) - clock(), 0))
+    return _usage(start)
+
+
+def _playFrame(game, stepper, dt):
+    """Plays the model part of one frame of Breakout.update, serving again if the ball is lost
+
+    Precondition: game is a started model.Game; stepper is a FixedStep; dt
+    is a number >= 0"""
+    if game.state == STATE_COMPLETE:
+        game.reset()
+        game.start()
+    if game.state == STATE_PAUSED:
+        game.serve()
+    game.move_paddle(follow(game))
+    for x in range(stepper.advance(dt)):
+        game.step(stepper.frames)
+
+
+def _usage(start=None):
+    """Returns: the process CPU time and wall time now, or since start, as a dictionary
+
+    If start is None, the result has the keys cpu and wall.  Otherwise it is
+    the time since start (a result of _usage()) with the key percent too.
+
+    Precondition: start is None or a dictionary returned by _usage()"""
+    times = os.times()
+    usage = {'cpu': times[0] + times[1], 'wall': timeit.default_timer()}
+    if start is None:
+        return usage
+    cpu = usage['cpu'] - start['cpu']
+    wall = usage['wall'] - start['wall']
+    return {'cpu': cpu, 'wall': wall, 'percent': 100.0 * cpu / wall if wall > 0 else 0.0}
+
+
+def _key(result):
+    """Returns: the case of a result, as a tuple (columns, rows, speed, live, balls)
+
+    Reports from before multi-ball games have no balls; they had one.
+
+    Precondition: result is one of the results of a report"""
+    return (result['columns'], result['rows'], result['speed'], result['live'], result.get('balls', 1))
+
+
+def _thin(game, fraction):
+    """Returns: the bricks removed from game so that about fraction of them are left
+
+    The bricks removed are picked with a random.Random seeded with SEED.
+
+    Precondition: game is a model.Game that was just started; fraction is a
+    number between 0 and 1"""
+    field = game.bricks
+    chosen = random.Random(SEED).sample(xrange(field.size), int(field.size * (1 - fraction)))
+    removed = [field[index] for index in chosen]
+    for index in chosen:
+        field.remove(index)
+    return removed
+
+
+# CLASSES
+class _ModelDriver(object):
+    """Instance plays frames of a model.Game, with no view.
+
+    A new game is started whenever the last one ends."""
+    # Whether frame counts widgets made
+    counts_widgets = False
+
+    # The game being played
+    # Invariant: A started model.Game
+    _game = None
+
+    # The board, ball speed multiple, fraction of live bricks and balls per serve
+    # Invariant: As for the arguments to the constructor
+    _board = None
+    _speed = 1.0
+    _live = 1.0
+    _balls = 1
+
+    def __init__(self, board, speed, live, balls=1):
+        """Constructor: a driver for games on board with the given ball speed, bricks in play and balls per serve
+
+        Precondition: board is a tuple (columns, rows, brick_width); speed
+        is a number > 0; live is a number between 0 and 1; balls is an int > 0"""
+        self._board = board
+        self._speed = speed
+        self._live = live
+        self._balls = balls
+        self._game = Game(board[0], board[1], board[2], seed=SEED, balls=balls)
+        self._begin()
+
+    def frame(self):
+        """Returns: 0, after playing one frame
+
+        The ball is served if there is none, and the paddle follows the ball."""
+        game = self._game
+        if game.state == STATE_COMPLETE:
+            game.reset()
+            self._begin()
+        if game.state == STATE_PAUSED:
+            game.serve()
+            for ball in game.balls:
+                ball.vx *= self._speed
+                ball.vy *= self._speed
+        game.move_paddle(follow(game))
+        game.step()
+        return 0
+
+    def _begin(self):
+        """Starts a new game and removes bricks until the live fraction are left"""
+        self._game.start()
+        _thin(self._game, self._live)
+
+
+class _ControllerDriver(object):
+    """Instance plays frames of a controller.Breakout, with its view.
+
+    The game is driven as a player would drive it: a touch starts the game,
+    and the paddle is dragged under the ball.  Serves are made at once,
+    rather than after 3 seconds.  A new controller is made if the game is
+    won, as the controller does not start again after a win."""
+    # Whether frame counts widgets made
+    counts_widgets = True
+
+    # The controller being played
+    # Invariant: An initialized controller.Breakout
+    _breakout = None
+
+    # The touch that drags the paddle
+    # Invariant: A _Touch
+    _touch = None
+
+    # The board, ball speed multiple, fraction of live bricks and balls per serve
+    # Invariant: As for the arguments to the constructor
+    _board = None
+    _speed = 1.0
+    _live = 1.0
+    _balls = 1
+
+    def __init__(self, board, speed, live, balls=1):
+        """Constructor: a driver for games on board with the given ball speed, bricks in play and balls per serve
+
+        Precondition: board is a tuple (columns, rows, brick_width); speed
+        is a number > 0; live is a number between 0 and 1; balls is an int > 0"""
+        # Imported here so that the headless benchmark does not need Kivy.
+        # Importing Window gives the widgets a GL context.
+        from kivy.core.window import Window
+        import controller
+        controller.BRICKS_IN_ROW, controller.BRICK_ROWS, controller.BRICK_WIDTH = board
+        self._board = board
+        self._speed = speed
+        self._live = live
+        self._balls = balls
+        self._touch = _Touch()
+        self._create()
+
+    def frame(self):
+        """Returns: the number of widgets made, after playing one frame
+
+        The ball is served if there is none, and the paddle is dragged to
+        follow the ball, before the call to update."""
+        breakout = self._breakout
+        game = breakout.model
+        if game.won:
+            self._create()
+            breakout = self._breakout
+            game = breakout.model
+        elif game.state == STATE_INACTIVE:
+            self._begin()
+        if game.state == STATE_PAUSED:
+            breakout.serve()
+            for ball in game.balls:
+                ball.vx *= self._speed
+                ball.vy *= self._speed
+        self._touch.x = follow(game) + PADDLE_WIDTH/2
+        breakout.on_touch_move(breakout.view, self._touch)
+        breakout.update(1.0/PHYSICS_RATE)
+        return breakout.allocations
+
+    def _create(self):
+        """Makes a new controller and starts a game with it"""
+        import controller
+        self._breakout = controller.Breakout(SEED, replaying=True, balls=self._balls)
+        self._breakout.initialize()
+        self._begin()
+
+    def _begin(self):
+        """Starts a game with a touch, thins the bricks, and grabs the paddle"""
+        breakout = self._breakout
+        touch = self._touch
+        touch.x, touch.y = (0.0, GAME_HEIGHT-1.0)
+        breakout.on_touch_down(breakout.view, touch)
+        breakout._removeBricks(_thin(breakout.model, self._live))
+        paddle = breakout.model.paddle
+        touch.x, touch.y = (paddle.x + PADDLE_WIDTH/2, paddle.y + PADDLE_HEIGHT/2)
+        breakout.on_touch_down(breakout.view, touch)
+
+
+class _Touch(object):
+    """Instance is a stand-in for a Kivy MotionEvent, with just a position"""
+    # The touch position
+    # Invariant: Values are floats
+    x = 0.0
+    y = 0.0
+
+
+# Application code
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Times Breakout frames over a grid of boards.')
+    parser.add_argument('--headless', action='store_true', help='time model.Game.step without Kivy')
+    parser.add_argument('--frames', type=int, default=FRAMES, help='frames timed per case')
+    parser.add_argument('--quick', action='store_true', help='time a small grid of cases')
+    parser.add_argument('--balls', type=int, default=1, help='balls put into play by each serve')
+    parser.add_argument('--runs', type=int, default=RUNS, help='times the grid is timed; each case keeps its median')
+    parser.add_argument('--save', metavar='FILE', help='write the results to FILE as a baseline')
+    parser.add_argument('--baseline', metavar='FILE', nargs='?', const=BASELINE,
+                        help='check the results against FILE (default '+BASELINE+')')
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE, help='slowdown allowed, as a fraction')
+    parser.add_argument('--idle', action='store_true', help='measure the CPU used by the frame loop in each state')
+    args = parser.parse_args()
+    if args.idle:
+        print json.dumps(idle_report(), indent=1, sort_keys=True)
+        sys.exit(0)
+    if args.quick:
+        report = run(args.headless, args.frames, QUICK_BOARDS, QUICK_SPEEDS, QUICK_LIVE, args.balls, args.runs)
+    else:
+        report = run(args.headless, args.frames, balls=args.balls, runs=args.runs)
+    print json.dumps(report, indent=1, sort_keys=True)
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(report, f, indent=1, sort_keys=True)
+    if args.baseline:
+        with open(args.baseline) as f:
+            problems = compare(report, json.load(f), args.tolerance)
+        for problem in problems:
+            sys.stderr.write('REGRESSION ' + problem + '\n')
+        if problems:
+            sys.exit(1)
@@ -5,8 +5,21 @@
 """Classes for three different color models.
 
 The classes are RGB, CMYK, HSV.  The constants in this module are all
-defined in the RGB color space."""
+defined in the RGB color space.
+
+The class Color is an immutable RGB value for drawing.  Colors are interned
+(there is only ever one Color with the same channels), and each one works out
+its openGL form once, so that drawing with a Color allocates nothing.  The
+constants in this module are Colors.
+
+The functions at the end of this module convert whole NumPy arrays of colors
+at once, in the same units as the classes: RGB channels from 0 to 255, hue
+in degrees, saturation and value from 0 to 1, and CMYK from 0 to 100.  An
+array has one color per row (the last axis holds the channels).  The function
+gradient makes GL-ready palettes from a few colors."""
 import colorsys
+import numpy
+import weakref
 
 # To handle round off error
 _epsilon = 1e-13
@@ -108,17 +121,24 @@ class RGB(object):
         self.alpha = a
             
     def __eq__(self, other):
-        """Returns: True if self and other are equivalent RGB colors. """
-        return (type(other) == RGB and self.red == other.red and 
+        """Returns: True if self and other are equivalent RGB colors, or an RGB color and an equivalent Color. """
+        return (type(other) in (RGB, Color) and self.red == other.red and 
                 self.green == other.green and self.blue == other.blue and
                 self.alpha == other.alpha)
 
     def __ne__(self, other):
-        """Returns: True if self and other are not equivalent RGB colors. """
-        return (type(other) != RGB or self.red != other.red or 
+        """Returns: True if self and other are not equivalent colors. """
+        return (not type(other) in (RGB, Color) or self.red != other.red or 
                 self.green != other.green or self.blue != other.blue or
                 self.alpha != other.alpha)
 
+    def __hash__(self):
+        """Returns: a hash of the channels of this color, the same as that of an equal Color.
+        
+        As an RGB color is mutable, do not change one while it is in a set or
+        is a key of a dictionary. """
+        return hash((self.red, self.green, self.blue, self.alpha))
+
     def __str__(self):
         """Returns: Readable string representation of this color. """
         return "("+str(self.red)+","+str(self.green)+","+str(self.blue)+","+str(self.alpha)+")"
@@ -374,43 +394,342 @@ class HSV(object):
         return [rgb[0], rgb[1], rgb[2], 1.0]
 
 
+class Color(object):
+    """An instance is an immutable RGB color value.
+    
+    A Color cannot be changed once made.  Making a Color with the same channels
+    as one that already exists gives back the existing object, and the openGL
+    form of a Color is computed once, when it is made.  Use a Color wherever an
+    RGB value is drawn many times, or is set on graphics objects every frame."""
+    __slots__ = ('_red','_green','_blue','_alpha','_gl','__weakref__')
+    
+    # The Colors that exist, by their channels
+    _interned = weakref.WeakValueDictionary()
+    
+    @property
+    def red(self):
+        """The red channel.
+        
+        **Invariant**: Value is an int between 0 and 255, inclusive."""
+        return self._red
+    
+    @property
+    def green(self):
+        """The green channel.
+        
+        **Invariant**: Value is an int between 0 and 255, inclusive."""
+        return self._green
+    
+    @property
+    def blue(self):
+        """The blue channel.
+        
+        **Invariant**: Value is an int between 0 and 255, inclusive."""
+        return self._blue
+    
+    @property
+    def alpha(self):
+        """The alpha channel.
+        
+        **Invariant**: Value is an int between 0 and 255, inclusive."""
+        return self._alpha
+    
+    def __new__(cls, r, g, b, a=255):
+        """**Constructor**: returns the Color (r,g,b,a), making it if it does not exist yet.
+        
+            :param r: red value
+            **Precondition**: int between 0 and 255, inclusive.
+        
+            :param g: green value
+            **Precondition**: int between 0 and 255, inclusive.
+        
+            :param b: blue value
+            **Precondition**: int between 0 and 255, inclusive.
+        
+            :param a: alpha value (default 255)
+            **Precondition**: int between 0 and 255, inclusive."""
+        key = (r, g, b, a)
+        for value in key:
+            assert (type(value) == int), "value %s is not an int" % `value`
+            assert (value >= 0 and value <= 255), "value %s is outside of range [0,255]" % `value`
+        color = cls._interned.get(key)
+        if color is None:
+            color = object.__new__(cls)
+            color._red = r
+            color._green = g
+            color._blue = b
+            color._alpha = a
+            color._gl = (r/255.0, g/255.0, b/255.0, a/255.0)
+            cls._interned[key] = color
+        return color
+    
+    def __reduce__(self):
+        """Returns: the arguments to make this color again (for copy and pickle)"""
+        return (Color, (self._red, self._green, self._blue, self._alpha))
+    
+    def __eq__(self, other):
+        """Returns: True if self and other are equivalent Colors, or a Color and an equivalent RGB color. """
+        return (type(other) in (Color, RGB) and self._red == other.red and
+                self._green == other.green and self._blue == other.blue and
+                self._alpha == other.alpha)
+    
+    def __ne__(self, other):
+        """Returns: True if self and other are not equivalent colors. """
+        return not self == other
+    
+    def __hash__(self):
+        """Returns: a hash of the channels of this color. """
+        return hash((self._red, self._green, self._blue, self._alpha))
+    
+    def __str__(self):
+        """Returns: Readable string representation of this color. """
+        return "("+str(self._red)+","+str(self._green)+","+str(self._blue)+","+str(self._alpha)+")"
+    
+    def __repr__(self):
+        """Returns: Unambiguous String representation of this color. """
+        return "Color(red="+str(self._red)+",green="+str(self._green)+",blue="+str(self._blue)+",alpha="+str(self._alpha)+")"
+    
+    def glColor(self):
+        """**Returns**: 4 element tuple of the attributes in the range 0 to 1
+        
+        This is a conversion of this object into a format that can be used in
+        openGL graphics.  The same tuple is returned every time."""
+        return self._gl
+    
+    def rgb(self):
+        """**Returns**: a new RGB object with the same channels as this color"""
+        return RGB(self._red, self._green, self._blue, self._alpha)
+
+
+def freeze(color):
+    """**Returns**: the Color equivalent to color.
+    
+        :param color: the color to convert
+        **Precondition**: a Color, RGB or HSV object
+    
+    A Color is returned as it is.  An HSV color is rounded to the nearest
+    8-bit channels."""
+    if type(color) == Color:
+        return color
+    if type(color) == RGB:
+        return Color(color.red, color.green, color.blue, color.alpha)
+    assert type(color) == HSV, `color`+' is not a valid color'
+    rgb = colorsys.hsv_to_rgb(color.hue/360.0,color.saturation,color.value)
+    return Color(int(round(rgb[0]*255)), int(round(rgb[1]*255)), int(round(rgb[2]*255)))
+
+
 # Color Constants
 
 #: The color white in the default RGB space.
-WHITE = RGB(255, 255, 255)
+WHITE = Color(255, 255, 255)
 
 #: The color light gray in the default RGB space.
-LIGHT_GRAY = RGB(192, 192, 192)
+LIGHT_GRAY = Color(192, 192, 192)
 
 #: The color gray in the default RGB space.
-GRAY = RGB(128, 128, 128)
+GRAY = Color(128, 128, 128)
 
 #: The color dark gray in the default RGB space.
-DARK_GRAY = RGB(64, 64, 64)
+DARK_GRAY = Color(64, 64, 64)
 
 #: The color black in the default RGB space.
-BLACK = RGB(0, 0, 0)
+BLACK = Color(0, 0, 0)
 
 #: The color red, in the default RGB space.
-RED = RGB(255, 0, 0)
+RED = Color(255, 0, 0)
 
 #: The color pink in the default RGB space.
-PINK = RGB(255, 175, 175)
+PINK = Color(255, 175, 175)
 
 #: The color orange in the default RGB space.
-ORANGE = RGB(255, 200, 0)
+ORANGE = Color(255, 200, 0)
 
 #: The color yellow in the default RGB space.
-YELLOW = RGB(255, 255, 0)
+YELLOW = Color(255, 255, 0)
 
 #: The color green in the default RGB space.
-GREEN = RGB(0, 255, 0);
+GREEN = Color(0, 255, 0)
 
 #: The color magenta in the default RGB space.
-MAGENTA = RGB(255, 0, 255)
+MAGENTA = Color(255, 0, 255)
 
 #: The color cyan in the default RGB space.
-CYAN = RGB(0, 255, 255)
+CYAN = Color(0, 255, 255)
 
 #: The color blue in the default RGB space.
-BLUE = RGB(0, 0, 255)
\ No newline at end of file
+BLUE = Color(0, 0, 255)
+
+# Array Conversions
+
+# Where red, green and blue start on the hue circle, in sixths of a turn, for hsv_to_rgb
+_HUE_OFFSETS = numpy.array([5.0, 3.0, 1.0])
+
+
+def rgb_to_hsv(rgb):
+    """**Returns**: a new float array of the HSV colors equivalent to rgb.
+    
+        :param rgb: the colors to convert
+        **Precondition**: a numeric array with 3 channels (red, green and blue,
+        0 to 255) on its last axis
+    
+    The result has the same shape as rgb.  Gray colors get hue 0."""
+    rgb = numpy.asarray(rgb, dtype=numpy.float64)/255.0
+    r, g, b = rgb[...,0], rgb[...,1], rgb[...,2]
+    v = rgb.max(axis=-1)
+    c = v - rgb.min(axis=-1)
+    safe = numpy.where(c > 0, c, 1.0)
+    h = numpy.where(v == r, (g-b)/safe,
+        numpy.where(v == g, 2.0+(b-r)/safe, 4.0+(r-g)/safe))
+    h = numpy.where(c > 0, (h*60.0) % 360.0, 0.0)
+    s = numpy.where(v > 0, c/numpy.where(v > 0, v, 1.0), 0.0)
+    return numpy.stack((h, s, v), axis=-1)
+
+
+def hsv_to_rgb(hsv):
+    """**Returns**: a new float array of the RGB colors (0 to 255) equivalent to hsv.
+    
+        :param hsv: the colors to convert
+        **Precondition**: a numeric array with 3 channels (hue in degrees,
+        saturation and value from 0 to 1) on its last axis
+    
+    The result has the same shape as hsv.  Hues outside [0,360) wrap around.
+    
+    Each channel is v - v*s*clamp(min(k,4-k)), where k is the distance round
+    the hue circle from where the channel starts; this needs no branches, so
+    all three channels are worked out at once."""
+    hsv = numpy.asarray(hsv, dtype=numpy.float64)
+    v = hsv[...,2:3]
+    k = (hsv[...,0:1] % 360.0)*(1/60.0) + _HUE_OFFSETS
+    numpy.subtract(k, 6.0, out=k, where=k >= 6.0)
+    numpy.minimum(k, 4.0-k, out=k)
+    numpy.clip(k, 0.0, 1.0, out=k)
+    k *= -v*hsv[...,1:2]
+    k += v
+    k *= 255.0
+    return k
+
+
+def rgb_to_cmyk(rgb):
+    """**Returns**: a new float array of the CMYK colors (0 to 100) equivalent to rgb.
+    
+        :param rgb: the colors to convert
+        **Precondition**: a numeric array with 3 channels (red, green and blue,
+        0 to 255) on its last axis
+    
+    The result has 4 channels on its last axis.  Black gets cyan, magenta and
+    yellow 0."""
+    rgb = numpy.asarray(rgb, dtype=numpy.float64)/255.0
+    k = 1.0 - rgb.max(axis=-1)
+    white = 1.0 - k
+    cmy = (white[...,None] - rgb)/numpy.where(white > 0, white, 1.0)[...,None]
+    return numpy.concatenate((cmy, k[...,None]), axis=-1)*100.0
+
+
+def cmyk_to_rgb(cmyk):
+    """**Returns**: a new float array of the RGB colors (0 to 255) equivalent to cmyk.
+    
+        :param cmyk: the colors to convert
+        **Precondition**: a numeric array with 4 channels (cyan, magenta, yellow
+        and black, 0 to 100) on its last axis
+    
+    The result has 3 channels on its last axis."""
+    cmyk = numpy.asarray(cmyk, dtype=numpy.float64)/100.0
+    return (1.0 - cmyk[...,:3])*(1.0 - cmyk[...,3:])*255.0
+
+
+def hsv_to_cmyk(hsv):
+    """**Returns**: a new float array of the CMYK colors equivalent to hsv.
+    
+    See `hsv_to_rgb` and `rgb_to_cmyk`."""
+    return rgb_to_cmyk(hsv_to_rgb(hsv))
+
+
+def cmyk_to_hsv(cmyk):
+    """**Returns**: a new float array of the HSV colors equivalent to cmyk.
+    
+    See `cmyk_to_rgb` and `rgb_to_hsv`."""
+    return rgb_to_hsv(cmyk_to_rgb(cmyk))
+
+
+def to_gl(rgb, alpha=255):
+    """**Returns**: a new float32 array of rgba values from 0 to 1, for openGL.
+    
+        :param rgb: the colors to convert
+        **Precondition**: a numeric array with 3 or 4 channels (red, green,
+        blue and maybe alpha, 0 to 255) on its last axis
+    
+        :param alpha: the alpha of colors that have none
+        **Precondition**: a number between 0 and 255 (default 255)
+    
+    The result has 4 channels on its last axis, clamped to [0,1]."""
+    rgb = numpy.asarray(rgb, dtype=numpy.float32)
+    gl = numpy.empty(rgb.shape[:-1]+(4,), dtype=numpy.float32)
+    gl[...,:rgb.shape[-1]] = rgb
+    if rgb.shape[-1] == 3:
+        gl[...,3] = alpha
+    gl *= 1.0/255.0
+    return numpy.clip(gl, 0.0, 1.0, out=gl)
+
+
+def to_bytes(gl):
+    """**Returns**: the rgba values in gl as a string of bytes, 4 per color.
+    
+        :param gl: the colors to convert
+        **Precondition**: a float array with 4 channels from 0 to 1 on its last axis
+    
+    This is the format of an 'rgba' texture with buffer format 'ubyte'."""
+    gl = numpy.clip(numpy.asarray(gl, dtype=numpy.float32), 0.0, 1.0)
+    return (gl*255.0+0.5).astype(numpy.uint8).tostring()
+
+
+def to_array(colors):
+    """**Returns**: a new float array of the RGBA values (0 to 255) of colors.
+    
+        :param colors: the colors to convert
+        **Precondition**: a sequence of Color, RGB or HSV objects
+    
+    The result has one row of 4 channels per color."""
+    return numpy.array([freeze(color).glColor() for color in colors], dtype=numpy.float64).reshape(-1,4)*255.0
+
+
+def gradient(stops, count, space='rgb'):
+    """**Returns**: a new float32 array of count colors that blend from stop to stop, for openGL.
+    
+        :param stops: the colors to blend between, spaced evenly from first to last
+        **Precondition**: a sequence of at least one Color, RGB or HSV object,
+        or an array of RGBA values (0 to 255) with one row per stop
+    
+        :param count: the number of colors to make
+        **Precondition**: an int >= 0
+    
+        :param space: the color model to blend in
+        **Precondition**: one of 'rgb', 'hsv' or 'cmyk' (default 'rgb')
+    
+    The result has one row of 4 rgba values from 0 to 1 per color (see `to_gl`),
+    so it can be given straight to a renderer, or to `to_bytes` for a texture.
+    Blending in 'hsv' goes the short way round the hue circle."""
+    assert space in ('rgb','hsv','cmyk'), `space`+' is not a color model'
+    if isinstance(stops, numpy.ndarray):
+        rgba = numpy.asarray(stops, dtype=numpy.float64).reshape(-1,4)
+    else:
+        rgba = to_array(stops)
+    assert len(rgba) > 0, 'a gradient needs at least one color'
+    if space == 'hsv':
+        channels = rgb_to_hsv(rgba[:,:3])
+        turns = numpy.diff(channels[:,0])
+        channels[1:,0] = channels[0,0]+numpy.cumsum((turns+180.0) % 360.0 - 180.0)
+    elif space == 'cmyk':
+        channels = rgb_to_cmyk(rgba[:,:3])
+    else:
+        channels = rgba[:,:3]
+    where = numpy.linspace(0.0, 1.0, len(rgba))
+    at = numpy.linspace(0.0, 1.0, count)
+    blend = numpy.empty((count, channels.shape[1]+1))
+    for k in range(channels.shape[1]):
+        blend[:,k] = numpy.interp(at, where, channels[:,k])
+    blend[:,-1] = numpy.interp(at, where, rgba[:,3])
+    if space == 'hsv':
+        blend[:,:3] = hsv_to_rgb(blend[:,:3])
+    elif space == 'cmyk':
+        blend = numpy.concatenate((cmyk_to_rgb(blend[:,:4]), blend[:,4:]), axis=1)
+    return to_gl(blend)
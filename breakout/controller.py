@@ -13,50 +13,23 @@ import random
 from graphics import *
 
 # CONSTANTS
+# The game rules and their constants (GAME_WIDTH, BRICK_ROWS, STATE_ACTIVE, ...)
+# live in module model, so that they can be used without Kivy.  They are
+# imported here so that they can still be changed as controller.BRICK_ROWS etc.
+from model import *
 
-# Width of the game display (all coordinates are in pixels)
-GAME_WIDTH  = 480
-# Height of the game display
-GAME_HEIGHT = 620
-
-# Width of the paddle
-PADDLE_WIDTH = 58
-# Height of the paddle
-PADDLE_HEIGHT = 11
-# Distance of the (bottom of the) paddle up from the bottom
-PADDLE_OFFSET = 30
-
-# Horizontal separation between bricks
-BRICK_SEP_H = 5
-# Vertical separation between bricks
-BRICK_SEP_V = 4
-# Height of a brick
-BRICK_HEIGHT = 8
-# Offset of the top brick row from the top
-BRICK_Y_OFFSET = 70
-
-# Number of bricks per row
-BRICKS_IN_ROW = 10
-# Number of rows of bricks, in range 1..10.
-BRICK_ROWS = 10
-# Width of a brick
-BRICK_WIDTH = GAME_WIDTH / BRICKS_IN_ROW - BRICK_SEP_H
-
-# Diameter of the ball in pixels
-BALL_DIAMETER = 18
-
-# Number of attempts in a game
-NUMBER_TURNS = 3
-
-# Basic game states
-# Game has not started yet
-STATE_INACTIVE = 0
-# Game is active, but waiting for next ball
-STATE_PAUSED   = 1
-# Ball is in play and being animated
-STATE_ACTIVE   = 2
-# Game is over, deactivate all actions
-STATE_COMPLETE = 3
+# Touch positions are rounded to 1/TOUCH_RESOLUTION of a pixel before they are
+# used, so that a recording of them (see module replay) plays back exactly
+TOUCH_RESOLUTION = 8
+
+# The sound played when the ball bounces off the paddle
+PADDLE_SOUND = 'bounce.wav'
+# The sounds played when a brick is removed, by row (repeating down the rows)
+BRICK_SOUNDS = ('plate1.wav', 'plate2.wav', 'saucer1.wav', 'saucer2.wav', 'cup1.wav')
+
+# The names of the states, for the CPU report
+STATE_NAMES = {STATE_INACTIVE: 'inactive', STATE_PAUSED: 'paused',
+               STATE_ACTIVE: 'active', STATE_COMPLETE: 'complete'}
 
 
 # CLASSES
@@ -72,31 +45,90 @@ class Breakout(GameController):
 
         The on_touch methods handle mouse (or finger) input.
 
+    The rules of the game (the ball, paddle, bricks and lives) are held in a
+    model.Game object.  This controller feeds input to that object, steps it
+    once per frame, and keeps the widgets in the view in sync with it.
+
     The class also has fields that provide state to this controller.
     The fields can all be hidden; you do not need properties. However,
     you should clearly state the field invariants, as the various
     methods will rely on them to determine game state."""
     # FIELDS.
 
-    # Current play state of the game; needed by the on_touch methods
-    # Invariant: One of STATE_INACTIVE, STATE_PAUSED, STATE_ACTIVE
-    _state = STATE_INACTIVE
+    # The game rules and state, independent of the view
+    # Invariant: An object that is an instance of model.Game.
+    # Also can be None; only None before initialize is called
+    _game = None
 
-    # List of currently active "bricks" in the game.
-    #Invariant: A list of  objects that are instances of GRectangle (or a
-    #subclass) If list is  empty, then state is STATE_INACTIVE (game over)
-    _bricks = []
+    # The accumulator that turns frame times into fixed physics steps
+    # Invariant: An object that is an instance of model.FixedStep.
+    # Also can be None; only None before initialize is called
+    _stepper = None
+
+    # The widget that draws every brick of the board in one mesh.
+    # Invariant: An object that is an instance of GBrickField, with one
+    # rectangle per brick index in _game.bricks; removed bricks are erased.
+    # Also can be None; only None when the game has not started.
+    _bricks = None
 
     # The player paddle
     # Invariant: An object that is an instance of GRectangle (or a subclass)
-    # Also can be None; if None, then state is STATE_INACTIVE (game over)
+    # Also can be None; if None, then _game.paddle is None
     _paddle = None
 
-    # The ball to bounce about the game board
-    # Invariant: An object that is an instance of GEllipse (or a subclass)
-    # Also can be None; if None, then state is STATE_INACTIVE (game over) or
-    # STATE_PAUSED (waiting for next ball)
-    _ball = None
+    # The balls to bounce about the game board, one for each ball a serve puts
+    # into play.  They are made once and moved in place, so that no widgets
+    # are allocated while the balls are in play.
+    # Invariant: A list of _serving objects that are instances of Ball, or
+    # None before initialize is called.  The first _shown of them are in the
+    # view, and the rest are not.
+    _balls = None
+
+    # Number of Ball widgets in the view
+    # Invariant: Value is an int between len(_game.balls) and len(_balls);
+    # it is len(_game.balls) in every frame that is drawn
+    _shown = 0
+
+    # Number of balls each serve puts into play
+    # Invariant: Value is an int > 0
+    _serving = 1
+
+    # Number of graphics objects constructed during the last update
+    # Invariant: Value is an int >= 0
+    _allocations = 0
+
+    # The seed of the random numbers for the serves
+    # Invariant: Value is an int between 0 and 2**32-1
+    _seed = 0
+
+    # Number of physics steps taken since initialize; recordings are indexed by it
+    # Invariant: Value is an int >= 0
+    _steps = 0
+
+    # The recorder that input is written to
+    # Invariant: An object that is an instance of replay.Recorder, or None
+    _recorder = None
+
+    # Whether input comes from a replay.Replayer.  If so, serves are not put on
+    # a timer, as the replayer serves each ball at its recorded step.
+    # Invariant: Value is a bool
+    _replaying = False
+
+    # The level the board is laid out from
+    # Invariant: A levels.Level, or None for the board given by the constants
+    # BRICKS_IN_ROW, BRICK_ROWS and BRICK_WIDTH
+    _level = None
+
+    # The sounds of the game, loaded when the game is initialized
+    # Invariant: An object that is an instance of SoundBank, or None when
+    # replaying (a replay is silent)
+    _sounds = None
+
+    # Bricks removed by the model in frames that were not drawn, to erase from
+    # the view in the next frame that is drawn
+    # Invariant: A list of bricks that were in _game.bricks; empty unless
+    # the game is in STATE_ACTIVE
+    _unerased = None
 
     # ADD MORE FIELDS (AND THEIR INVARIANTS) AS NECESSARY
     
@@ -116,57 +148,85 @@ class Breakout(GameController):
     # The x-coordinate of the left edge of the paddle
     # Invariant: Value is a float
     _leftvalue = GAME_WIDTH/2 - PADDLE_WIDTH/2
-    
-    #The x-coordinate of the ball
-    # Invariant: Value is a float
-    _xposball = 0.0
-    
-    #The y-coordinate of the ball
-    # Invariant: Value is a float
-    _yposball = 0.0
-    
-    #The x-velocity of the ball
-    # Invariant: Value is a float
-    _vxball = 0.0
-    
-    #The y-velocity of the ball
-    # Invariant: Value is a float
-    _vyball = 0.0
-    
-    #The index of _bricks that represents the brick the ball has collided with
-    # Invariant: Value is an int
-    _collidedbrick = 0
-    
-    #Player lives
-    # Invariant: Value is an int
-    _lives = 3
+
+    # The x-coordinate of the left edge asked for by the latest touch move.
+    # Moves are coalesced: only the latest one is applied, once per update.
+    # Invariant: Value is a float, or None if there is no move to apply
+    _target = None
     
     # The paused screen
     # Invariant: An object that is an instance of GLabel.
     # Also can be None; only None before first time ball hits bottom boundary and when state is not STATE_PAUSED afterwards
     _pausedscreen = None
+
+    # The timer that will serve the next ball
+    # Invariant: An active Timer from the view's timer queue, or None if no
+    # serve is waiting
+    _serve = None
     
     # The game over screen
     # Invariant: An object that is an instance of GLabel.
-    # Also can be None; only None when _lives does not equal 0 and state != STATE_INACTIVE
+    # Also can be None; only None when _game.lives does not equal 0 and state != STATE_INACTIVE
     _gameoverscreen = None
     
     # The win screen
     # Invariant: An object that is an instance of GLabel.
-    # Also can be None; only None when _bricks is not empty.
+    # Also can be None; only None when _game.bricks is not empty.
     _winscreen = None
 
-    # Count of bricks remaining in play
-    # Invariant: An object that is an instance of GLabel.
+    # Count of bricks remaining in play.  It is drawn from a glyph atlas, as
+    # it changes whenever a brick is hit.
+    # Invariant: An object that is an instance of GAtlasLabel.
     # Also can be None; only None when state is STATE_INACTIVE
     _brickscore = None
     
     # Display of lives of player
-    # Invariant: An object that is an instance of GLabel.
+    # Invariant: An object that is an instance of GAtlasLabel.
     # Also can be None; only None when state is STATE_INACTIVE
     _playerlives = None
     # METHODS
 
+    def __init__(self, seed=None, recorder=None, replaying=False, level=None, balls=1):
+        """Constructor: a controller for a game whose serves come from seed
+
+        If seed is None, a seed is picked at random.  Either way, the game can
+        be played again exactly from the seed and the input.  If recorder is
+        not None, the seed, the board and all input are written to it.  If
+        level is not None, the board is laid out from it (see levels.py)
+        instead of from the board constants.  Each serve puts balls balls
+        into play (see model.Game).
+
+        Precondition: seed is None or an int between 0 and 2**32-1; recorder
+        is None or a replay.Recorder; replaying is a bool; level is None or
+        a levels.Level; balls is an int > 0.  A recording only holds the board
+        constants, so recorder must be None if level is given or balls is
+        not 1."""
+        super(Breakout, self).__init__()
+        assert recorder is None or level is None, 'a game from a level cannot be recorded'
+        assert recorder is None or balls == 1, 'a multi-ball game cannot be recorded'
+        if seed is None:
+            seed = random.randrange(1 << 32)
+        self._seed = seed
+        self._recorder = recorder
+        self._replaying = replaying
+        self._level = level
+        self._serving = balls
+
+    @property
+    def seed(self):
+        """The seed of the random numbers for the serves"""
+        return self._seed
+
+    @property
+    def model(self):
+        """The model.Game with the rules and state of this game"""
+        return self._game
+
+    @property
+    def steps(self):
+        """The number of physics steps taken since the game was initialized"""
+        return self._steps
+
     def initialize(self):
         """Initialize the game state.
 
@@ -174,47 +234,133 @@ class Breakout(GameController):
         When done, set the state to STATE_INACTIVE, and display a message
         saying that the user should press to play a game."""
         
+        if self._level is None:
+            self._game = Game(BRICKS_IN_ROW, BRICK_ROWS, BRICK_WIDTH, seed=self._seed, balls=self._serving)
+        else:
+            self._game = Game(seed=self._seed, level=self._level, balls=self._serving)
+        self._steps = 0
+        if not self._recorder is None:
+            self._recorder.begin(self._seed, BRICKS_IN_ROW, BRICK_ROWS, BRICK_WIDTH)
+        self._stepper = FixedStep(PHYSICS_RATE, MAX_CATCHUP_STEPS)
+        self._unerased = []
+        if not self._replaying and self._sounds is None:
+            self._sounds = SoundBank()
+        self._balls = [Ball() for x in range(self._serving)]
+        self._shown = 0
+        self._bricks = None
         self._welcomescreen = GLabel(text = 'Press to Play',pos = (0,310),halign = 'left', valign = 'middle', font_size = 63)
         self.view.add(self._welcomescreen)
-        self._state = STATE_INACTIVE
 
     def update(self, dt):
         """Animate a single frame in the game.
 
-        This is the method that does most of the work.  It moves the ball, and
-        looks for any collisions.  If there is a collision, it changes the
-        velocity of the ball and removes any bricks if necessary.
-
-        This method may need to change the state of the game.  If the ball
-        goes off the screen, change the state to either STATE_PAUSED (if the
-        player still has some tries left) or STATE_COMPLETE (the player has
-        lost the game).  If the last brick is removed, it needs to change
-        to STATE_COMPLETE (game over; the player has won).
-
-        Precondition: dt is the time since last update (a float).  This
-        parameter can be safely ignored."""
+        This is the method that does most of the work.  It steps the game
+        model, which moves the ball and looks for any collisions, and then
+        updates the view to match.  Bricks removed by the model are removed
+        from the view, and the balls are redrawn at their new positions.
+
+        The model is stepped at a fixed rate (PHYSICS_RATE steps a second),
+        however fast frames arrive: dt is added to an accumulator and as many
+        whole steps are taken as fit in it.  The ball is drawn between its
+        last two positions according to the time left over, so the motion is
+        smooth at any display rate.
+
+        When the controller is over its frame budget, some frames are not
+        drawn (see `rendering`).  The model is still stepped and sounds are
+        still played in those frames, but the balls, paddle and bricks are
+        left as they are until the next frame that is drawn, so game time
+        does not slow down on slow hardware.
+
+        If the last ball goes off the screen, the model changes its state to either
+        STATE_PAUSED (if the player still has some tries left) or
+        STATE_COMPLETE (the player has lost the game).  If the last brick is
+        removed, the model changes to STATE_COMPLETE (game over; the player
+        has won).
+
+        Precondition: dt is the time since last update (a float)."""
         
-        if self._lives == 0:
-            self._state = STATE_INACTIVE
-            self._gameoverscreen = GLabel(text = 'Game Over \nTry again?',pos = (0,310),halign = 'left', valign = 'middle', font_size = 70)
-            self.view.add(self._gameoverscreen)
-            self._resetGame()
-        if self._state == STATE_PAUSED and self._pausedscreen is None and self._lives < 3 and self._lives != 0:
+        created = GObject.created
+        game = self._game
+        rendering = self.rendering
+        if not self._target is None:
+            self._movePaddle()
+        if rendering and not self._paddle is None:
+            self._paddle.x = game.paddle.x
+        if game.state == STATE_PAUSED and self._pausedscreen is None and game.lives < NUMBER_TURNS:
             self._pausedscreen = GLabel(text = 'Ball will be served in 3 seconds',pos = (0,310),halign = 'left', valign = 'middle', font_size = 25)
             self.view.add(self._pausedscreen)
-            self.delay(self._addBall, 3)
-        if self._state == STATE_ACTIVE:
-            self.view.remove(self._ball)
-            self._vxball = self._ball._vx
-            self._vyball = self._ball._vy
-            self._xposball = self._ball.pos[0] + self._vxball
-            self._yposball = self._ball.pos[1] + self._vyball
-            self._checkCollisions()
-            if self._state != STATE_PAUSED:
-                self._ball = Ball((self._xposball, self._yposball), self._vxball, self._vyball)
-                self._view.add(self._ball)
-            if len(self._bricks)== 0:
+            self._scheduleServe()
+        if game.state == STATE_ACTIVE:
+            profiler = self.profiler
+            start = None if profiler is None else profiler.start()
+            removed = []
+            hits = game.paddle_hits
+            for x in range(self._stepper.advance(dt)):
+                removed.extend(game.step(self._stepper.frames))
+                self._steps += 1
+                if game.state != STATE_ACTIVE:
+                    break
+            if not profiler is None:
+                profiler.stop('step', start)
+            self._playSounds(removed, game.paddle_hits - hits)
+            self._unerased.extend(removed)
+            if rendering or game.state != STATE_ACTIVE:
+                self._removeBricks(self._unerased)
+                self._unerased = []
+            if game.ball is None:
+                self._hideBalls(0)
+                self._playerlives.text = 'Player Lives: ' + `game.lives`
+            elif rendering:
+                self._moveBalls()
+            if game.won:
                 self._winGame()
+            elif game.state == STATE_COMPLETE:
+                self._loseGame()
+        else:
+            self._stepper.reset()
+        self._allocations = GObject.created - created
+
+    @property
+    def allocations(self):
+        """The number of graphics objects constructed during the last update.
+
+        This is 0 for every frame where the ball is simply moving, as the
+        ball and paddle widgets are moved in place."""
+        return self._allocations
+
+    def idle(self):
+        """Returns: True if nothing changes until the next touch or the serve timer
+
+        The game is idle on the welcome, game over and win screens, and while
+        waiting for a serve once the paused screen is up, unless the paddle
+        still has a move to apply.  The controller then stops calling update
+        until a touch, or until the serve is due."""
+        state = self._game.state
+        if state == STATE_INACTIVE or state == STATE_COMPLETE:
+            return True
+        if state == STATE_PAUSED:
+            return self._target is None and (not self._pausedscreen is None or self._game.lives == NUMBER_TURNS)
+        return False
+
+    def state_name(self):
+        """Returns: the name of the state of the game, for the CPU report"""
+        return STATE_NAMES[self._game.state]
+
+    def serve(self):
+        """Serves a ball now, rather than when the serve timer goes off
+
+        This is for replays, where the serve timer is not used.
+
+        Precondition: the state is STATE_PAUSED"""
+        self._addBall()
+
+    def close(self):
+        """Finishes the recording of this game, if there is one
+
+        Call this when the application stops."""
+        if not self._recorder is None:
+            self._recorder.end(self._steps, self._game)
+            self._recorder = None
 
     def on_touch_down(self,view,touch):
         """Respond to the mouse (or finger) being pressed (but not released)
@@ -228,19 +374,22 @@ class Breakout(GameController):
         access to the view attribute).  touch is a MotionEvent (see
         documentation) with the touch information."""
         
-        if self._state  == STATE_INACTIVE:
+        x, y = self._snap(touch)
+        if not self._recorder is None:
+            self._recorder.touch_down(self._steps, x, y)
+        if self._game.state == STATE_INACTIVE:
             if not self._welcomescreen is None:
                 self.view.remove(self._welcomescreen)
             if not self._gameoverscreen is None:
                 self.view.remove(self._gameoverscreen)
-            self._state = STATE_PAUSED
+            self._game.start()
             self._setBricks()
             self._displayScore()
             self._setPaddle()
-            self.delay(self._addBall, 3)
-        if self._paddle.collide_point(touch.x, touch.y) == True:
-            self._anchor = (touch.x, touch.y)
-            self._xdistance = (touch.x - self._leftvalue)
+            self._scheduleServe()
+        if not self._paddle is None and self._paddle.collide_point(x, y) == True:
+            self._anchor = (x, y)
+            self._xdistance = (x - self._leftvalue)
 
     def on_touch_move(self,view,touch):
         """Respond to the mouse (or finger) being moved.
@@ -250,13 +399,20 @@ class Breakout(GameController):
         previous touch event and the current touch event. For all other
         states, this method is ignored.
 
+        The move is only recorded here.  The next update applies the latest
+        recorded move, so several moves between frames cost a single move.
+
         Precondition: view is just the view attribute (unused because we have
         access to the view attribute).  touch is a MotionEvent (see
         documentation) with the touch information."""
         
-        if self._state == STATE_ACTIVE and not self._anchor is None or self._state == STATE_PAUSED and not self._anchor is None:
-            self._movePaddle()
-            self._anchor = (touch.x, touch.y)
+        x, y = self._snap(touch)
+        if not self._recorder is None:
+            self._recorder.touch_move(self._steps, x, y)
+        state = self._game.state
+        if state == STATE_ACTIVE and not self._anchor is None or state == STATE_PAUSED and not self._anchor is None:
+            self._anchor = (x, y)
+            self._target = self._anchor[0] - self._xdistance
 
     def on_touch_up(self,view,touch):
         """Respond to the mouse (or finger) being released.
@@ -267,160 +423,156 @@ class Breakout(GameController):
         Precondition: view is just the view attribute (unused because we have
         access to the view attribute).  touch is a MotionEvent (see
         documentation) with the touch information."""
+        if not self._recorder is None:
+            self._recorder.touch_up(self._steps)
         self._anchor = None
 
     # ADD MORE HELPER METHODS (PROPERLY SPECIFIED) AS NECESSARY
+    def _snap(self, touch):
+        """Returns: the position of touch as a tuple (x, y), rounded to 1/TOUCH_RESOLUTION of a pixel
+
+        Precondition: touch has float attributes x and y"""
+        
+        return (round(touch.x*TOUCH_RESOLUTION)/TOUCH_RESOLUTION, round(touch.y*TOUCH_RESOLUTION)/TOUCH_RESOLUTION)
+
+    def _scheduleServe(self):
+        """Serves a ball in 3 seconds, unless the serves come from a replay"""
+        
+        if not self._replaying and self._serve is None:
+            self._serve = self.delay(self._addBall, 3)
+
     def _setBricks(self):
-        """Sets up bricks
-        """
-        for x in range(BRICK_ROWS):
-            ypos = GAME_HEIGHT-BRICK_Y_OFFSET-BRICK_HEIGHT*x-BRICK_SEP_V*x
-            xlist = `x`
-            for y in range(BRICKS_IN_ROW):
-                    if int(xlist[len(xlist)-1]) == 0 or int(xlist[len(xlist)-1]) == 1 :
-                        brick = GRectangle(pos = (BRICK_SEP_H/2+BRICK_WIDTH*y+BRICK_SEP_H*y, ypos), size = (BRICK_WIDTH,BRICK_HEIGHT), linecolor = colormodel.RED, fillcolor = colormodel.RED)
-                        self.view.add(brick)
-                        self._bricks.append(brick)
-                    if int(xlist[len(xlist)-1]) == 2 or int(xlist[len(xlist)-1]) == 3:
-                        brick = GRectangle(pos = (BRICK_SEP_H/2+BRICK_WIDTH*y+BRICK_SEP_H*y, ypos), size = (BRICK_WIDTH,BRICK_HEIGHT), linecolor = colormodel.ORANGE, fillcolor = colormodel.ORANGE)
-                        self.view.add(brick)
-                        self._bricks.append(brick)
-                    if int(xlist[len(xlist)-1]) == 4 or int(xlist[len(xlist)-1]) == 5:
-                        brick = GRectangle(pos = (BRICK_SEP_H/2+BRICK_WIDTH*y+BRICK_SEP_H*y, ypos), size = (BRICK_WIDTH,BRICK_HEIGHT), linecolor = colormodel.YELLOW, fillcolor = colormodel.YELLOW)
-                        self.view.add(brick)
-                        self._bricks.append(brick)
-                    if int(xlist[len(xlist)-1]) == 6 or int(xlist[len(xlist)-1]) == 7:
-                        brick = GRectangle(pos = (BRICK_SEP_H/2+BRICK_WIDTH*y+BRICK_SEP_H*y, ypos), size = (BRICK_WIDTH,BRICK_HEIGHT), linecolor = colormodel.GREEN, fillcolor = colormodel.GREEN)
-                        self.view.add(brick)
-                        self._bricks.append(brick)
-                    if int(xlist[len(xlist)-1]) == 8 or int(xlist[len(xlist)-1]) == 9:
-                        brick = GRectangle(pos = (BRICK_SEP_H/2+BRICK_WIDTH*y+BRICK_SEP_H*y, ypos), size = (BRICK_WIDTH,BRICK_HEIGHT), linecolor = colormodel.CYAN, fillcolor = colormodel.CYAN)
-                        self.view.add(brick)
-                        self._bricks.append(brick)
+        """Creates a GBrickField that draws every brick in the model and adds it to the view
+
+        The empty cells of a level are bricks that start out of play; they are erased at once."""
+        
+        field = self._game.bricks
+        self._bricks = GBrickField(rects = field.rects(), palette = field.palette, colors = field.color)
+        self._bricks.erase(field.dead().tolist())
+        self.view.add(self._bricks)
+
+    def _removeBricks(self, removed):
+        """Erases the bricks in removed from the view and updates the scoreboard
+
+        Precondition: removed is a list of bricks that were in _game.bricks"""
+        
+        if len(removed) > 0:
+            self._bricks.erase([brick.index for brick in removed])
+            self._brickscore.text = 'Bricks Remaining: '+`self._game.remaining`
+
+    def _playSounds(self, removed, hits):
+        """Plays a sound for each brick in removed, and one if the ball hit the paddle
+
+        The sounds were loaded by initialize, so nothing is read from disk here.
+
+        Precondition: removed is a list of bricks that were in _game.bricks;
+        hits is the number of paddle bounces this frame (an int >= 0)"""
+        
+        if self._sounds is None:
+            return
+        if hits > 0:
+            self._sounds.play(PADDLE_SOUND)
+        for brick in removed:
+            self._sounds.play(BRICK_SOUNDS[brick.row % len(BRICK_SOUNDS)])
 
     def _setPaddle(self):
         """Creates the paddle(a GRectangle object), adds it to the view, and assigns it to the _paddle field"""
         
-        paddle = GRectangle(pos = (GAME_WIDTH/2-PADDLE_WIDTH/2, PADDLE_OFFSET), size = (PADDLE_WIDTH, PADDLE_HEIGHT), linecolor = colormodel.BLACK, fillcolor = colormodel.BLACK)
-        self.view.add(paddle)
-        self._paddle = paddle
+        paddle = self._game.paddle
+        self._paddle = GRectangle(pos = (paddle.x, paddle.y), size = (paddle.width, paddle.height), linecolor = colormodel.BLACK, fillcolor = colormodel.BLACK)
+        self.view.add(self._paddle)
 
     def _movePaddle(self):
-        """"Moves the paddle by removing the current paddle from the view and creating a new paddle.
-        This new paddle is then assigned to _paddle. Location of the new paddle is restricted to between 0 and GAME_WIDTH-PADDLE WIDTH"""
+        """Moves the paddle in the model to the latest position recorded by on_touch_move, and clears it.
+        Location of the paddle is restricted to between 0 and GAME_WIDTH-PADDLE WIDTH.
+        The paddle widget is moved to match by update, in frames that are drawn."""
         
-        self.view.remove(self._paddle)
-        newpos = (min((max(self._anchor[0] - self._xdistance, 0)),GAME_WIDTH-PADDLE_WIDTH), PADDLE_OFFSET)
-        newpaddle = GRectangle(pos = newpos, size = (PADDLE_WIDTH, PADDLE_HEIGHT), linecolor = colormodel.BLACK, fillcolor = colormodel.BLACK)
-        self._leftvalue = self._anchor[0] - self._xdistance
-        self._paddle = newpaddle
-        self.view.add(newpaddle)
+        self._game.move_paddle(self._target)
+        self._leftvalue = self._target
+        self._target = None
 
     def _addBall(self):
-        """Creates a Ball object and adds it to the view.
+        """Serves a ball in the model, and puts the Ball widget for it in the view.
     
-        Also checks if there is GLabel object under_pausedscreen and removes it if there is
-        and changes the state to STATE_ACTIVE after ball has been created and added to view """
+        Also checks if there is GLabel object under_pausedscreen and removes it if there is.
+        The model changes the state to STATE_ACTIVE when the ball is served.
+        A serve timer that is still waiting is cancelled."""
         
+        if not self._serve is None:
+            self._serve.cancel()
+            self._serve = None
         if not self._pausedscreen is None:
             self.view.remove(self._pausedscreen)
             self._pausedscreen = None
-        self._ball = Ball()
-        self.view.add(self._ball)
-        self._state = STATE_ACTIVE
-
-    def _checkCollisions(self):
-        """Checks for collisions with the boundaries of the game and collisions with the paddle and bricks
-        if the ball hits the bottom boundary, player loses a life, ball is removed, and state is changed to STATE_PAUSED.
-        Otherwise if it hits a boundary of the paddle, it is reflected. If it hits a brick, the collided brick is removed"""
-        
-        if self._yposball <= 0: #check bottom boundary
-            self._lives -= 1
-            self._playerlives.text = 'Player Lives: ' + `self._lives`
-            self.view.remove(self._ball)
-            self._ball = None
-            self._state = STATE_PAUSED
-            return
-        if self._yposball + BALL_DIAMETER >= GAME_HEIGHT: #check top boundary
-            self._vyball = -self._vyball
-            self._yposball = self._ball.pos[1] + self._vyball
-        if self._xposball + BALL_DIAMETER >= GAME_WIDTH: #check right boundary
-                self._vxball = -self._vxball
-                self._xposball = self._ball.pos[0] + self._vxball
-        if self._xposball <= 0: #check left boundary
-                self._vxball = -self._vxball
-                self._xposball = self._ball.pos[0] + self._vxball
-        if self._getCollidingObject() == self._paddle: #check paddle
-                self._vyball = -self._vyball
-                self._yposball = self._ball.pos[1] + self._vyball
-        if self._getCollidingObject() == self._collidedbrick: #check bricks
-                self._view.remove(self._collidedbrick)
-                self._bricks.remove(self._collidedbrick)
-                self._vyball = -self._vyball
-                self._yposball = self._ball.pos[1] + self._vyball
-                self._brickscore.text = 'Bricks Remaining: '+`len(self._bricks)`
-
-    def _getCollidingObject(self):
-        """Returns: GObject that has collided with the ball
-        
-        This method checks the four corners of the ball, one at a 
-        time. If one of these points collides with either the paddle 
-        or a brick, it stops the checking immediately and returns the 
-        object involved in the collision. It returns None if no 
-        collision occurred."""
-        
-        if self._paddle.collide_point(self._xposball, self._yposball) == True or self._paddle.collide_point(self._xposball+BALL_DIAMETER, self._yposball) == True:
-            if self._vyball >= 0:
-                return None
-            if self._vyball <= 0:
-                return self._paddle
-        for x in range(len(self._bricks)):
-            if self._checkCorners(x):
-                self._collidedbrick = self._bricks[x]
-                return self._collidedbrick
-
-    def _checkCorners (self, x):
-        """ Returns: True if the corners of the ball have collided with a brick, False otherwise"""
-        
-        if self._bricks[x].collide_point(self._xposball, self._yposball) == True:
-            return True
-        elif self._bricks[x].collide_point(self._xposball + BALL_DIAMETER, self._yposball) == True:
-            return True
-        elif self._bricks[x].collide_point(self._xposball, self._yposball + BALL_DIAMETER) == True:
-            return True
-        elif self._bricks[x].collide_point(self._xposball + BALL_DIAMETER, self._yposball + BALL_DIAMETER) == True:
-            return True
-        else:
-            return False
+        if not self._recorder is None:
+            self._recorder.serve(self._steps)
+        self._game.serve()
+        for (widget, ball) in zip(self._balls, self._game.balls):
+            widget.move((ball.x, ball.y), ball.vx, ball.vy)
+            self.view.add(widget)
+        self._shown = len(self._game.balls)
+
+    def _moveBalls(self):
+        """Moves the Ball widgets in place to the balls in play, and takes out the widgets of lost balls
+
+        The balls are drawn between their last two positions (see update).
+        Widget i draws the model ball i, so when a ball is lost the widgets
+        after it take over the balls after it."""
+        balls = self._game.balls
+        self._hideBalls(len(balls))
+        alpha = self._stepper.alpha
+        for i in range(len(balls)):
+            ball = balls[i]
+            self._balls[i].move(ball.interpolate(alpha), ball.vx, ball.vy)
+
+    def _hideBalls(self, count):
+        """Removes Ball widgets from the view until only the first count are shown
+
+        Precondition: count is an int between 0 and len(_balls)"""
+        while self._shown > count:
+            self._shown -= 1
+            self.view.remove(self._balls[self._shown])
 
     def _resetGame (self):
         """Resets the game so the player can play another round.
         
-        Resets player lives to 3, removes paddle and resets related fields, removes all bricks and resets its field,
-        and removes the scoreboard(display of number of bricks in play and player lives left)"""
+        Resets the model (which restores the player lives), removes paddle and resets related fields,
+        removes all bricks and resets its field, and removes the scoreboard(display of number of bricks
+        in play and player lives left).  A serve that is still waiting is cancelled."""
         
-        self._lives = 3 #reset lives
+        if not self._serve is None:
+            self._serve.cancel()
+            self._serve = None
+        self._unerased = []
+        self._game.reset()
         self.view.remove(self._paddle) #remove paddle
         self._paddle = None
         self._xdistance = 0.0
         self._leftvalue = GAME_WIDTH/2 - PADDLE_WIDTH/2
-        for x in range(len(self._bricks)): #remove bricks
-            self.view.remove(self._bricks[x])
-        self._bricks = []
+        self._target = None
+        self.view.remove(self._bricks) #remove bricks
+        self._bricks = None
         self.view.remove(self._brickscore) #Remove brickscore
         self._brickscore = None
         self.view.remove(self._playerlives) #Remove playerlives
         self._playerlives = None
 
+    def _loseGame (self):
+        """End the game when the player runs out of lives
+        Creates a GLabel object for the game over screen and resets the game so the player can try again"""
+        
+        self._gameoverscreen = GLabel(text = 'Game Over \nTry again?',pos = (0,310),halign = 'left', valign = 'middle', font_size = 70)
+        self.view.add(self._gameoverscreen)
+        self._resetGame()
+
     def _winGame (self):
         """ End the game when the player breaks all the bricks
-        Creates a GLabel object for the win screen, sets state to STATE_COMPLETE, and removes ball, paddle, and scoreboard"""
+        Creates a GLabel object for the win screen, and removes ball, paddle, and scoreboard.
+        The model has already set its state to STATE_COMPLETE."""
         
-        self._state = STATE_COMPLETE
         self._winscreen = GLabel(text = 'You Won!',pos = (0,310),halign = 'left', valign = 'middle', font_size = 82)
         self.view.add(self._winscreen)
-        self.view.remove(self._ball) #Remove ball
-        self._ball = None
+        self._hideBalls(0) #Remove balls
         self.view.remove(self._paddle)#Remove paddle
         self._paddle = None
         self.view.remove(self._brickscore) #Remove brickscore
@@ -430,11 +582,11 @@ class Breakout(GameController):
 
     def _displayScore(self):
         """Displays scoreboard(numbers of bricks still in play and player lives left).
-        Creates a GLabel object for number of bricks in play and another for player lives and adds both to the view"""
+        Creates a GAtlasLabel object for number of bricks in play and another for player lives and adds both to the view"""
         
-        self._brickscore = GLabel(text ='Bricks Remaining: '+`len(self._bricks)`, pos = (10,550),halign = 'left', valign = 'middle', font_size = 15)
+        self._brickscore = GAtlasLabel(text ='Bricks Remaining: '+`self._game.remaining`, pos = (10,550),halign = 'left', valign = 'middle', font_size = 15)
         self.view.add(self._brickscore)
-        self._playerlives = GLabel(text = 'Player Lives: ' + `self._lives`, pos = (350,550),halign = 'left', valign = 'middle', font_size = 15)
+        self._playerlives = GAtlasLabel(text = 'Player Lives: ' + `self._game.lives`, pos = (350,550),halign = 'left', valign = 'middle', font_size = 15)
         self.view.add(self._playerlives)
 
 
@@ -461,17 +613,22 @@ class Ball(GEllipse):
     # ADD MORE METHODS (PROPERLY SPECIFIED) AS NECESSARY
     def __init__(self, position = (GAME_WIDTH/2-BALL_DIAMETER/2,310), vx = 0.0, vy = 0.0):
         """Constructor: a black GEllipse object with position pos, diameter 18, horizontal velocity vx, and vertical velocity vy
-        
+
+        The ball is at rest by default.  The serve velocity is drawn by the
+        model from the seed of the game, and given to the ball with `move`.
+
         Precondition: position is a tuple, vx and vy are floats"""
         
         super(Ball, self).__init__(pos = position, size = (18,18), fillcolor = colormodel.BLACK, linecolor = colormodel.BLACK)
-        if vx == 0.0:
-            self._vx = random.uniform(1.0, 5.0)
-            self._vx = self._vx * random.choice([-1,1])
-        else:
-            self._vx = vx
-        if vy == 0.0:
-            self._vy = -5.0
-        else:
-            self._vy = vy
+        self._vx = vx
+        self._vy = vy
+
+    def move(self, position, vx, vy):
+        """Moves this ball to position and sets its velocity, without making a new widget
+
+        Precondition: position is a tuple, vx and vy are floats"""
+        
+        self.pos = position
+        self._vx = vx
+        self._vy = vy
         
\ No newline at end of file
@@ -6,21 +6,41 @@
 Use these graphics classes as the building blocks for your game.  DO NOT
 MODIFY THE CODE IN THIS FILE.  Instead, you should just instantiate these
 classes (or subclass them) to make your game.  See the online documentation
-for more guidance; it includes information not displayed in this module."""
+for more guidance; it includes information not displayed in this module.
+
+Nothing is set up when this module is imported.  The layout rules in
+graphics.kv are loaded (once) and the resource folders registered when the
+first graphics object or view is made, and the sound engine is started by
+the first sound.  Use `startup_report` to see how long start-up took."""
+import time
+_IMPORT_START = time.time()
+
 from kivy.properties import ListProperty, StringProperty
 from kivy.uix.floatlayout import FloatLayout
 from kivy.uix.widget import Widget
 from kivy.uix.label import Label
 from kivy.clock import Clock
+from kivy.graphics import Color, Mesh, Rectangle, Fbo, ClearColor, ClearBuffers
+from kivy.graphics.texture import Texture
+from kivy.core.text import Label as CoreLabel
 
 # Non-Kivy Imports
-import pygame.mixer
 import colormodel
 import os.path
+import array
+import bisect
+import collections
+import heapq
+import json
+import numpy
+import timeit
 
-# Import Kivy language file with visual interface information
+# The clock for timing frames
+_clock = timeit.default_timer
+
+# Kivy language file with visual interface information
 from kivy.lang import Builder 
-Builder.load_file(str(os.path.join(os.path.dirname(__file__), 'graphics.kv')))
+KV_FILE = str(os.path.join(os.path.dirname(__file__), 'graphics.kv'))
 
 # User-defined resources
 FONT_PATH  = str(os.path.join(os.path.dirname(__file__), 'Fonts'))
@@ -28,16 +48,83 @@ SOUND_PATH = str(os.path.join(os.path.dirname(__file__), 'Sounds'))
 IMAGE_PATH = str(os.path.join(os.path.dirname(__file__), 'Images'))
 
 import kivy.resources
-kivy.resources.resource_add_path(FONT_PATH)
-kivy.resources.resource_add_path(SOUND_PATH)
-kivy.resources.resource_add_path(IMAGE_PATH)
 
-# Initialize the sound engine.
+# Settings of the sound engine.
 FREQUENCY=44100
 BITSIZE=-16
 CHANNELS=2
 BUFFER=1024
-pygame.mixer.init(FREQUENCY,BITSIZE,CHANNELS,BUFFER)
+
+# Start-up times, as time.time() values, or durations in seconds.  See startup_report
+_startup = {}
+
+# Whether graphics.kv has been loaded and the resource folders registered.  See _load_graphics_once
+_graphics_loaded = False
+
+
+def startup_report(origin=None):
+    """**Returns**: a dictionary of how long each stage of start-up took, in seconds.
+    
+        :param origin: the time start-up began, as a `time.time()` value
+        **Precondition**: a number, or None for when this module started to import
+    
+    The keys are the stages reached so far:
+    
+        'import': time from origin until this module was imported
+        'window': time from origin until the window was up and `initialize` was called
+        'first_frame': time from origin until the first frame was drawn
+        'kv': time spent loading graphics.kv
+        'sound': time spent starting the sound engine
+    
+    The first three are times since origin; the last two are durations."""
+    if origin is None:
+        origin = _IMPORT_START
+    report = {}
+    for stage in ('import','window','first_frame'):
+        if stage in _startup:
+            report[stage] = _startup[stage]-origin
+    for stage in ('kv','sound'):
+        if stage in _startup:
+            report[stage] = _startup[stage]
+    return report
+
+
+def _load_graphics_once():
+    """Loads graphics.kv and registers the resource folders, the first time it is called
+    
+    Called before a graphics object or view is made, as Kivy applies the
+    rules in graphics.kv when a widget is made.  This is a load-once guard:
+    later calls do nothing, so the file is not loaded into Builder twice.
+    Builder keeps the rules it parsed and applies them to every widget made
+    after that, so the file is parsed once per process.
+    
+    The parsed rules are not cached between processes.  Builder only loads
+    kv source (load_file and load_string parse it every time), and the
+    rules it parses hold compiled code and parser state that cannot be
+    pickled.  Giving them back to Builder would mean writing to its private
+    attributes, which change between Kivy versions.  The 'kv' time of
+    `startup_report` shows what the parse costs."""
+    global _graphics_loaded
+    if _graphics_loaded:
+        return
+    start = time.time()
+    kivy.resources.resource_add_path(FONT_PATH)
+    kivy.resources.resource_add_path(SOUND_PATH)
+    kivy.resources.resource_add_path(IMAGE_PATH)
+    Builder.load_file(KV_FILE)
+    _graphics_loaded = True
+    _startup['kv'] = time.time()-start
+
+
+def _init_sound():
+    """**Returns**: the module pygame.mixer, starting the sound engine the first time it is called"""
+    import pygame.mixer
+    if not 'sound' in _startup:
+        start = time.time()
+        pygame.mixer.init(FREQUENCY,BITSIZE,CHANNELS,BUFFER)
+        _startup['sound'] = time.time()-start
+    return pygame.mixer
+
 
 def Sound(filename):
     """Creates a new Sound object for the given file.
@@ -50,22 +137,178 @@ def Sound(filename):
         :param filename: string providing the name of a sound file
     
     See the online documentation for more information."""
+    mixer = _init_sound()
     absname = filename if os.path.isabs(filename) else str(os.path.join(SOUND_PATH, filename))
-    return pygame.mixer.Sound(absname)
+    return mixer.Sound(absname)
+
+
+class SoundBank(object):
+    """Instance holds every sound in a folder in memory, and plays them on a fixed pool of channels.
+    
+    Every file is loaded and decoded when the bank is made, so `play` does no
+    file I/O and makes no new sounds.  The same `pygame.mixer.Sound` buffer
+    is handed out every time a sound is asked for.
+    
+    The bank reserves its own mixer channels, so sounds played elsewhere with
+    `Sound.play` never take them.  When every channel is busy, `play` stops
+    the sound that started longest ago and plays on its channel instead (voice
+    stealing), so a fast chain of brick hits never waits for a free channel.
+    
+    **Constructor**: creates a new sound bank, starting the sound engine if needed
+    
+        :param folder: the folder to load sounds from
+        **Precondition**: a string naming a folder (default SOUND_PATH)
+    
+        :param channels: the number of channels in the pool
+        **Precondition**: an int > 0 (default POOL_SIZE)
+    
+    **Invariant**: the files in folder with a suffix in SUFFIXES are loaded."""
+    
+    # Default number of channels in the pool
+    POOL_SIZE = 8
+    
+    # The suffixes of the files loaded, in lower case
+    SUFFIXES = ('.wav','.ogg')
+    
+    # FIELDS. They are all hidden.
+    
+    # The sounds, by file name
+    # Invariant: A dictionary of string to pygame.mixer.Sound
+    _sounds = None
+    
+    # The pool of channels
+    # Invariant: A list of pygame.mixer.Channel, one for each of the first channels of the mixer
+    _channels = None
+    
+    # When each channel in the pool last started a sound, as a count of plays
+    # Invariant: A list of ints >= 0, one per channel in _channels
+    _started = None
+    
+    # Number of sounds played so far
+    # Invariant: Value is an int >= 0
+    _plays = 0
+    
+    # Number of sounds cut off to free a channel
+    # Invariant: Value is an int between 0 and _plays
+    _stolen = 0
+    
+    def __init__(self, folder=SOUND_PATH, channels=POOL_SIZE):
+        """**Constructor**: creates a new sound bank, starting the sound engine if needed
+        
+            :param folder: the folder to load sounds from
+            **Precondition**: a string naming a folder (default SOUND_PATH)
+        
+            :param channels: the number of channels in the pool
+            **Precondition**: an int > 0 (default POOL_SIZE)"""
+        mixer = _init_sound()
+        self._sounds = {}
+        for name in sorted(os.listdir(folder)):
+            if os.path.splitext(name)[1].lower() in self.SUFFIXES:
+                self._sounds[name] = mixer.Sound(str(os.path.join(folder,name)))
+        if mixer.get_num_channels() < channels:
+            mixer.set_num_channels(channels)
+        mixer.set_reserved(channels)
+        self._channels = [mixer.Channel(i) for i in range(channels)]
+        self._started = [0]*channels
+        self._plays = 0
+        self._stolen = 0
+    
+    @property
+    def names(self):
+        """The names of the sounds in this bank, in order.
+        
+        **Invariant**: a list of strings"""
+        return sorted(self._sounds.keys())
+    
+    @property
+    def channels(self):
+        """The number of channels in the pool.
+        
+        **Invariant**: an int > 0"""
+        return len(self._channels)
+    
+    @property
+    def plays(self):
+        """The number of sounds played by this bank.
+        
+        **Invariant**: an int >= 0"""
+        return self._plays
+    
+    @property
+    def stolen(self):
+        """The number of sounds that were cut off to free a channel.
+        
+        **Invariant**: an int between 0 and plays"""
+        return self._stolen
+    
+    def __contains__(self, name):
+        """**Returns**: True if this bank has a sound with the given file name"""
+        return name in self._sounds
+    
+    def __getitem__(self, name):
+        """**Returns**: the shared pygame.mixer.Sound for the given file name
+        
+            :param name: the name of a sound file in the folder of this bank
+            **Precondition**: a string in names"""
+        return self._sounds[name]
+    
+    def play(self, name, volume=1.0):
+        """**Returns**: the channel the sound with the given file name is now playing on.
+        
+        The sound plays on a free channel of the pool if there is one; if not,
+        the oldest sound playing is stopped and its channel is used.
+        
+            :param name: the name of a sound file in the folder of this bank
+            **Precondition**: a string in names
+        
+            :param volume: the volume to play at
+            **Precondition**: a number between 0 and 1"""
+        sound = self._sounds[name]
+        index = self._free()
+        channel = self._channels[index]
+        self._plays += 1
+        self._started[index] = self._plays
+        channel.set_volume(volume)
+        channel.play(sound)
+        return channel
+    
+    def stop(self):
+        """Stops every sound playing on the channels of this bank."""
+        for channel in self._channels:
+            channel.stop()
+    
+    def _free(self):
+        """**Returns**: the index of the channel to play the next sound on
+        
+        This is the first channel that is not busy, or else the channel whose
+        sound started longest ago."""
+        oldest = 0
+        for index in range(len(self._channels)):
+            if not self._channels[index].get_busy():
+                return index
+            if self._started[index] < self._started[oldest]:
+                oldest = index
+        self._stolen += 1
+        return oldest
 
 
 class GObject(Widget):
     """Base graphics object for a `GameView` class.
     
     You should never make a GObject directly.  Instead, you should use one of the
-    subclasses: GRectangle, GEllipse, GLine, GImage, and GLabel."""
+    subclasses: GRectangle, GEllipse, GLine, GImage, GLabel, GAtlasLabel, and
+    GBrickField."""
     # Fields.  See the associated property.
-    _fillcolor = colormodel.RGB(0,0,0,1)  # fill color field
-    _linecolor = colormodel.RGB(0,0,0,1)  # line color field
+    _fillcolor = colormodel.Color(0,0,0,1)  # fill color field
+    _linecolor = colormodel.Color(0,0,0,1)  # line color field
 
     # Kivy properties.  For integration with graphics.kv
     _kivy_fill_color = ListProperty([0,0,0,1]) # Kivy representation of fill color
     _kivy_line_color = ListProperty([0,0,0,1]) # Kivy representation of line color
+
+    # Number of graphics objects constructed so far, of any subclass.  Compare
+    # it before and after a frame to count the widgets made in that frame.
+    created = 0
     
     @property
     def fillcolor(self):
@@ -74,14 +317,15 @@ class GObject(Widget):
         Used to color the backgrounds or, in the case of solid shapes, the shape
         interior.
         
-        **Invariant**: Must be an RGB or HSV object from module `colormodel`."""
+        **Invariant**: Must be a Color, RGB or HSV object from module `colormodel`.
+        A Color is best, as setting one allocates nothing."""
         return self._fillcolor
     
     @fillcolor.setter
     def fillcolor(self,value):
-        assert type(value) in (colormodel.RGB, colormodel.HSV), `value`+' is not a valid color'
+        assert type(value) in (colormodel.RGB, colormodel.HSV, colormodel.Color), `value`+' is not a valid color'
         self._fillcolor = value
-        self._kivy_fill_color = value.glColor()
+        self._kivy_fill_color[:] = value.glColor()
         
     @property
     def linecolor(self):
@@ -90,14 +334,15 @@ class GObject(Widget):
         Used to color the foreground, text, or, in the case of solid shapes, the
         shape border.
         
-        **Invariant**: Must be an RGB or HSV object from module `colormodel`."""
+        **Invariant**: Must be a Color, RGB or HSV object from module `colormodel`.
+        A Color is best, as setting one allocates nothing."""
         return self._linecolor
     
     @linecolor.setter
     def linecolor(self,value):
-        assert type(value) in (colormodel.RGB, colormodel.HSV), `value`+' is not a valid color'
+        assert type(value) in (colormodel.RGB, colormodel.HSV, colormodel.Color), `value`+' is not a valid color'
         self._linecolor = value
-        self._kivy_line_color = value.glColor()
+        self._kivy_line_color[:] = value.glColor()
 
     def __init__(self,**keywords):
         """**Constructor**: creates a new graphics object.
@@ -118,6 +363,8 @@ class GObject(Widget):
         Any attribute of this class may be used as a keyword.  The
         argument must satisfy the invariants of that attribute.  See
         the list of attributes of this class for more information."""
+        GObject.created += 1
+        _load_graphics_once()
         super(GObject,self).__init__(**keywords)
         if 'fillcolor' in keywords:
             self.fillcolor = keywords['fillcolor']
@@ -306,6 +553,120 @@ class GImage(GObject):
             self.source = keywords['source']
 
 
+class TextureCache(object):
+    """Instance is a cache of rendered text textures, with least-recently-used eviction.
+    
+    `GLabel` keeps one of these in its class attribute `cache`, so that text
+    that is shown again (such as a message screen) is looked up instead of
+    rendered again.  The key of a texture is (text, font_name, font_size,
+    bold, halign); the text color is not part of it, as Kivy colors text
+    when it draws the texture.
+    
+    The cache holds at most `capacity` textures.  When it is full, adding a
+    texture drops the one that was used longest ago."""
+    # Hidden fields
+    _capacity = 0     # The most textures held
+    _textures = None  # OrderedDict from key to texture, least recently used first
+    _hits = 0         # Number of lookups that found a texture
+    _misses = 0       # Number of lookups that did not
+    
+    @property
+    def capacity(self):
+        """The most textures this cache holds.
+        
+        Making the capacity smaller drops textures until it fits.
+        
+        **Invariant**: An int > 0"""
+        return self._capacity
+    
+    @capacity.setter
+    def capacity(self,value):
+        assert type(value) == int and value > 0, `value`+' is not a positive int'
+        self._capacity = value
+        while len(self._textures) > value:
+            self._textures.popitem(last=False)
+    
+    @property
+    def hits(self):
+        """The number of lookups that found a texture.
+        
+        **Invariant**: An int >= 0"""
+        return self._hits
+    
+    @property
+    def misses(self):
+        """The number of lookups that did not find a texture.
+        
+        **Invariant**: An int >= 0"""
+        return self._misses
+    
+    def __init__(self,capacity=32):
+        """**Constructor**: creates an empty cache.
+        
+            :param capacity: the most textures to hold
+            **Precondition**: an int > 0"""
+        self._textures = collections.OrderedDict()
+        self._capacity = capacity
+    
+    def __len__(self):
+        """**Returns**: the number of textures in this cache."""
+        return len(self._textures)
+    
+    def get(self,key):
+        """**Returns**: the texture for key, or None if it is not in this cache.
+        
+            :param key: the key of the texture
+            **Precondition**: a tuple (text, font_name, font_size, bold, halign)
+        
+        A texture that is found becomes the most recently used."""
+        texture = self._textures.pop(key,None)
+        if texture is None:
+            self._misses += 1
+        else:
+            self._hits += 1
+            self._textures[key] = texture
+        return texture
+    
+    def put(self,key,texture):
+        """Adds texture to this cache, dropping the least recently used texture if full.
+        
+            :param key: the key of the texture
+            **Precondition**: a tuple (text, font_name, font_size, bold, halign)
+            
+            :param texture: the rendered text
+            **Precondition**: a Kivy `Texture` that will not be changed"""
+        self._textures.pop(key,None)
+        self._textures[key] = texture
+        while len(self._textures) > self._capacity:
+            self._textures.popitem(last=False)
+    
+    def clear(self):
+        """Drops every texture in this cache."""
+        self._textures.clear()
+
+
+class _CachedLabel(Label):
+    """Instances are Kivy labels that look up their texture in `GLabel.cache`.
+    
+    Internal class for `GLabel`.  A texture is rendered only if it is not
+    in the cache, and it is added to the cache once rendered."""
+    
+    def texture_update(self,*largs):
+        """Sets the texture for the current text, from the cache if possible."""
+        key = (self.text,self.font_name,self.font_size,self.bold,self.halign)
+        texture = GLabel.cache.get(key) if self.text else None
+        if texture is None:
+            super(_CachedLabel,self).texture_update(*largs)
+            if self.text and not self.texture is None:
+                GLabel.cache.put(key,self.texture)
+                # The core label draws new text into its old texture if the
+                # size matches; make it use a new one so the cached one is kept.
+                self._label.texture = None
+        else:
+            self.texture = texture
+            self.texture_size = list(texture.size)
+
+
 class GLabel(GObject):
     """Instance represents an (uneditable) text label in `GameView`
     
@@ -328,13 +689,21 @@ class GLabel(GObject):
     If you give no name, it will use the default Kivy font.  The
     `bold` attribute only works for the default Kivy font; for other
     fonts you will need the .ttf file for the bold version of that
-    font.  See `ComicSans.ttf` and `ComicSansBold.ttf` for an example."""
+    font.  See `ComicSans.ttf` and `ComicSansBold.ttf` for an example.
+    
+    Rendered text is kept in the `TextureCache` `GLabel.cache`, shared by
+    all labels, so showing the same text again does not render it again.
+    Give the keyword cached=False to the constructor for a label whose
+    text is rarely the same twice, so that it does not fill the cache."""
+    # The rendered text of every label
+    cache = TextureCache()
+    
     # Fields.  See the associated property.
     _valign = 'bottom'
     _halign = 'left'
     
     # Override the fill color
-    _fillcolor = colormodel.RGB(0,0,0,0)  # fill color field
+    _fillcolor = colormodel.Color(0,0,0,0)  # fill color field
     _kivy_fill_color = ListProperty([0,0,0,0]) # Kivy representation of fill color
 
     # Interior Kivy label.  Hidden field with no property.
@@ -399,8 +768,15 @@ class GLabel(GObject):
     @text.setter
     def text(self,value):
         assert type(value) == str, `value`+' is not a string'
-        self._label.text = value
-        self._label.texture_update()
+        profiler = FrameProfiler.active
+        if profiler is None:
+            self._label.text = value
+            self._label.texture_update()
+        else:
+            start = profiler.start()
+            self._label.text = value
+            self._label.texture_update()
+            profiler.stop('text',start)
 
     @property
     def halign(self):
@@ -446,15 +822,15 @@ class GLabel(GObject):
         
         Overrides `linecolor` property in `GObject`
             
-        **Invariant**: Must be a RGB or HSV object from module `colormodel`."""
+        **Invariant**: Must be a Color, RGB or HSV object from module `colormodel`."""
         return self._linecolor
     
     @linecolor.setter
     def linecolor(self,value):
-        assert type(value) in (colormodel.RGB, colormodel.HSV), `value`+' is not a valid color'
+        assert type(value) in (colormodel.RGB, colormodel.HSV, colormodel.Color), `value`+' is not a valid color'
         self._linecolor = value
         if not self._label is None:
-            self._label.color = value.glColor()
+            self._label.color[:] = value.glColor()
     
     def __init__(self,**keywords):
         """**Constructor**: creates a new text label.
@@ -472,7 +848,11 @@ class GLabel(GObject):
         This class supports the same keywords as `GObject`, as well
         as additional attributes for the text properties (e.g. font
         size and name)."""
-        self._label = Label(**keywords)
+        # The inner label is made before GObject.__init__ runs, and it needs
+        # the Fonts folder registered to find font_name
+        _load_graphics_once()
+        cached = keywords.pop('cached',True)
+        self._label = _CachedLabel(**keywords) if cached else Label(**keywords)
         self._label.size_hint = (None,None)
         super(GLabel,self).__init__(**keywords)
         self.add_widget(self._label)
@@ -541,6 +921,330 @@ class GLabel(GObject):
             self._label.y = self.y
 
 
+class GAtlasLabel(GObject):
+    """Instance represents a one-line text label drawn from a glyph atlas in `GameView`
+    
+    This is a faster `GLabel` for text that changes often, such as a score.
+    Every character of `charset` is rendered once for each font name, size
+    and boldness, into a single texture (the atlas) that is shared by all
+    labels with that font.  The label draws one rectangle per character,
+    showing that character's region of the atlas.  Changing the `text`
+    only changes which regions the rectangles show; no text is rendered.
+    
+    Otherwise this class works like `GLabel`: the label is a rectangle at
+    `pos` with backdrop color `fillcolor`, that grows to fit the text, and
+    the text (in color `linecolor`) is placed in it according to `halign`
+    and `valign`.  However, the text must be a single line of characters
+    from `charset`, and the characters are placed side by side without
+    kerning."""
+    # Every printable ASCII character
+    CHARSET = ''.join(map(chr,range(32,127)))
+    
+    # Fields.  See the associated property.
+    _text = ''
+    _font_size = 15
+    _font_name = None
+    _bold = False
+    _charset = CHARSET
+    _valign = 'bottom'
+    _halign = 'left'
+    
+    # Override the fill color
+    _fillcolor = colormodel.Color(0,0,0,0)  # fill color field
+    _kivy_fill_color = ListProperty([0,0,0,0]) # Kivy representation of fill color
+    
+    # Hidden fields
+    _atlas = None      # The _GlyphAtlas for the font
+    _glyphs = []       # The Rectangle instructions, at least one per character
+    _backdrop = None   # The Rectangle instruction for the backdrop
+    _fill = None       # The Color instruction for the backdrop
+    _ink = None        # The Color instruction for the text
+    
+    @property
+    def text(self):
+        """Text for this label.
+        
+        **Invariant**: string of characters in `charset`, with no newlines"""
+        return self._text
+    
+    @text.setter
+    def text(self,value):
+        assert type(value) == str, `value`+' is not a string'
+        profiler = FrameProfiler.active
+        if profiler is None:
+            self._text = value
+            self._resize()
+        else:
+            start = profiler.start()
+            self._text = value
+            self._resize()
+            profiler.stop('text',start)
+    
+    @property
+    def font_size(self):
+        """Size of the text font in points.
+        
+        Changing it renders a new atlas, unless one has been made already.
+        
+        **Invariant**: A positive number (int or float)"""
+        return self._font_size
+    
+    @font_size.setter
+    def font_size(self,value):
+        assert type(value) in (int,float), `value`+' is not a number'
+        self._font_size = value
+        self._reload()
+    
+    @property
+    def font_name(self):
+        """File name for the .ttf file to use as a font, or None for the default Kivy font
+        
+        Changing it renders a new atlas, unless one has been made already.
+        
+        **Invariant**: string referring to a .ttf file in folder Fonts, or None"""
+        return self._font_name
+    
+    @font_name.setter
+    def font_name(self,value):
+        assert value is None or type(value) == str, `value`+' is not a string'
+        self._font_name = value
+        self._reload()
+    
+    @property
+    def bold(self):
+        """Boolean indicating whether or not the text should be bold.
+        
+        As with `GLabel`, this only works on the default Kivy font.
+        
+        **Invariant**: boolean"""
+        return self._bold
+    
+    @bold.setter
+    def bold(self,value):
+        assert type(value) == bool, `value`+' is not a bool'
+        self._bold = value
+        self._reload()
+    
+    @property
+    def charset(self):
+        """The characters that the text may use.
+        
+        This can only be set in the constructor.
+        
+        **Invariant**: A non-empty string"""
+        return self._charset
+    
+    @property
+    def halign(self):
+        """Horizontal alignment for this label, as in `GLabel`.
+        
+        **Invariant**: one of 'left', 'right', or 'center'"""
+        return self._halign
+    
+    @halign.setter
+    def halign(self,value):
+        assert value in ('left','right','center'), `value`+' is not a valid horizontal alignment'
+        self._halign = value
+        self._place()
+    
+    @property
+    def valign(self):
+        """Vertical alignment for this label, as in `GLabel`.
+        
+        **Invariant**: one of 'top', 'bottom', or 'middle'"""
+        return self._valign
+    
+    @valign.setter
+    def valign(self,value):
+        assert value in ('top','middle','bottom'), `value`+' is not a valid vertical alignment'
+        self._valign = value
+        self._place()
+    
+    def __init__(self,**keywords):
+        """**Constructor**: creates a new atlas label.
+        
+            :param keywords: dictionary of keyword arguments 
+            **Precondition**: See below.
+        
+        To use the constructor for this class, you should provide
+        it with a list of keyword arguments that initialize various
+        attributes. For example, to create a label for a score, use
+        the constructor call
+        
+            GAtlasLabel(text='Score: 0',font_size=15)
+        
+        This class supports the same keywords as `GObject`, as well
+        as `text`, `font_size`, `font_name`, `bold`, `halign`, `valign`
+        and `charset`.  A smaller `charset` makes a smaller atlas; for
+        example, a label that only shows a number could use '0123456789'."""
+        self._font_size = keywords.pop('font_size',self._font_size)
+        self._font_name = keywords.pop('font_name',None)
+        self._bold = keywords.pop('bold',False)
+        self._charset = keywords.pop('charset',self.CHARSET)
+        self._halign = keywords.pop('halign',self._halign)
+        self._valign = keywords.pop('valign',self._valign)
+        text = keywords.pop('text','')
+        super(GAtlasLabel,self).__init__(**keywords)
+        
+        self._glyphs = []
+        self._fill = Color(*self._kivy_fill_color)
+        self._backdrop = Rectangle(pos=self.pos,size=self.size)
+        self._ink = Color(*self._kivy_line_color)
+        self.canvas.add(self._fill)
+        self.canvas.add(self._backdrop)
+        self.canvas.add(self._ink)
+        self.bind(_kivy_fill_color=self._recolor,_kivy_line_color=self._recolor)
+        self.bind(pos=self._place)
+        self._atlas = _GlyphAtlas.get(self._font_name,self._font_size,self._bold,self._charset)
+        self.text = text
+    
+    # Use a new atlas after a change of font.
+    def _reload(self):
+        if self._atlas is None:
+            return # Still in the constructor
+        self._atlas = _GlyphAtlas.get(self._font_name,self._font_size,self._bold,self._charset)
+        self._resize()
+    
+    # Copy the fill and line colors to the canvas.
+    def _recolor(self,instance=None,value=None):
+        self._fill.rgba = self._kivy_fill_color
+        self._ink.rgba = self._kivy_line_color
+    
+    # Show the text with the glyph rectangles, and grow the label to fit it.
+    def _resize(self):
+        atlas = self._atlas
+        while len(self._glyphs) < len(self._text):
+            rect = Rectangle(size=(0,0))
+            self.canvas.add(rect)
+            self._glyphs.append(rect)
+        for i in range(len(self._glyphs)):
+            rect = self._glyphs[i]
+            if i < len(self._text):
+                assert self._text[i] in atlas.widths, `self._text[i]`+' is not in the charset'
+                rect.texture = atlas.regions[self._text[i]]
+            else:
+                rect.size = (0,0)
+        
+        width = max(self.width,sum(atlas.widths[c] for c in self._text))
+        height = max(self.height,atlas.height)
+        
+        # Grow about the anchor position, as GLabel does
+        if self._halign == 'left':
+            self.width = width
+        elif self._halign == 'center':
+            cx = self.center_x
+            self.width = width
+            self.center_x = cx
+        else:
+            right = self.right
+            self.width = width
+            self.right = right
+        if self._valign == 'top':
+            top = self.top
+            self.height = height
+            self.top = top
+        elif self._valign == 'middle':
+            cy = self.center_y
+            self.height = height
+            self.center_y = cy
+        else:
+            self.height = height
+        self._place()
+    
+    # Move the backdrop and glyph rectangles to the current position.
+    def _place(self,instance=None,value=None):
+        if self._backdrop is None:
+            return # Still in the constructor
+        self._backdrop.pos = self.pos
+        self._backdrop.size = self.size
+        atlas = self._atlas
+        width = sum(atlas.widths[c] for c in self._text)
+        if self._halign == 'left':
+            x = self.x
+        elif self._halign == 'center':
+            x = self.center_x-width/2.0
+        else:
+            x = self.right-width
+        if self._valign == 'top':
+            y = self.top-atlas.height
+        elif self._valign == 'middle':
+            y = self.center_y-atlas.height/2.0
+        else:
+            y = self.y
+        for i in range(len(self._text)):
+            w = atlas.widths[self._text[i]]
+            self._glyphs[i].pos = (x,y)
+            self._glyphs[i].size = (w,atlas.height)
+            x += w
+
+
+class _GlyphAtlas(object):
+    """Instances are textures with every character of a set, rendered in one font.
+    
+    Internal class for `GAtlasLabel`.  Each character is rendered by a Kivy
+    core label, and all of them are drawn side by side into a texture with
+    a frame buffer.  Atlases are shared: use `get` rather than the
+    constructor."""
+    # Every atlas made so far, keyed by (font_name,font_size,bold,charset)
+    _atlases = {}
+    
+    # Hidden fields
+    _fbo = None     # The frame buffer that holds the texture
+    
+    # The texture with all of the characters
+    texture = None
+    # Dictionary from each character to its region of the texture
+    regions = {}
+    # Dictionary from each character to its width in pixels
+    widths = {}
+    # The height of every character in pixels
+    height = 0
+    
+    @classmethod
+    def get(cls,font_name,font_size,bold,charset):
+        """**Returns**: the atlas for the font and characters, making it if necessary"""
+        key = (font_name,font_size,bold,charset)
+        if not key in cls._atlases:
+            cls._atlases[key] = cls(font_name,font_size,bold,charset)
+        return cls._atlases[key]
+    
+    def __init__(self,font_name,font_size,bold,charset):
+        """**Constructor**: renders every character of charset in the given font"""
+        glyphs = []
+        for c in charset:
+            options = {'text': c, 'font_size': font_size, 'bold': bold}
+            if not font_name is None:
+                options['font_name'] = font_name
+            label = CoreLabel(**options)
+            label.refresh()
+            # Blank characters may have no texture, only a width
+            size = label.get_extents(c) if label.texture is None else label.texture.size
+            glyphs.append((c,label.texture,size))
+        self.height = max(size[1] for (c,texture,size) in glyphs)
+        
+        # One pixel between characters, so that they do not bleed together
+        width = sum(size[0]+1 for (c,texture,size) in glyphs)
+        self._fbo = Fbo(size=(width,self.height))
+        self._fbo.add(ClearColor(0,0,0,0))
+        self._fbo.add(ClearBuffers())
+        self._fbo.add(Color(1,1,1,1))
+        x = 0
+        for (c,texture,size) in glyphs:
+            if not texture is None:
+                self._fbo.add(Rectangle(texture=texture,pos=(x,0),size=size))
+            x += size[0]+1
+        self._fbo.draw()
+        self.texture = self._fbo.texture
+        
+        self.regions = {}
+        self.widths = {}
+        x = 0
+        for (c,texture,size) in glyphs:
+            self.regions[c] = self.texture.get_region(x,0,size[0],self.height)
+            self.widths[c] = size[0]
+            x += size[0]+1
+
+
 class GRectangle(GObject):
     """Instance represents a solid rectangle in `GameView`
     
@@ -603,46 +1307,713 @@ class GEllipse(GObject):
         super(GEllipse,self).__init__(**keywords)
         
 
-class _ClockEvent(object):
-    """Instances represent delayed graphics events.
+class GBrickField(GObject):
+    """Instance represents a large set of solid rectangles in `GameView`
     
-    Internal class to make animation and pauses simpler."""
-    # Hidden Fields
-    _parent = None    # The view to update when the event occurs
-    _widget = None    # The widget to remove when the event occurs
-    _callback = None  # The function to call when the event occurs.
+    All of the rectangles are drawn by a single `Mesh` instruction,
+    instead of one widget (and four canvas instructions) each.  This is
+    meant for the bricks of a game, where there may be thousands of
+    rectangles that never move but disappear one at a time.
+    
+    Rectangle i is given by `rects[i]`, a row (x,y,width,height), and
+    is filled with the color `palette[colors[i]]`.  The colors are looked
+    up in a small texture with one pixel per palette entry, so each
+    rectangle can have its own color without a separate draw call.  There
+    is no border.
+    
+    Erasing a rectangle only changes the index buffer of the mesh, so the
+    cost does not depend on how many rectangles are drawn.  Because
+    OpenGL ES index buffers are limited to 65536 vertices, rectangles are
+    split into meshes of `CHUNK` rectangles each.
+    
+    The attributes `fillcolor`, `linecolor`, `pos` and `size` are unused."""
+    # Number of rectangles in each mesh (4 vertices each)
+    CHUNK = 16384
+    
+    # The two triangles of a rectangle, as indices of its four corners
+    TRIANGLES = (0,1,2, 0,2,3)
     
-    def __init__(self,parent=None,widget=None,callback=None):
-        """**Constructor**: Creates a new clock delay event.
+    # Hidden fields
+    _meshes = []   # The Mesh instructions, one per chunk
+    _indices = []  # The index lists of each mesh, one per chunk
+    _count = 0     # The number of rectangles
+    
+    def __init__(self,**keywords):
+        """**Constructor**: creates a new set of rectangles.
         
-            :param parent: The parent object
-            **Precondition**: A `GameView` or `GameController`
-            
-            :param widget: The widget to remove when the even occurs
-            **Precondition**: A `GObject` or None if parent is a `GameController`
+            :param keywords: dictionary of keyword arguments 
+            **Precondition**: See below.
+        
+        To use the constructor for this class, you should provide it
+        with the keywords `rects`, `palette` and `colors`.  For example,
+        to make a red and a blue rectangle, use the constructor call
+        
+            GBrickField(rects=[(0,0,10,5),(20,0,10,5)],
+                        palette=[colormodel.RED,colormodel.BLUE],colors=[0,1])
+        
+        `rects` is a sequence of (x,y,width,height) tuples or an n x 4 array
+        (such as `model.BrickField.rects` gives), `palette` is a
+        list of Color, RGB or HSV objects from module `colormodel`, and `colors`
+        is a sequence of indices into `palette`, one per rectangle.
+        
+        `palette` may also be an array of rgba values from 0 to 1, one row
+        per color, such as `colormodel.gradient` makes.  It is copied into
+        the palette texture as it is.
+        
+        The vertices of every rectangle are computed as whole arrays, so
+        making a field of a quarter of a million rectangles takes a fraction
+        of a second."""
+        rects = numpy.asarray(keywords.pop('rects',[]),dtype=numpy.float64).reshape(-1,4)
+        palette = keywords.pop('palette',[colormodel.BLACK])
+        colors = numpy.asarray(keywords.pop('colors',numpy.zeros(len(rects))))
+        assert len(colors) == len(rects), `colors`+' does not have one entry per rectangle'
+        super(GBrickField,self).__init__(**keywords)
+        
+        texture = self._make_palette(palette)
+        self._count = len(rects)
+        self._meshes = []
+        self._indices = []
+        self.canvas.add(Color(1,1,1,1))
+        vertices = self._make_vertices(rects,(colors+0.5)/len(palette))
+        pattern = (4*numpy.arange(min(self.CHUNK,self._count))[:,None]+self.TRIANGLES).ravel().tolist()
+        for start in range(0,self._count,self.CHUNK):
+            count = min(self.CHUNK,self._count-start)
+            indices = pattern[:6*count]
+            mesh = Mesh(vertices=vertices[start:start+count].ravel().tolist(),
+                        indices=indices,mode='triangles',texture=texture)
+            self.canvas.add(mesh)
+            self._meshes.append(mesh)
+            self._indices.append(indices)
+    
+    def __len__(self):
+        """**Returns**: the number of rectangles, including erased ones."""
+        return self._count
+    
+    def erase(self,indices):
+        """Stops drawing the given rectangles.
+        
+            :param indices: the positions of the rectangles in `rects`
+            **Precondition**: a sequence of ints in range(len(self))
+        
+        Each rectangle is erased by collapsing its two triangles onto a
+        single vertex.  Every mesh touched is updated once, however many
+        of its rectangles are erased."""
+        touched = set()
+        for i in indices:
+            chunk, k = divmod(i,self.CHUNK)
+            self._indices[chunk][6*k:6*k+6] = [4*k]*6
+            touched.add(chunk)
+        for chunk in touched:
+            self._meshes[chunk].indices = self._indices[chunk]
+    
+    # Make an n x 4 x 4 array of the vertices (x,y,u,v) of the corners of each rectangle.
+    def _make_vertices(self,rects,u):
+        x, y, w, h = rects.T
+        vertices = numpy.empty((len(rects),4,4))
+        vertices[:,0,0] = vertices[:,3,0] = x
+        vertices[:,1,0] = vertices[:,2,0] = x+w
+        vertices[:,0,1] = vertices[:,1,1] = y
+        vertices[:,2,1] = vertices[:,3,1] = y+h
+        vertices[:,:,2] = u[:,None]
+        vertices[:,:,3] = 0.5
+        return vertices
+    
+    # Make a texture with one pixel for each color in palette.
+    def _make_palette(self,palette):
+        if hasattr(palette,'dtype'):
+            pixels = colormodel.to_bytes(palette)
+        else:
+            for color in palette:
+                assert type(color) in (colormodel.RGB, colormodel.HSV, colormodel.Color), `color`+' is not a valid color'
+            pixels = colormodel.to_bytes([color.glColor() for color in palette])
+        texture = Texture.create(size=(len(palette),1),colorfmt='rgba')
+        texture.min_filter = 'nearest'
+        texture.mag_filter = 'nearest'
+        texture.blit_buffer(pixels,colorfmt='rgba',bufferfmt='ubyte')
+        return texture
+
 
-            :param callback: The function to call when the event occurs.
-            **Precondition**: A function with no (additional) arguments
+class Timer(object):
+    """Instance is a callback waiting in a `TimerQueue`.
+    
+    You should never make a Timer directly.  They are returned by the `delay`
+    method of `GameController` and by `GameView.add`, so that the callback
+    can be cancelled before it is called."""
+    __slots__ = ('_deadline','_callback','_args','_queue')
+    
+    @property
+    def deadline(self):
+        """The game time the callback is due at, in seconds.
+        
+        **Invariant**: a float"""
+        return self._deadline
+    
+    @property
+    def active(self):
+        """Whether the callback is still waiting to be called.
         
-        The delay interval is set by the parent object."""
-        self._parent = parent
-        self._widget = widget
+        **Invariant**: a bool; False once the callback is called or cancelled"""
+        return not self._queue is None
+    
+    def __init__(self,queue,deadline,callback,args):
+        """**Constructor**: creates a timer waiting in queue.
+        
+            :param queue: the queue the timer waits in
+            **Precondition**: a `TimerQueue`
+            
+            :param deadline: the game time the callback is due at
+            **Precondition**: a number
+            
+            :param callback: the function to call
+            **Precondition**: a function that takes the arguments args
+            
+            :param args: the arguments to call callback with
+            **Precondition**: a tuple"""
+        self._queue = queue
+        self._deadline = deadline
         self._callback = callback
+        self._args = args
+    
+    def cancel(self):
+        """Stops the callback from being called.
+        
+        This does nothing if the callback has been called or cancelled already."""
+        if not self._queue is None:
+            self._queue._cancelled(self)
+
+
+class TimerQueue(object):
+    """Instance is a queue of callbacks, each due at a time of the game clock.
+    
+    The game clock only moves when `advance` is called, once a frame, so
+    timers stop when the game is paused and carry on when it resumes.  The
+    timers are kept in a heap by deadline, so scheduling a timer and calling
+    the next one both take O(log n) time, however many timers are waiting.
+    Timers due at the same time are called in the order they were scheduled.
+    
+    A cancelled timer is left in the heap, and skipped when it comes due.
+    Once more than half of the heap is cancelled timers, they are all dropped
+    at once, so cancelled timers never pile up."""
+    # Hidden Fields
+    _heap = None      # The timers, as a heap of (deadline, number, timer) tuples
+    _now = 0.0        # The game time, in seconds
+    _count = 0        # The number of timers ever scheduled, to order equal deadlines
+    _stale = 0        # The number of cancelled timers still in _heap
+    _paused = False   # Whether advance is ignored
+    
+    @property
+    def now(self):
+        """The game time, in seconds since the queue was made.
+        
+        **Invariant**: a float >= 0"""
+        return self._now
     
-    def awaken(self,dt):
-        """Respond to the delayed event.
+    @property
+    def paused(self):
+        """Whether the game clock is stopped.
         
-        Delete the widget if it is there. Call the callback if it exists."""
-        if not self._parent is None:
-            if not self._widget is None:
-                self._parent.remove(self._widget)
-            self._parent._events.remove(self)
+        **Invariant**: a bool"""
+        return self._paused
+    
+    @property
+    def next_deadline(self):
+        """The game time the next timer is due at, or None if no timer is waiting.
+        
+        **Invariant**: a float, or None"""
+        self._prune()
+        return self._heap[0][0] if self._heap else None
+    
+    def __init__(self):
+        """**Constructor**: creates an empty queue with the game time at 0"""
+        self._heap = []
+        self._now = 0.0
+        self._count = 0
+        self._stale = 0
+        self._paused = False
+    
+    def __len__(self):
+        """**Returns**: the number of timers waiting (not counting cancelled ones)"""
+        return len(self._heap)-self._stale
+    
+    def schedule(self,callback,delay,*args):
+        """**Returns**: a new `Timer` that calls callback(*args) after delay seconds of game time.
+        
+            :param callback: the function to call
+            **Precondition**: a function that takes the arguments args
             
-        if not self._callback is None:
-            if self._widget is None:
-                self._callback()
+            :param delay: the game time to wait, in seconds
+            **Precondition**: a number >= 0"""
+        timer = Timer(self,self._now+delay,callback,args)
+        self._count += 1
+        heapq.heappush(self._heap,(timer._deadline,self._count,timer))
+        return timer
+    
+    def advance(self,dt):
+        """Moves the game clock on by dt seconds, calling every timer that comes due.
+        
+            :param dt: the time that has passed, in seconds
+            **Precondition**: a number >= 0
+        
+        This does nothing while the queue is paused.  A timer scheduled by a
+        callback is called in the same advance if it is already due."""
+        if self._paused:
+            return
+        self._now += dt
+        heap = self._heap
+        while heap and heap[0][0] <= self._now:
+            timer = heapq.heappop(heap)[2]
+            if timer._queue is None:
+                self._stale -= 1
             else:
-                self._callback(self._widget)
+                timer._queue = None
+                timer._callback(*timer._args)
+    
+    def pause(self):
+        """Stops the game clock, so that no timer comes due until `resume`"""
+        self._paused = True
+    
+    def resume(self):
+        """Starts the game clock again after `pause`"""
+        self._paused = False
+    
+    def clear(self):
+        """Cancels every timer in this queue"""
+        for entry in self._heap:
+            entry[2]._queue = None
+        # In place, as advance may be walking this list (a callback can clear the queue)
+        del self._heap[:]
+        self._stale = 0
+    
+    def _cancelled(self,timer):
+        """Marks timer as cancelled, dropping every cancelled timer if they are over half of the heap"""
+        timer._queue = None
+        self._stale += 1
+        if 2*self._stale > len(self._heap):
+            # In place, as advance may be walking this list (a callback can cancel timers)
+            self._heap[:] = [entry for entry in self._heap if not entry[2]._queue is None]
+            heapq.heapify(self._heap)
+            self._stale = 0
+    
+    def _prune(self):
+        """Pops any cancelled timers off the top of the heap"""
+        heap = self._heap
+        while heap and heap[0][2]._queue is None:
+            heapq.heappop(heap)
+            self._stale -= 1
+
+
+class CpuMeter(object):
+    """Instance measures the CPU time used by the process in each state of a game.
+    
+    Call `mark` with the name of the state the game is in; the CPU time and
+    wall clock time since the last mark are added to the state named then.
+    The CPU time is that of the whole process (user and system), so it covers
+    Kivy's own work as well as the game's, and time spent idle between two
+    marks counts too.  `GameController` marks every frame, and when it goes
+    idle and wakes up again."""
+    
+    # Hidden fields
+    _totals = None  # Dictionary of state name to a list [cpu, wall] of seconds
+    _state = None   # The state named by the last mark, or None before the first
+    _cpu = 0.0      # The process CPU time at the last mark
+    _wall = 0.0     # The wall clock time at the last mark
+    
+    def __init__(self):
+        """**Constructor**: creates a meter with nothing measured yet"""
+        self.reset()
+    
+    def mark(self,state):
+        """Adds the time since the last mark to the state named then, and starts measuring state.
+        
+            :param state: the name of the state the game is in from now on
+            **Precondition**: a string"""
+        times = os.times()
+        cpu = times[0]+times[1]
+        wall = _clock()
+        if not self._state is None:
+            total = self._totals.get(self._state)
+            if total is None:
+                total = self._totals[self._state] = [0.0,0.0]
+            total[0] += cpu-self._cpu
+            total[1] += wall-self._wall
+        self._state = state
+        self._cpu = cpu
+        self._wall = wall
+    
+    def reset(self):
+        """Forgets everything measured so far"""
+        self._totals = {}
+        self._state = None
+    
+    def report(self):
+        """**Returns**: a dictionary of what was measured in each state.
+        
+        Each state name maps to a dictionary with the keys 'cpu' and 'wall'
+        (seconds of CPU and wall clock time spent in the state) and 'percent'
+        (the CPU time as a percent of the wall time, that is, of one core)."""
+        result = {}
+        for state in self._totals:
+            cpu, wall = self._totals[state]
+            result[state] = {'cpu': cpu, 'wall': wall, 'percent': 100.0*cpu/wall if wall > 0 else 0.0}
+        return result
+
+
+class FrameScheduler(object):
+    """Instance decides which frames are drawn, to keep up a target frame rate.
+    
+    The frame budget is 1/`target_fps` seconds.  The scheduler measures how
+    long `update` takes (by `begin` and `end`) and how long drawing takes
+    (from the end of `update` to the buffer flip, by `flipped`), as moving
+    averages.  While a drawn frame (update and drawing) fits in the budget,
+    every frame is drawn.  When it does not, the scheduler skips drawing k
+    frames after each one it draws, picking the smallest k for which
+    
+        drawn + k*update <= (k+1)*budget
+    
+    so that, on average, frames fit in the budget again.  A skipped frame
+    still calls `update` (so the game keeps stepping at full speed); only
+    the changes to the widgets are left out, so Kivy has nothing to draw.
+    At most `MAX_SKIP` frames in a row are skipped.
+    
+    `GameController` owns one of these; see its attributes `scheduler` and
+    `rendering`.  The properties report what the scheduler decided."""
+    # Most frames in a row that are not drawn
+    MAX_SKIP = 4
+    # The weight of the newest frame in the moving averages
+    SMOOTHING = 0.1
+    # The number of seconds each measurement of the achieved rates covers
+    RATE_PERIOD = 1.0
+    
+    # Hidden fields
+    _target = 60.0     # The target frame rate
+    _work = 0.0        # Moving average of the time update takes, in seconds
+    _draw = 0.0        # Moving average of the time drawing takes, in seconds
+    _skip = 0          # Number of frames skipped after each frame drawn
+    _since = 0         # Number of frames since the last one drawn
+    _rendering = True  # Whether the current frame is drawn
+    _started = None    # When the current frame's update started, or None
+    _updated = None    # When the last drawn frame's update ended, or None once it is drawn
+    _frames = 0        # Number of frames so far
+    _skipped = 0       # Number of frames not drawn so far
+    _period = None     # When the current rate period started, or None before the first frame
+    _counts = None     # List [frames, drawn] in the current rate period
+    _rate = 0.0        # Frames per second in the last rate period
+    _drawrate = 0.0    # Drawn frames per second in the last rate period
+    
+    @property
+    def target_fps(self):
+        """The frame rate to keep up, in frames per second.
+        
+        **Invariant**: a number > 0"""
+        return self._target
+    
+    @target_fps.setter
+    def target_fps(self,value):
+        assert type(value) in (int,float) and value > 0, `value`+' is not a frame rate'
+        self._target = float(value)
+    
+    @property
+    def budget(self):
+        """The time each frame may take, in seconds (1/`target_fps`)."""
+        return 1.0/self._target
+    
+    @property
+    def rendering(self):
+        """Whether the current frame is drawn."""
+        return self._rendering
+    
+    @property
+    def skip(self):
+        """The number of frames currently skipped after each frame drawn.
+        
+        **Invariant**: an int between 0 and `MAX_SKIP`"""
+        return self._skip
+    
+    @property
+    def frames(self):
+        """The number of frames so far, drawn or not."""
+        return self._frames
+    
+    @property
+    def skipped(self):
+        """The number of frames so far that were not drawn."""
+        return self._skipped
+    
+    @property
+    def rate(self):
+        """The frames per second achieved over the last `RATE_PERIOD` seconds."""
+        return self._rate
+    
+    @property
+    def draw_rate(self):
+        """The frames drawn per second over the last `RATE_PERIOD` seconds."""
+        return self._drawrate
+    
+    def __init__(self,target_fps=60):
+        """**Constructor**: creates a scheduler with the given target frame rate
+        
+            :param target_fps: the frame rate to keep up
+            **Precondition**: a number > 0 (default 60)"""
+        self.target_fps = target_fps
+        self._counts = [0,0]
+    
+    def begin(self):
+        """**Returns**: True if the frame that is starting should be drawn.
+        
+        Call this at the start of every frame, before `update`."""
+        now = _clock()
+        if self._period is None:
+            self._period = now
+        elif now-self._period >= self.RATE_PERIOD:
+            elapsed = now-self._period
+            self._rate = self._counts[0]/elapsed
+            self._drawrate = self._counts[1]/elapsed
+            self._counts[0] = self._counts[1] = 0
+            self._period = now
+        self._rendering = self._since >= self._skip
+        self._frames += 1
+        self._counts[0] += 1
+        if self._rendering:
+            self._since = 0
+            self._counts[1] += 1
+        else:
+            self._since += 1
+            self._skipped += 1
+        self._started = now
+        return self._rendering
+    
+    def end(self):
+        """Records the end of `update` in the current frame, and picks how many frames to skip.
+        
+        Call this at the end of every frame, after `update`."""
+        now = _clock()
+        self._work += self.SMOOTHING*((now-self._started)-self._work)
+        if self._rendering:
+            self._updated = now
+        budget = 1.0/self._target
+        drawn = self._work+self._draw
+        if drawn <= budget:
+            self._skip = 0
+        elif self._work >= budget:
+            self._skip = self.MAX_SKIP
+        else:
+            skip = (drawn-budget)/(budget-self._work)
+            self._skip = min(int(skip) + (1 if skip > int(skip) else 0), self.MAX_SKIP)
+    
+    def flipped(self,*args):
+        """Records how long the last drawn frame took to draw.
+        
+        Bound to the `on_flip` event of the window."""
+        if not self._updated is None:
+            self._draw += self.SMOOTHING*((_clock()-self._updated)-self._draw)
+            self._updated = None
+    
+    def stats(self):
+        """**Returns**: a dictionary of what the scheduler has measured and decided.
+        
+        The keys are 'target_fps', 'budget_ms', 'update_ms' and 'draw_ms'
+        (moving averages), 'skip', 'frames', 'skipped', 'rate' and
+        'draw_rate'."""
+        return {'target_fps': self._target, 'budget_ms': 1000.0/self._target,
+                'update_ms': 1000*self._work, 'draw_ms': 1000*self._draw,
+                'skip': self._skip, 'frames': self._frames, 'skipped': self._skipped,
+                'rate': self._rate, 'draw_rate': self._drawrate}
+
+
+class FrameProfiler(object):
+    """Instance records how long each phase of every frame takes.
+    
+    The phases are given by `PHASES`:
+    
+        'frame': time from the start of one frame to the start of the next
+        'update': the call to `GameController.update`
+        'step': the part of update that steps the game rules (marked by the controller)
+        'text': re-rendering `GLabel` text after the text changes
+        'add', 'remove': the calls to `GameView.add` and `GameView.remove`
+        'draw': time from the end of update to the buffer flip (mostly Kivy drawing)
+    
+    Phases nest, so 'update' includes 'step', 'text', 'add' and 'remove'.
+    Times are stored in seconds, in a ring buffer of the last `size`
+    frames with one preallocated array per phase, so recording a frame
+    allocates nothing.
+    
+    Use `GameController.profile` to turn profiling on and off.  While it is
+    on, the profiler is `FrameProfiler.active`; the hooks in `GameView` and
+    `GLabel` only check that attribute, so profiling costs almost nothing
+    when it is off.  `histogram`, `summary` and `export` report the frames
+    recorded so far, and `overlay` is a label that shows a summary on screen."""
+    # The phases of a frame
+    PHASES = ('frame','update','step','text','add','remove','draw')
+    # Upper edges in ms of the histogram bins; the last bin is everything longer
+    BINS = (1.0, 2.0, 4.0, 8.0, 16.7, 33.3, 50.0, 100.0)
+    # Number of frames between refreshes of the overlay
+    OVERLAY_FRAMES = 30
+    
+    # The profiler that is on, if any
+    active = None
+    
+    # Hidden fields
+    _size = 0        # Number of frames in the ring buffer
+    _times = None    # Dictionary of arrays of times, one per phase
+    _current = None  # Dictionary of the times of the frame being recorded
+    _next = 0        # The ring buffer index of the next frame to record
+    _count = 0       # The number of frames recorded, up to _size
+    _start = None    # When the current frame started, or None
+    _updated = None  # When update ended in the current frame, or None
+    _overlay = None  # The overlay label, or None
+    
+    @property
+    def size(self):
+        """The number of frames kept in the ring buffer.
+        
+        **Invariant**: An int > 0"""
+        return self._size
+    
+    @property
+    def frames(self):
+        """The number of frames recorded, up to `size`.
+        
+        **Invariant**: An int between 0 and `size`"""
+        return self._count
+    
+    @property
+    def overlay(self):
+        """A `GLabel` that shows a summary of the frame times, refreshed every `OVERLAY_FRAMES` frames
+        
+        The label is made when it is first asked for.  Add it to the view
+        to show it, and remove it to hide it."""
+        if self._overlay is None:
+            self._overlay = GLabel(text=' ',pos=(0,0),font_size=12,fillcolor=colormodel.WHITE,cached=False)
+        return self._overlay
+    
+    def __init__(self,size=600):
+        """**Constructor**: creates a profiler that keeps the last size frames
+        
+            :param size: number of frames to keep
+            **Precondition**: an int > 0"""
+        self._size = size
+        self._times = {}
+        self._current = {}
+        for phase in self.PHASES:
+            self._times[phase] = array.array('d',[0.0])*size
+            self._current[phase] = 0.0
+    
+    def start(self):
+        """Returns: the current time, to pass to `stop` at the end of a phase"""
+        return _clock()
+    
+    def stop(self,phase,start):
+        """Adds the time since start to phase in the current frame.
+        
+            :param phase: the phase that ends
+            **Precondition**: one of `PHASES`
+            
+            :param start: the time the phase started
+            **Precondition**: a value returned by `start`"""
+        self._current[phase] += _clock()-start
+    
+    def begin_frame(self):
+        """Starts a new frame, and records the frame before it (if any)"""
+        now = _clock()
+        if not self._start is None:
+            self._current['frame'] = now-self._start
+            for phase in self.PHASES:
+                self._times[phase][self._next] = self._current[phase]
+                self._current[phase] = 0.0
+            self._next = (self._next+1) % self._size
+            self._count = min(self._count+1,self._size)
+            if not self._overlay is None and self._next % self.OVERLAY_FRAMES == 0:
+                self._refresh()
+        self._start = now
+        self._updated = None
+    
+    def end_update(self):
+        """Marks the end of update in the current frame; drawing starts now"""
+        self._updated = _clock()
+    
+    def flipped(self,*args):
+        """Marks the buffer flip at the end of drawing the current frame
+        
+        Bound to the `on_flip` event of the window."""
+        if not self._updated is None:
+            self._current['draw'] += _clock()-self._updated
+            self._updated = None
+    
+    def reset(self):
+        """Forgets every frame recorded"""
+        self._next = 0
+        self._count = 0
+        self._start = None
+        self._updated = None
+        for phase in self.PHASES:
+            self._current[phase] = 0.0
+    
+    def samples(self,phase):
+        """Returns: the times in ms of phase in the frames recorded, oldest first
+        
+            :param phase: the phase to report
+            **Precondition**: one of `PHASES`"""
+        times = self._times[phase]
+        first = (self._next-self._count) % self._size
+        return [1000*times[(first+i) % self._size] for i in xrange(self._count)]
+    
+    def histogram(self,phase,bins=BINS):
+        """Returns: a list of the number of frames whose phase time falls in each bin
+        
+            :param phase: the phase to report
+            **Precondition**: one of `PHASES`
+            
+            :param bins: the upper edges of the bins in ms
+            **Precondition**: a sorted tuple of numbers
+        
+        The list has one more entry than bins, for the times longer than
+        the last edge."""
+        counts = [0]*(len(bins)+1)
+        for time in self.samples(phase):
+            counts[bisect.bisect_left(bins,time)] += 1
+        return counts
+    
+    def summary(self,phase):
+        """Returns: a dictionary with the 'mean', 'p50', 'p99' and 'max' times of phase in ms
+        
+        All of the values are 0 if no frames have been recorded.
+        
+            :param phase: the phase to report
+            **Precondition**: one of `PHASES`"""
+        times = sorted(self.samples(phase))
+        if not times:
+            return {'mean': 0.0, 'p50': 0.0, 'p99': 0.0, 'max': 0.0}
+        return {'mean': sum(times)/len(times), 'p50': times[len(times)/2],
+                'p99': times[min(int(0.99*len(times)),len(times)-1)], 'max': times[-1]}
+    
+    def export(self,filename=None):
+        """Returns: a dictionary of every frame recorded, with summaries and histograms
+        
+            :param filename: file to write the dictionary to as JSON, or None
+            **Precondition**: a string or None
+        
+        The dictionary has the keys 'frames' (the number of frames), 'bins'
+        (the histogram edges), and 'phases', a dictionary from each phase
+        to a dictionary with its 'samples' (in ms), 'summary' and 'histogram'."""
+        result = {'frames': self._count, 'bins': list(self.BINS), 'phases': {}}
+        for phase in self.PHASES:
+            result['phases'][phase] = {'samples': self.samples(phase),
+                                       'summary': self.summary(phase),
+                                       'histogram': self.histogram(phase)}
+        if not filename is None:
+            with open(filename,'w') as f:
+                json.dump(result,f)
+        return result
+    
+    def _refresh(self):
+        """Shows the latest summary in the overlay, without recording its own text change"""
+        text = []
+        for phase in ('frame','update','step','draw'):
+            stats = self.summary(phase)
+            text.append('%s %.1f/%.1f' % (phase,stats['p50'],stats['p99']))
+        FrameProfiler.active = None
+        self._overlay.text = 'ms p50/p99: '+'  '.join(text)
+        FrameProfiler.active = self
 
 
 class GameView(FloatLayout):
@@ -652,8 +2023,20 @@ class GameView(FloatLayout):
     `GObject` instances.  However, you will never need to construct one.
     You should only use the one provided in the `view` attribute of
     `GameController`.  See `GameController` for more information."""
-    # Hidden Field.  Necessary to maintain strong references to delayed events.    
-    _events = []
+    # Hidden Field.  The timers of the controller, for widgets added with a timeout
+    _timers = None
+    
+    def __init__(self,**keywords):
+        """**Constructor**: creates a new view, loading graphics.kv if necessary
+        
+        The keyword `timers` gives the `TimerQueue` that removes widgets added
+        with a timeout; the `GameController` gives its own.  If it is missing,
+        the view makes a queue of its own, which nothing advances."""
+        _load_graphics_once()
+        self._timers = keywords.pop('timers',None)
+        if self._timers is None:
+            self._timers = TimerQueue()
+        super(GameView,self).__init__(**keywords)
     
     def add(self,widget,timeout=0,callback=None):
         """Add a new `GObject` to this view.
@@ -667,19 +2050,26 @@ class GameView(FloatLayout):
             :param callback: function called after delay; ignored if `timeout` is 0.
             **Precondition**: a function reference; must be a function that takes the widget as an argument
         
+        **Returns**: the `Timer` that removes the widget, or None if `timeout` is 0
+        
         Objects are drawn 'bottom-up', with later objects drawn on top of
         objects added earlier.  If you wish for an object to be in the
         background, it must be added first.
         
         The `timeout` attribute is a simple way to provide a widget that quickly
         flashes up on screen, though the `delay` method in `GameController` has 
-        the same effect."""
+        the same effect.  The timeout is in game time, so it stops while the
+        game is paused."""
         assert isinstance(widget,GObject)
-        self.add_widget(widget)
+        profiler = FrameProfiler.active
+        if profiler is None:
+            self.add_widget(widget)
+        else:
+            start = profiler.start()
+            self.add_widget(widget)
+            profiler.stop('add',start)
         if timeout > 0:
-            timer = _ClockEvent(self,widget,callback)
-            self._events.append(timer)
-            Clock.schedule_once(timer.awaken, timeout)
+            return self._timers.schedule(self._expire,timeout,widget,callback)
     
     def remove(self,widget):
         """Removes the widget from this view.
@@ -693,7 +2083,19 @@ class GameView(FloatLayout):
         remove the widget for you.
         
         This method does nothing if widget is not in this view."""
-        self.remove_widget(widget)
+        profiler = FrameProfiler.active
+        if profiler is None:
+            self.remove_widget(widget)
+        else:
+            start = profiler.start()
+            self.remove_widget(widget)
+            profiler.stop('remove',start)
+    
+    def _expire(self,widget,callback):
+        """Removes a widget added with a timeout, and calls its callback (if any) with it"""
+        self.remove(widget)
+        if not callback is None:
+            callback(widget)
 
 
 class GameController(object):
@@ -722,7 +2124,10 @@ class GameController(object):
         a finger while it is still help down.  touch_move events are
         optional for each press, while touch_down and touch_up are not.
     
-    These are the only methods that you *must* implement.  In addition,
+    These are the only methods that you *must* implement.  You may also
+    override `idle`, to let the clock stop calling `update` while nothing in
+    the game can change, and `state_name`, to name the states of the game in
+    the CPU report of `cpu`.  In addition,
     you should add whatever fields and/or helper methods are necessary
     for your game.
     
@@ -732,8 +2137,26 @@ class GameController(object):
     its fields."""
     # Field for the view.  See associated property
     _view = None
-    # Hidden Field.  Necessary to maintain strong references to delayed events.    
-    _events = []
+    # Field for the timer queue.  See associated property
+    _timers = None
+    # Hidden Field.  Whether the game is paused (no frames and no timers)
+    _paused = False
+    # Hidden Field.  Whether to drop the time of the next frame, which includes the pause
+    _resumed = False
+    # Field for the profiler.  See associated property
+    _profiler = None
+    # Hidden Field.  The frame callback scheduled with the clock, or None before start-up
+    _scheduled = None
+    # Hidden Field.  Whether the frame callback is stopped because the game is idle
+    _asleep = False
+    # Hidden Field.  The clock time the game went idle
+    _slept = 0.0
+    # Field for idle mode.  See associated property
+    _idlesleep = True
+    # Field for the CPU meter.  See associated property
+    _cpu = None
+    # Field for the frame scheduler.  See associated property
+    _scheduler = None
     
     @property
     def view(self):
@@ -745,14 +2168,90 @@ class GameController(object):
         in this attribute to add and remove graphics objects."""
         return self._view
     
+    @property
+    def timers(self):
+        """The `TimerQueue` of this game, which runs on game time.
+        
+        The queue is advanced before `update` in every frame that the game
+        is not paused.  `delay` schedules on it."""
+        return self._timers
+    
+    @property
+    def paused(self):
+        """Whether the game is paused.
+        
+        While paused, `update` is not called and timers do not come due.
+        Use the methods `pause` and `resume` to change this."""
+        return self._paused
+    
+    @property
+    def asleep(self):
+        """Whether the game is idle, so that the clock is not calling `update`.
+        
+        See the method `idle`."""
+        return self._asleep
+    
+    @property
+    def idle_sleep(self):
+        """Whether to stop calling `update` while the game is idle.
+        
+        This is True by default.  See the method `idle`.
+        
+        **Invariant**: a bool"""
+        return self._idlesleep
+    
+    @idle_sleep.setter
+    def idle_sleep(self,value):
+        assert type(value) == bool, `value`+' is not a bool'
+        self._idlesleep = value
+        if not value:
+            self.wake()
+    
+    @property
+    def cpu(self):
+        """The `CpuMeter` measuring the CPU time used in each state of this game.
+        
+        The states are named by the method `state_name`."""
+        return self._cpu
+    
+    @property
+    def scheduler(self):
+        """The `FrameScheduler` that paces the frames of this game and decides which are drawn.
+        
+        Set `target_fps` to change the frame rate (see `set_frame_rate`), and
+        use `stats` to see the rates achieved and the frames skipped."""
+        return self._scheduler
+    
+    @property
+    def rendering(self):
+        """Whether the current frame is drawn.
+        
+        When this is False, the game is over its frame budget: `update` should
+        step the game but leave the widgets as they are, so that there is
+        nothing to draw.  Any change it leaves out must be made in the next
+        frame that is drawn.  It is True outside of frames (for example when
+        `update` is called directly, as a replay does)."""
+        return self._scheduler.rendering
+    
+    @property
+    def profiler(self):
+        """The `FrameProfiler` timing the frames of this game, or None if profiling is off.
+        
+        Use the method `profile` to turn profiling on and off."""
+        return self._profiler
+    
     # VISIBLE METHODS
     
     def __init__(self):
         """**Constructor**: Creates a game with this controller"""
-        self._view = GameView()
+        self._timers = TimerQueue()
+        self._view = GameView(timers=self._timers)
         self._view.bind(on_touch_down=self.on_touch_down)
         self._view.bind(on_touch_move=self.on_touch_move)
         self._view.bind(on_touch_up=self.on_touch_up)
+        self._view.bind(on_touch_down=self._touched,on_touch_move=self._touched,on_touch_up=self._touched)
+        self._cpu = CpuMeter()
+        self._scheduler = FrameScheduler()
         Clock.schedule_once(self._start_up,-1)
 
     def delay(self,callback,time):
@@ -764,13 +2263,90 @@ class GameController(object):
             :param time: time to wait in seconds before calling the function.
             **Precondition**: a positive number (int or float)
         
-        You may have multiple callbacks delayed at any given time.  However,
-        you be careful about called `delay` inside of callback functions already
-        delayed.  The result is similar to recursion in that it can run out
-        of memory if you do it too much."""
-        timer = _ClockEvent(self,None,callback)
-        self._events.append(timer)
-        Clock.schedule_once(timer.awaken,time)
+        **Returns**: the `Timer` for the callback; call its `cancel` method to
+        stop the callback from being called.
+        
+        The time is game time: it stops while the game is paused.  You may
+        have any number of callbacks delayed at any given time, and may call
+        `delay` inside of callback functions already delayed."""
+        return self._timers.schedule(callback,time)
+    
+    def wake(self):
+        """Starts calling `update` again, after the game went idle.
+        
+        The timers are moved on by the time spent idle (calling any that came
+        due), and frames start again.  This is called on every touch, and when
+        the next timer comes due; call it yourself if anything else should end
+        an idle spell.  It does nothing if the game is not idle."""
+        if self._asleep:
+            Clock.unschedule(self._wake)
+            self._asleep = False
+            self._cpu.mark(self.state_name())
+            self._timers.advance(_clock()-self._slept)
+            Clock.schedule_interval(self._scheduled,self._scheduler.budget)
+    
+    def set_frame_rate(self,fps):
+        """Sets the frame rate the game aims for.
+        
+            :param fps: the target frame rate
+            **Precondition**: a number > 0
+        
+        Kivy does not run its loop faster than its `maxfps` setting (60 by
+        default), so a higher rate needs that setting raised as well."""
+        self._scheduler.target_fps = fps
+        self._schedule(self._scheduled)
+    
+    def pause(self):
+        """Pauses the game: `update` is not called, and timers stop, until `resume`"""
+        self.wake()
+        self._paused = True
+        self._timers.pause()
+    
+    def resume(self):
+        """Resumes the game after `pause`.
+        
+        The time spent paused is not passed on to `update` or the timers."""
+        if self._paused:
+            self._paused = False
+            self._resumed = True
+            self._timers.resume()
+
+    def profile(self,enabled=True,overlay=False,size=600):
+        """Turns timing of every frame on or off.
+        
+            :param enabled: whether to time frames
+            **Precondition**: a bool
+            
+            :param overlay: whether to show the frame times on screen; ignored if not enabled
+            **Precondition**: a bool
+            
+            :param size: number of frames to keep, if profiling is turned on
+            **Precondition**: an int > 0
+        
+        When profiling is turned on, a new `FrameProfiler` is made (unless one
+        is on already) and is available as the attribute `profiler`.  Each
+        frame, the timers and `update` are called by a wrapper that times
+        them, instead of directly by the clock.  When it is turned off, the
+        clock calls them directly again."""
+        from kivy.core.window import Window
+        if enabled:
+            if self._profiler is None:
+                self._profiler = FrameProfiler(size)
+                Window.bind(on_flip=self._profiler.flipped)
+            FrameProfiler.active = self._profiler
+            if overlay and self._profiler.overlay.parent is None:
+                self.view.add(self._profiler.overlay)
+            elif not overlay and not self._profiler.overlay.parent is None:
+                self.view.remove(self._profiler.overlay)
+            self._schedule(self._profiledUpdate)
+        elif not self._profiler is None:
+            if not self._profiler.overlay.parent is None:
+                self.view.remove(self._profiler.overlay)
+            Window.unbind(on_flip=self._profiler.flipped)
+            if FrameProfiler.active is self._profiler:
+                FrameProfiler.active = None
+            self._profiler = None
+            self._schedule(self._frame)
 
     def initialize(self):
         """Called to initialize the game features.
@@ -799,6 +2375,27 @@ class GameController(object):
         *Override this method to provide code specific to your game.*"""        
         pass
     
+    def idle(self):
+        """**Returns**: True if nothing in the game changes until the next touch or timer.
+        
+        This is called after every frame.  If it returns True (and `idle_sleep`
+        is True), the clock stops calling `update` until there is a touch or
+        the next timer is due, so an idle game uses almost no CPU.  Return True
+        only when `update` would change nothing on its own, such as while
+        waiting for a touch to start, or for a timer to serve a ball.
+        
+        *Override this method to provide code specific to your game.*  By
+        default a game is never idle."""
+        return False
+    
+    def state_name(self):
+        """**Returns**: the name of the state the game is in, for the CPU meter.
+        
+        The attribute `cpu` measures the CPU time used under each name.
+        
+        *Override this method to provide code specific to your game.*"""
+        return 'running'
+    
     def on_touch_down(self,view,touch):
         """Called when the user presses the mouse or a finger (on touch screens)
         
@@ -858,5 +2455,74 @@ class GameController(object):
         Necessary as much of the size and position information in
         the application is not available until the constructor is
         finished."""
-        Clock.schedule_interval(self.update,1.0/60.0)
-        self.initialize()    
+        from kivy.core.window import Window
+        _startup['window'] = time.time()
+        Window.bind(on_flip=self._first_frame)
+        Window.bind(on_flip=self._scheduler.flipped)
+        self._scheduled = self._frame if self._profiler is None else self._profiledUpdate
+        Clock.schedule_interval(self._scheduled,self._scheduler.budget)
+        self.initialize()
+
+    def _first_frame(self,*args):
+        """Records the time of the first frame for `startup_report`
+        
+        Bound to the `on_flip` event of the window until the first flip."""
+        from kivy.core.window import Window
+        _startup['first_frame'] = time.time()
+        Window.unbind(on_flip=self._first_frame)
+
+    def _schedule(self,callback):
+        """Makes callback the function the clock calls every frame.
+        
+        Does nothing if the animation has not started; `_start_up` picks
+        the callback then."""
+        if not self._scheduled is None:
+            if not self._asleep:
+                Clock.unschedule(self._scheduled)
+                Clock.schedule_interval(callback,self._scheduler.budget)
+            self._scheduled = callback
+    
+    def _frame(self,dt):
+        """Advances the timers and calls `update`, unless the game is paused"""
+        if self._paused:
+            return
+        if self._resumed:
+            self._resumed = False
+            dt = 0
+        self._timers.advance(dt)
+        self._scheduler.begin()
+        self.update(dt)
+        self._scheduler.end()
+        self._cpu.mark(self.state_name())
+        if self._idlesleep and self.idle():
+            self._sleep()
+    
+    def _sleep(self):
+        """Stops the frame callback while the game is idle, until a touch or the next timer"""
+        Clock.unschedule(self._scheduled)
+        self._asleep = True
+        self._slept = _clock()
+        deadline = self._timers.next_deadline
+        if not deadline is None:
+            Clock.schedule_once(self._wake,deadline-self._timers.now)
+    
+    def _wake(self,dt):
+        """Wakes the game up when its next timer is due"""
+        self.wake()
+    
+    def _touched(self,view,touch):
+        """Wakes the game up on any touch"""
+        self.wake()
+    
+    def _profiledUpdate(self,dt):
+        """Calls `_frame`, and records the frame with the profiler"""
+        profiler = self._profiler
+        profiler.begin_frame()
+        start = profiler.start()
+        self._frame(dt)
+        profiler.stop('update',start)
+        profiler.end_update()    
+
+
+# Start-up time of this module
+_startup['import'] = time.time()
@@ -0,0 +1,270 @@
+# levels.py
+# Tech Kuo(thk42) and Charles Lai(cjl223)
+# 10-18-26
+"""Level pack module for Breakout
+
+This module reads and writes packs of levels in a compact binary file.  A
+level is a grid of bricks, where each cell holds a palette index and the
+number of hits the brick takes (0 for an empty cell).  A pack is
+
+    a header: magic 'BKLV', version (1 byte), a pad byte, the number of
+    palette colors (2 bytes) and the number of levels (4 bytes)
+
+    the palette: 4 bytes (red, green, blue, alpha) per color
+
+    the index: for each level, the offset of its grid in the file (4 bytes)
+    and its columns and rows (2 bytes each)
+
+    the grids: for each level, rows*columns palette indices followed by
+    rows*columns hit points, one byte each, row by row from the top
+
+A pack is opened through mmap, so reading a level only touches the header,
+its index entry and its own grid, however many levels the pack holds.
+
+Usage from the command line:
+
+    python levels.py generate pack count [columns rows [seed]]
+
+writes a pack of count levels (the standard board, then generated ones), and
+
+    python levels.py show pack number
+
+prints a level of a pack."""
+import mmap
+import struct
+import sys
+from model import *
+
+# CONSTANTS
+
+# The header of a pack
+MAGIC = 'BKLV'
+VERSION = 1
+HEADER = struct.Struct('<4sBxHI')
+# An entry of the index of a pack
+INDEX = struct.Struct('<IHH')
+# A color of the palette of a pack
+COLOR = struct.Struct('<4B')
+
+# Most columns a level can have, so that every brick is at least a pixel wide
+MAX_COLUMNS = GAME_WIDTH / (BRICK_SEP_H + 1)
+
+# Chance that a cell of a generated level is empty, or that its brick takes an extra hit
+EMPTY_CHANCE = 0.2
+TOUGH_CHANCE = 0.15
+
+
+# FUNCTIONS
+def standard(columns=BRICKS_IN_ROW, rows=BRICK_ROWS):
+    """Returns: the Level of the standard board, colored by ROW_COLORS
+
+    Precondition: columns is an int between 1 and MAX_COLUMNS; rows is an int > 0"""
+    palette = list(ROW_COLORS)
+    colors = numpy.repeat(numpy.arange(rows) % len(palette), columns).reshape(rows, columns)
+    return Level(colors, numpy.ones((rows, columns)), palette)
+
+
+def generate(columns, rows, seed):
+    """Returns: a new random Level that is the same mirrored left to right
+
+    Each row has one color of ROW_COLORS.  About EMPTY_CHANCE of the cells
+    are empty, and about TOUGH_CHANCE of the bricks take 2 hits (and a few
+    of those 3).  The same seed always gives the same level.
+
+    Precondition: columns is an int between 1 and MAX_COLUMNS; rows is an int
+    > 0; seed is an int between 0 and 2**32-1"""
+    rng = numpy.random.RandomState(seed)
+    half = (columns + 1) / 2
+    hits = 1 + (rng.random_sample((rows, half)) < TOUGH_CHANCE) + (rng.random_sample((rows, half)) < TOUGH_CHANCE/4)
+    hits[rng.random_sample((rows, half)) < EMPTY_CHANCE] = 0
+    hits = numpy.concatenate((hits, hits[:, :columns-half][:, ::-1]), axis=1)
+    palette = list(ROW_COLORS)
+    colors = numpy.repeat(rng.randint(0, len(palette), rows), columns).reshape(rows, columns)
+    return Level(colors, hits, palette)
+
+
+def write(filename, levels):
+    """Writes the levels to a new pack in the file filename
+
+    The palettes of the levels are merged into one palette for the pack.
+
+    Precondition: filename is a string; levels is a non-empty sequence of
+    Levels that use at most 256 different colors between them"""
+    palette = []
+    grids = []
+    for level in levels:
+        table = []
+        for color in level.palette:
+            color = colormodel.freeze(color)
+            if not color in palette:
+                palette.append(color)
+            table.append(palette.index(color))
+        colors = numpy.asarray(table, dtype=numpy.uint8)[level.colors]
+        grids.append((level.columns, level.rows, colors.tostring() + level.hits.tostring()))
+    assert len(palette) <= 256, `len(palette)` + ' colors do not fit in a pack'
+    with open(filename, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(palette), len(grids)))
+        for color in palette:
+            f.write(COLOR.pack(color.red, color.green, color.blue, color.alpha))
+        offset = HEADER.size + COLOR.size*len(palette) + INDEX.size*len(grids)
+        for (columns, rows, data) in grids:
+            f.write(INDEX.pack(offset, columns, rows))
+            offset += len(data)
+        for (columns, rows, data) in grids:
+            f.write(data)
+
+
+# CLASSES
+class Level(object):
+    """Instance is the layout of the bricks of one level.
+
+    Give a Level to the model.Game (or controller.Breakout) constructor to
+    play it.  The brick at row r (counting down from the top) and column c
+    is drawn with palette[colors[r,c]] and takes hits[r,c] hits; there is no
+    brick there if hits[r,c] is 0."""
+    # FIELDS.  They are public, as this is plain data.
+
+    # The number of bricks in a row
+    # Invariant: Value is an int between 1 and MAX_COLUMNS
+    columns = 0
+
+    # The number of rows of bricks
+    # Invariant: Value is an int > 0
+    rows = 0
+
+    # The palette index of each cell
+    # Invariant: A rows x columns uint8 array of valid indices of palette
+    colors = None
+
+    # The hit points of each cell
+    # Invariant: A rows x columns uint8 array
+    hits = None
+
+    # The colors of the level
+    # Invariant: A non-empty list of colormodel colors
+    palette = None
+
+    def __init__(self, colors, hits, palette):
+        """Constructor: a level with the given cells and palette
+
+        Precondition: colors and hits are 2-dimensional arrays (or nested
+        lists) of the same shape, with at most MAX_COLUMNS columns; colors
+        holds valid indices of palette; hits holds ints between 0 and 255;
+        palette is a non-empty list of at most 256 colormodel colors"""
+        self.colors = numpy.array(colors, dtype=numpy.uint8, ndmin=2)
+        self.hits = numpy.array(hits, dtype=numpy.uint8, ndmin=2)
+        assert self.colors.shape == self.hits.shape, 'the colors and hits of a level must have the same shape'
+        self.rows, self.columns = self.colors.shape
+        assert 0 < self.columns <= MAX_COLUMNS, `self.columns` + ' columns do not fit the display'
+        self.palette = list(palette)
+        assert 0 < len(self.palette) <= 256 and self.colors.max() < len(self.palette), 'the colors of a level must index its palette'
+
+    @property
+    def bricks(self):
+        """The number of bricks in the level (cells that are not empty)"""
+        return int(numpy.count_nonzero(self.hits))
+
+    def __str__(self):
+        """Returns: the grid of the level, two characters per cell (' .' if empty, else a letter for the palette index and the hits)"""
+        lines = []
+        for r in range(self.rows):
+            cells = []
+            for c in range(self.columns):
+                hits = self.hits.item(r, c)
+                cells.append(' .' if hits == 0 else '%c%d' % (chr(ord('a') + self.colors.item(r, c) % 26), min(hits, 9)))
+            lines.append(''.join(cells))
+        return '\n'.join(lines)
+
+
+class LevelPack(object):
+    """Instance is a pack of levels in a file, opened through mmap.
+
+    Index a pack to read a level: pack[n] is a new Level with a copy of the
+    bytes of level n.  Nothing else is read, so opening a pack and picking a
+    level costs the same for a pack of ten levels or of ten thousand.  Close
+    the pack when done (or use it in a with statement); the levels read from
+    it stay valid."""
+    # FIELDS.  They are all hidden.
+
+    # The file of the pack
+    # Invariant: A file object open for reading, or None once closed
+    _file = None
+
+    # The memory map of the file
+    # Invariant: An mmap of all of _file, or None once closed
+    _map = None
+
+    # The number of levels
+    # Invariant: Value is an int >= 0
+    _count = 0
+
+    # The palette of the pack, shared by every level read
+    # Invariant: A list of colormodel.Color
+    _palette = None
+
+    # The offset of the index in the file
+    # Invariant: Value is an int > 0
+    _index = 0
+
+    def __init__(self, filename):
+        """Constructor: the pack in the file filename
+
+        Precondition: filename is the name of a file written by `write`"""
+        self._file = open(filename, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, colors, count = HEADER.unpack_from(self._map, 0)
+        assert magic == MAGIC and version == VERSION, `filename` + ' is not a Breakout level pack'
+        self._count = count
+        self._palette = [colormodel.Color(*COLOR.unpack_from(self._map, HEADER.size + COLOR.size*i))
+                         for i in range(colors)]
+        self._index = HEADER.size + COLOR.size*colors
+
+    def __len__(self):
+        """Returns: the number of levels in the pack"""
+        return self._count
+
+    def __getitem__(self, number):
+        """Returns: a new Level with the bricks of level number
+
+        Precondition: number is an int between 0 and len(self)-1"""
+        assert 0 <= number < self._count, `number` + ' is not a level of this pack'
+        offset, columns, rows = INDEX.unpack_from(self._map, self._index + INDEX.size*number)
+        cells = rows*columns
+        grid = numpy.frombuffer(self._map[offset:offset + 2*cells], dtype=numpy.uint8)
+        return Level(grid[:cells].reshape(rows, columns), grid[cells:].reshape(rows, columns), self._palette)
+
+    def __enter__(self):
+        """Returns: this pack, for a with statement"""
+        return self
+
+    def __exit__(self, *args):
+        """Closes this pack at the end of a with statement"""
+        self.close()
+
+    def close(self):
+        """Closes the file of this pack.  No more levels can be read from it."""
+        if not self._map is None:
+            self._map.close()
+            self._file.close()
+            self._map = None
+            self._file = None
+
+
+# Application code
+if __name__ == '__main__':
+    if len(sys.argv) >= 4 and sys.argv[1] == 'generate':
+        columns = int(sys.argv[4]) if len(sys.argv) > 5 else BRICKS_IN_ROW
+        rows = int(sys.argv[5]) if len(sys.argv) > 5 else BRICK_ROWS
+        seed = int(sys.argv[6]) if len(sys.argv) > 6 else 0
+        count = int(sys.argv[3])
+        write(sys.argv[2], [standard(columns, rows)] + [generate(columns, rows, seed + i) for i in range(1, count)])
+        print 'Wrote %d levels of %dx%d to %s' % (count, columns, rows, sys.argv[2])
+    elif len(sys.argv) == 4 and sys.argv[1] == 'show':
+        with LevelPack(sys.argv[2]) as pack:
+            level = pack[int(sys.argv[3])]
+        print '%d columns, %d rows, %d bricks' % (level.columns, level.rows, level.bricks)
+        print level
+    else:
+        print 'Usage: python levels.py generate pack count [columns rows [seed]]'
+        print '       python levels.py show pack number'
+        sys.exit(1)
@@ -0,0 +1,1363 @@
+# model.py
+# Tech Kuo(thk42) and Charles Lai(cjl223)
+# 10-18-26
+"""Model module for Breakout
+
+This module contains the rules of Breakout as plain Python data.  It does not
+import Kivy, so a game can be stepped thousands of times a second with no
+window open.  The controller in controller.py owns an instance of `Game` and
+only draws its state.
+
+All coordinates are in pixels, with the origin at the bottom left corner of
+the game display.  Velocities are in pixels per animation frame (1/60 s)."""
+import colormodel
+import math
+import numpy
+import random
+
+# CONSTANTS
+
+# Width of the game display (all coordinates are in pixels)
+GAME_WIDTH  = 480
+# Height of the game display
+GAME_HEIGHT = 620
+
+# Width of the paddle
+PADDLE_WIDTH = 58
+# Height of the paddle
+PADDLE_HEIGHT = 11
+# Distance of the (bottom of the) paddle up from the bottom
+PADDLE_OFFSET = 30
+
+# Horizontal separation between bricks
+BRICK_SEP_H = 5
+# Vertical separation between bricks
+BRICK_SEP_V = 4
+# Height of a brick
+BRICK_HEIGHT = 8
+# Offset of the top brick row from the top
+BRICK_Y_OFFSET = 70
+# The color of each row of bricks, from the top.  Rows past the end of the
+# table take their colors from the top of the table again.
+ROW_COLORS = (colormodel.RED, colormodel.RED, colormodel.ORANGE, colormodel.ORANGE,
+              colormodel.YELLOW, colormodel.YELLOW, colormodel.GREEN, colormodel.GREEN,
+              colormodel.CYAN, colormodel.CYAN)
+
+# Number of bricks per row
+BRICKS_IN_ROW = 10
+# Number of rows of bricks, in range 1..10.
+BRICK_ROWS = 10
+# Width of a brick
+BRICK_WIDTH = GAME_WIDTH / BRICKS_IN_ROW - BRICK_SEP_H
+
+# Diameter of the ball in pixels
+BALL_DIAMETER = 18
+# Height of the bottom of the ball when it is served
+BALL_SERVE_Y = 310
+# Vertical velocity of a served ball
+BALL_SERVE_VY = -5.0
+# Space between balls served together (see Game.serve)
+BALL_SERVE_GAP = 4
+
+# Number of animation frames per second.  Velocities are in pixels per frame
+FRAME_RATE = 60
+# Number of physics steps per second when the game is driven by FixedStep
+PHYSICS_RATE = 60
+# Most physics steps taken to catch up in one display frame
+MAX_CATCHUP_STEPS = 5
+
+# Most contacts resolved in one step of a game with swept collisions
+SWEEP_LIMIT = 8
+
+# Number of attempts in a game
+NUMBER_TURNS = 3
+
+# Basic game states
+# Game has not started yet
+STATE_INACTIVE = 0
+# Game is active, but waiting for next ball
+STATE_PAUSED   = 1
+# Ball is in play and being animated
+STATE_ACTIVE   = 2
+# Game is over, deactivate all actions
+STATE_COMPLETE = 3
+
+
+# FUNCTIONS
+def sweep(x, y, dx, dy, size, box):
+    """Returns: the first contact of a moving square with box, as a tuple (t, face)
+
+    The square has side size and bottom left corner (x,y), and moves by
+    (dx,dy) over one step.  The result gives the fraction t of the step
+    (between 0 and 1) at which the square first touches box, and the face of
+    box that it touches: one of 'left', 'right', 'bottom' or 'top'.  Returns
+    None if the square does not touch box during the step, or if it already
+    overlaps box at the start of the step.
+
+    This is the slab test against box grown by size to the left and below,
+    so the square is treated as its bottom left corner.
+
+    Precondition: x, y, dx, dy, size are numbers; box is a Box"""
+    left = box.x - size
+    right = box.x + box.width
+    bottom = box.y - size
+    top = box.y + box.height
+    if dx > 0:
+        xenter, xexit = (left - x) / float(dx), (right - x) / float(dx)
+    elif dx < 0:
+        xenter, xexit = (right - x) / float(dx), (left - x) / float(dx)
+    elif left <= x <= right:
+        xenter, xexit = float('-inf'), float('inf')
+    else:
+        return None
+    if dy > 0:
+        yenter, yexit = (bottom - y) / float(dy), (top - y) / float(dy)
+    elif dy < 0:
+        yenter, yexit = (top - y) / float(dy), (bottom - y) / float(dy)
+    elif bottom <= y <= top:
+        yenter, yexit = float('-inf'), float('inf')
+    else:
+        return None
+    t = max(xenter, yenter)
+    if t < 0 or t > 1 or t > min(xexit, yexit):
+        return None
+    if xenter > yenter:
+        return (t, 'left' if dx > 0 else 'right')
+    return (t, 'bottom' if dy > 0 else 'top')
+
+
+def layout(columns, rows, brick_width, row_colors=None, level=None):
+    """Returns: a BrickField of rows rows of columns bricks each, as laid out at the start of a game
+
+    Brick r*columns+c is at row r (counting down from the top) and column c,
+    and the field has a BrickGrid index (unless brick_width+BRICK_SEP_H is
+    not positive, when the bricks are scanned instead).  Row r has the color
+    row_colors[r % len(row_colors)].  The palette of the field holds each
+    different color of row_colors once, in the order they first appear.
+
+    row_colors may also be an array of rgba values from 0 to 1, one row per
+    brick row (such as colormodel.gradient makes); it is then the palette.
+
+    If level is given, the colors and hit points of the bricks come from it
+    instead of row_colors (cells with 0 hit points have no brick), and its
+    grid must be rows x columns.
+
+    The positions and palette indices of all of the bricks are computed as
+    whole arrays, with no loop over the bricks, so a 500x500 board is laid
+    out in milliseconds.
+
+    Precondition: columns and rows are ints > 0; brick_width is a number
+    (> 0 for a board that fits the display); row_colors is None (for
+    ROW_COLORS), a sequence of at most 256 colormodel colors, or an array
+    of at most 256 rgba rows; level is None or a levels.Level"""
+    if not level is None:
+        assert (level.rows, level.columns) == (rows, columns), 'the level does not fit the board'
+        row_colors = level.palette
+    if row_colors is None:
+        row_colors = ROW_COLORS
+    if isinstance(row_colors, numpy.ndarray):
+        palette = row_colors
+        table = numpy.arange(len(row_colors))
+    else:
+        palette = []
+        table = []
+        for color in row_colors:
+            if not color in palette:
+                palette.append(color)
+            table.append(palette.index(color))
+    assert 0 < len(table) <= 256, `len(table)` + ' row colors do not fit in a palette'
+    column, row = numpy.meshgrid(numpy.arange(columns, dtype=numpy.int32), numpy.arange(rows, dtype=numpy.int32))
+    column = column.ravel()
+    row = row.ravel()
+    x = BRICK_SEP_H/2 + brick_width*column + BRICK_SEP_H*column
+    y = GAME_HEIGHT-BRICK_Y_OFFSET - BRICK_HEIGHT*row - BRICK_SEP_V*row
+    n = len(x)
+    if level is None:
+        color = numpy.asarray(table, dtype=numpy.uint8)[row % len(table)]
+        hits = None
+    else:
+        color = numpy.asarray(table, dtype=numpy.uint8)[level.colors.ravel()]
+        hits = level.hits.ravel()
+    field = BrickField(x, y, numpy.full(n, brick_width, dtype=numpy.float64), numpy.full(n, BRICK_HEIGHT, dtype=numpy.float64),
+                       color, palette, row, column, hits)
+    # fix_bricks gives bricks of width -5 on boards of more than GAME_WIDTH
+    # columns; their columns do not advance, so they cannot be indexed
+    if brick_width+BRICK_SEP_H > 0:
+        field.index_grid(rows, columns, BRICK_SEP_H/2, GAME_HEIGHT-BRICK_Y_OFFSET+BRICK_HEIGHT,
+                         brick_width+BRICK_SEP_H, BRICK_HEIGHT+BRICK_SEP_V)
+    return field
+
+
+# CLASSES
+class Box(object):
+    """Instance is an axis-aligned rectangle in the game.
+
+    The bottom left corner is (x, y).  Points on the border count as inside,
+    which matches collide_point on a Kivy widget."""
+    # FIELDS.  They are public, as this is plain data.
+
+    # The x-coordinate of the left edge
+    # Invariant: Value is a number (int or float)
+    x = 0
+
+    # The y-coordinate of the bottom edge
+    # Invariant: Value is a number (int or float)
+    y = 0
+
+    # The width of the rectangle
+    # Invariant: Value is a number >= 0
+    width = 0
+
+    # The height of the rectangle
+    # Invariant: Value is a number >= 0
+    height = 0
+
+    def __init__(self, x, y, width, height):
+        """Constructor: a rectangle with bottom left corner (x,y) and the given size
+
+        Precondition: x, y, width and height are numbers; width, height >= 0"""
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+
+    def collide_point(self, x, y):
+        """Returns: True if the point (x,y) is inside this rectangle or on its border"""
+        return self.x <= x <= self.x + self.width and self.y <= y <= self.y + self.height
+
+
+class Body(Box):
+    """Instance is a moving square in the game (the ball).
+
+    The ball is drawn as a circle, but all of the rules treat it as the
+    square that the circle is inscribed in."""
+
+    # Velocity in x direction.
+    # Invariant: Value is a float
+    vx = 0.0
+
+    # Velocity in y direction.
+    # Invariant: Value is a float
+    vy = 0.0
+
+    # The x-coordinate before the last step
+    # Invariant: Value is a number (int or float)
+    px = 0
+
+    # The y-coordinate before the last step
+    # Invariant: Value is a number (int or float)
+    py = 0
+
+    def __init__(self, x, y, size, vx, vy):
+        """Constructor: a square of side size at (x,y) with velocity (vx,vy)
+
+        Precondition: x, y, vx, vy are numbers; size is a number > 0"""
+        super(Body, self).__init__(x, y, size, size)
+        self.vx = vx
+        self.vy = vy
+        self.px = x
+        self.py = y
+
+    def interpolate(self, alpha):
+        """Returns: the position (x,y) a fraction alpha of the way through the last step
+
+        alpha 0 gives the position before the last step, and alpha 1 the
+        current position.
+
+        Precondition: alpha is a number between 0 and 1"""
+        return (self.px + (self.x - self.px)*alpha, self.py + (self.y - self.py)*alpha)
+
+
+class Brick(object):
+    """Instance is a view of one brick in a BrickField.
+
+    A brick does not hold any data of its own; reading an attribute reads
+    the arrays of the field.  Two views of the same brick are equal."""
+    # FIELDS.
+
+    # The field this brick belongs to
+    # Invariant: A BrickField
+    _field = None
+
+    # The position of this brick in the arrays of the field
+    # Invariant: Value is an int between 0 and the size of the field (exclusive)
+    _index = 0
+
+    @property
+    def index(self):
+        """The position of this brick in the arrays of its field"""
+        return self._index
+
+    @property
+    def x(self):
+        """The x-coordinate of the left edge"""
+        return self._field.x.item(self._index)
+
+    @property
+    def y(self):
+        """The y-coordinate of the bottom edge"""
+        return self._field.y.item(self._index)
+
+    @property
+    def width(self):
+        """The width of the brick"""
+        return self._field.width.item(self._index)
+
+    @property
+    def height(self):
+        """The height of the brick"""
+        return self._field.height.item(self._index)
+
+    @property
+    def row(self):
+        """The row the brick was laid out in, counting down from the top row (row 0)"""
+        return self._field.row.item(self._index)
+
+    @property
+    def column(self):
+        """The column the brick was laid out in, counting from the left (column 0)"""
+        return self._field.column.item(self._index)
+
+    @property
+    def hits(self):
+        """The number of hits the brick takes before it is removed (0 once removed)"""
+        return self._field.hits.item(self._index)
+
+    @property
+    def color(self):
+        """The colormodel color the brick should be drawn with"""
+        return self._field.palette[self._field.color.item(self._index)]
+
+    @property
+    def alive(self):
+        """True if the brick is still in play"""
+        return self._field.alive.item(self._index)
+
+    def __init__(self, field, index):
+        """Constructor: a view of brick index in field
+
+        Precondition: field is a BrickField; index is an int in range for field"""
+        self._field = field
+        self._index = index
+
+    def __eq__(self, other):
+        """Returns: True if other is a view of the same brick"""
+        return isinstance(other, Brick) and self._field is other._field and self._index == other._index
+
+    def __ne__(self, other):
+        """Returns: True if other is not a view of the same brick"""
+        return not self == other
+
+    def __hash__(self):
+        """Returns: a hash consistent with __eq__"""
+        return hash((id(self._field), self._index))
+
+    def collide_point(self, x, y):
+        """Returns: True if the point (x,y) is inside this brick or on its border"""
+        return self._field.contains(self._index, x, y)
+
+
+class BrickField(object):
+    """Instance is a set of bricks stored as a structure of NumPy arrays.
+
+    Brick i has its bottom left corner at (x[i], y[i]), size (width[i],
+    height[i]), and is drawn with palette[color[i]].  It is in play while
+    alive[i] is True; removing a brick only clears that flag, so brick
+    indices never change.  Indexing the field gives a Brick view.
+
+    Collisions against every live brick can be tested in a single NumPy
+    operation (see `collide_square`).  If the bricks are laid out on a
+    regular grid, attach a BrickGrid with `index_grid` and `first_hit` will
+    only test the bricks near the ball instead."""
+    # FIELDS.  The arrays are public, but should be treated as read-only.
+
+    # The x-coordinate of the left edge of each brick
+    # Invariant: A float64 array of length n
+    x = None
+
+    # The y-coordinate of the bottom edge of each brick
+    # Invariant: A float64 array of length n
+    y = None
+
+    # The width of each brick
+    # Invariant: A float64 array of length n
+    width = None
+
+    # The height of each brick
+    # Invariant: A float64 array of length n
+    height = None
+
+    # The row each brick was laid out in
+    # Invariant: An int32 array of length n
+    row = None
+
+    # The column each brick was laid out in
+    # Invariant: An int32 array of length n
+    column = None
+
+    # The palette index of the color of each brick
+    # Invariant: A uint8 array of length n; every value is a valid index of palette
+    color = None
+
+    # Whether each brick is still in play
+    # Invariant: A bool array of length n
+    alive = None
+
+    # The number of hits each brick takes before it is removed
+    # Invariant: A uint8 array of length n; hits[i] > 0 exactly when alive[i]
+    hits = None
+
+    # The colors used by the bricks
+    # Invariant: A list of color objects from module colormodel, or a float
+    # array of rgba rows (see colormodel.gradient)
+    palette = []
+
+    # Number of bricks still in play
+    # Invariant: Value is the number of True values in alive
+    _count = 0
+
+    # The grid index of the bricks
+    # Invariant: A BrickGrid over this field, or None if the bricks are not on a grid
+    _grid = None
+
+    def __init__(self, x, y, width, height, color, palette, row=None, column=None, hits=None):
+        """Constructor: a field of bricks with the given positions, sizes and colors
+
+        The arguments x through color are sequences of the same length n (one
+        entry per brick).  They are copied into new arrays.  The row and
+        column of each brick default to 0.  Each brick takes hits[i] hits
+        before it is removed, 1 by default; a brick with 0 hits is not in
+        play to begin with (an empty cell of a level).
+
+        Precondition: x, y, width, height are sequences of numbers; color is a
+        sequence of valid indices into palette, which is a list of colormodel
+        colors or an array of rgba rows; row, column and hits are None or
+        sequences of ints (hits between 0 and 255)."""
+        self.x = numpy.array(x, dtype=numpy.float64)
+        n = len(self.x)
+        self.y = numpy.array(y, dtype=numpy.float64)
+        self.width = numpy.array(width, dtype=numpy.float64)
+        self.height = numpy.array(height, dtype=numpy.float64)
+        self.color = numpy.array(color, dtype=numpy.uint8)
+        self.row = numpy.zeros(n, dtype=numpy.int32) if row is None else numpy.array(row, dtype=numpy.int32)
+        self.column = numpy.zeros(n, dtype=numpy.int32) if column is None else numpy.array(column, dtype=numpy.int32)
+        self.hits = numpy.ones(n, dtype=numpy.uint8) if hits is None else numpy.array(hits, dtype=numpy.uint8)
+        self.alive = self.hits > 0
+        self.palette = numpy.array(palette) if isinstance(palette, numpy.ndarray) else list(palette)
+        self._count = int(numpy.count_nonzero(self.alive))
+        self._grid = None
+
+    def __len__(self):
+        """Returns: the number of bricks still in play"""
+        return self._count
+
+    def __getitem__(self, index):
+        """Returns: a Brick view of the brick at index (whether or not it is alive)"""
+        return Brick(self, index)
+
+    def __iter__(self):
+        """Returns: an iterator over views of the bricks still in play, in index order"""
+        for index in numpy.flatnonzero(self.alive):
+            yield Brick(self, int(index))
+
+    @property
+    def size(self):
+        """The number of bricks in the field, including removed ones"""
+        return len(self.x)
+
+    @property
+    def grid(self):
+        """The BrickGrid index of this field, or None if it has none"""
+        return self._grid
+
+    def dead(self):
+        """Returns: a new int array of the indices of the bricks out of play, in order"""
+        return numpy.flatnonzero(~self.alive)
+
+    def rects(self):
+        """Returns: a new n x 4 float array of (x, y, width, height) rows, one per brick
+
+        Removed bricks are included, so row i is brick i."""
+        return numpy.column_stack((self.x, self.y, self.width, self.height))
+
+    def index_grid(self, rows, columns, left, top, pitch_x, pitch_y):
+        """Attaches a BrickGrid index to this field
+
+        See BrickGrid for the meaning of the arguments.
+
+        Precondition: brick r*columns+c is the brick at row r, column c"""
+        self._grid = BrickGrid(self, rows, columns, left, top, pitch_x, pitch_y)
+
+    def remove(self, index):
+        """Takes the brick at index out of play, however many hits it had left
+
+        Precondition: the brick at index is alive"""
+        self.alive[index] = False
+        self.hits[index] = 0
+        self._count -= 1
+
+    def hit(self, index):
+        """Returns: True if hitting the brick at index took it out of play
+
+        The brick loses one hit, and is removed when it has none left.
+
+        Precondition: the brick at index is alive"""
+        left = self.hits.item(index) - 1
+        if left > 0:
+            self.hits[index] = left
+            return False
+        self.remove(index)
+        return True
+
+    def contains(self, index, x, y):
+        """Returns: True if the point (x,y) is inside brick index or on its border"""
+        left = self.x.item(index)
+        bottom = self.y.item(index)
+        return (left <= x <= left + self.width.item(index) and
+                bottom <= y <= bottom + self.height.item(index))
+
+    def collide_square(self, x, y, size):
+        """Returns: a bool array that is True for every live brick containing a corner of a square
+
+        The square has its bottom left corner at (x,y) and side size.  All
+        four corners are tested against every brick in one NumPy operation.
+
+        Precondition: x, y and size are numbers"""
+        left = self.x
+        right = left + self.width
+        bottom = self.y
+        top = bottom + self.height
+        # A corner is in a brick if its x is in the brick span and its y is too
+        xin = ((left <= x) & (x <= right)) | ((left <= x+size) & (x+size <= right))
+        yin = ((bottom <= y) & (y <= top)) | ((bottom <= y+size) & (y+size <= top))
+        return xin & yin & self.alive
+
+    def first_hit(self, x, y, size):
+        """Returns: the index of the first live brick containing a corner of a square
+
+        The square is the one of `collide_square`.  The first brick is the
+        one with the smallest index.  Returns -1 if there is no such brick.
+
+        Precondition: x, y and size are numbers"""
+        if self._grid is None:
+            hits = self.collide_square(x, y, size)
+            return int(hits.argmax()) if hits.any() else -1
+        grid = self._grid
+        first = -1
+        for (cx, cy) in ((x, y), (x + size, y), (x, y + size), (x + size, y + size)):
+            index = grid.find(cx, cy)
+            if index >= 0 and (first < 0 or index < first):
+                first = index
+        return first
+
+    def sweep(self, x, y, dx, dy, size):
+        """Returns: the first live brick touched by a moving square, as a tuple (index, t, face)
+
+        The square and the meaning of t and face are the same as in the
+        function `sweep`.  Ties are broken by the smallest index.  Returns
+        None if the square touches no live brick during the step.
+
+        If the field has a grid, only the bricks in the cells around the path
+        of the square are tested; otherwise every brick is tested in one NumPy
+        operation.
+
+        Precondition: x, y, dx, dy and size are numbers"""
+        if self._grid is None:
+            index = numpy.arange(self.size)
+        else:
+            index = self._grid.cells(min(x, x+dx), min(y, y+dy), max(x, x+dx)+size, max(y, y+dy)+size)
+        index = index[self.alive[index]]
+        if len(index) == 0:
+            return None
+        left = self.x[index] - size
+        right = self.x[index] + self.width[index]
+        bottom = self.y[index] - size
+        top = self.y[index] + self.height[index]
+        inf = numpy.inf
+        if dx != 0:
+            near, far = (left, right) if dx > 0 else (right, left)
+            xenter = (near - x) / float(dx)
+            xexit = (far - x) / float(dx)
+        else:
+            inside = (left <= x) & (x <= right)
+            xenter = numpy.where(inside, -inf, inf)
+            xexit = numpy.where(inside, inf, -inf)
+        if dy != 0:
+            near, far = (bottom, top) if dy > 0 else (top, bottom)
+            yenter = (near - y) / float(dy)
+            yexit = (far - y) / float(dy)
+        else:
+            inside = (bottom <= y) & (y <= top)
+            yenter = numpy.where(inside, -inf, inf)
+            yexit = numpy.where(inside, inf, -inf)
+        enter = numpy.maximum(xenter, yenter)
+        hits = (enter >= 0) & (enter <= 1) & (enter <= numpy.minimum(xexit, yexit))
+        if not hits.any():
+            return None
+        first = int(numpy.where(hits, enter, inf).argmin())
+        t = float(enter[first])
+        if xenter[first] > yenter[first]:
+            face = 'left' if dx > 0 else 'right'
+        else:
+            face = 'bottom' if dy > 0 else 'top'
+        return (int(index[first]), t, face)
+
+
+class BrickGrid(object):
+    """Instance is a spatial index over a BrickField laid out on a regular grid.
+
+    Column c starts at left + c*pitch_x, and row r has its top edge at
+    top - r*pitch_y (rows count down from the top).  The brick at row r and
+    column c must be brick r*columns+c of the field.
+
+    A point can only be inside the brick of the cell it falls in, or of the
+    cell just before it when bricks share an edge.  So finding the brick at a
+    point costs the same no matter how many bricks there are.  Removed
+    bricks are skipped through the alive flags of the field."""
+    # FIELDS.
+
+    # The bricks being indexed
+    # Invariant: A BrickField with at least rows*columns bricks
+    _field = None
+
+    # Number of rows in the grid
+    # Invariant: Value is an int >= 0
+    _rows = 0
+
+    # Number of columns in the grid
+    # Invariant: Value is an int >= 0
+    _columns = 0
+
+    # The x-coordinate of the left edge of column 0
+    # Invariant: Value is a number
+    _left = 0
+
+    # The y-coordinate of the top edge of row 0
+    # Invariant: Value is a number
+    _top = 0
+
+    # Distance between the left edges of two neighboring columns
+    # Invariant: Value is a number > 0
+    _pitchx = 1
+
+    # Distance between the top edges of two neighboring rows
+    # Invariant: Value is a number > 0
+    _pitchy = 1
+
+    @property
+    def rows(self):
+        """The number of rows in the grid"""
+        return self._rows
+
+    @property
+    def columns(self):
+        """The number of columns in the grid"""
+        return self._columns
+
+    @property
+    def left(self):
+        """The x-coordinate of the left edge of column 0"""
+        return self._left
+
+    @property
+    def top(self):
+        """The y-coordinate of the top edge of row 0"""
+        return self._top
+
+    @property
+    def pitch_x(self):
+        """The distance between the left edges of two neighboring columns"""
+        return self._pitchx
+
+    @property
+    def pitch_y(self):
+        """The distance between the top edges of two neighboring rows"""
+        return self._pitchy
+
+    def __init__(self, field, rows, columns, left, top, pitch_x, pitch_y):
+        """Constructor: a grid index over field with the given number of cells and spacing
+
+        Precondition: field is a BrickField laid out as described in the class
+        specification; rows and columns are ints >= 0; left and top are
+        numbers; pitch_x and pitch_y are numbers > 0"""
+        assert pitch_x > 0 and pitch_y > 0, 'the pitch of a grid must be positive'
+        self._field = field
+        self._rows = rows
+        self._columns = columns
+        self._left = left
+        self._top = top
+        self._pitchx = float(pitch_x)
+        self._pitchy = float(pitch_y)
+
+    def find(self, x, y):
+        """Returns: the index of the first live brick containing the point (x,y)
+
+        Returns -1 if no live brick contains the point.
+
+        Precondition: x and y are numbers"""
+        field = self._field
+        alive = field.alive
+        col = int(math.floor((x - self._left) / self._pitchx))
+        row = int(math.floor((self._top - y) / self._pitchy))
+        for r in (row-1, row):
+            if 0 <= r < self._rows:
+                for c in (col-1, col):
+                    if 0 <= c < self._columns:
+                        index = r*self._columns+c
+                        if alive.item(index) and field.contains(index, x, y):
+                            return index
+        return -1
+
+    def cells(self, x0, y0, x1, y1):
+        """Returns: an int array of the indices of the bricks in the cells touching a rectangle
+
+        The rectangle has bottom left corner (x0,y0) and top right corner
+        (x1,y1).  The indices are in increasing order and include removed
+        bricks.
+
+        Precondition: x0 <= x1 and y0 <= y1 are numbers"""
+        col0 = max(int(math.floor((x0 - self._left) / self._pitchx)) - 1, 0)
+        col1 = min(int(math.floor((x1 - self._left) / self._pitchx)), self._columns-1)
+        row0 = max(int(math.floor((self._top - y1) / self._pitchy)) - 1, 0)
+        row1 = min(int(math.floor((self._top - y0) / self._pitchy)), self._rows-1)
+        if col0 > col1 or row0 > row1:
+            return numpy.zeros(0, dtype=numpy.intp)
+        rows = numpy.arange(row0, row1+1)
+        cols = numpy.arange(col0, col1+1)
+        return (rows[:, numpy.newaxis]*self._columns + cols).ravel()
+
+
+class SweepAndPrune(object):
+    """Instance finds the pairs of overlapping bodies among many moving ones.
+
+    The bodies are kept in a list sorted by the left edge.  Balls only move
+    a few pixels a step, so the list is nearly sorted from one step to the
+    next, and `sort` (an insertion sort) fixes it in time close to linear.
+    `pairs` then sweeps the list from left to right: each body is only
+    tested against the bodies that start before its right edge, so the cost
+    grows with the number of bodies and of close pairs, not with the square
+    of the number of bodies."""
+    # FIELDS.
+
+    # The bodies, sorted by x as of the last sort
+    # Invariant: A list of Box (usually Body) objects, each at most once
+    _bodies = None
+
+    # Number of bodies moved by the last sort
+    # Invariant: Value is an int >= 0
+    _swaps = 0
+
+    # Number of pairs tested for overlap by the last call to pairs
+    # Invariant: Value is an int >= 0
+    _tests = 0
+
+    @property
+    def swaps(self):
+        """The number of places bodies were moved by the last sort (0 if the list was sorted)"""
+        return self._swaps
+
+    @property
+    def tests(self):
+        """The number of pairs tested for overlap by the last call to pairs"""
+        return self._tests
+
+    def __init__(self, bodies=()):
+        """Constructor: a broadphase over the given bodies
+
+        Precondition: bodies is a sequence of Box objects"""
+        self._bodies = list(bodies)
+        self.sort()
+
+    def __len__(self):
+        """Returns: the number of bodies"""
+        return len(self._bodies)
+
+    def add(self, body):
+        """Adds body, in its place in the order
+
+        Precondition: body is a Box that is not already added"""
+        bodies = self._bodies
+        i = len(bodies)
+        while i > 0 and bodies[i-1].x > body.x:
+            i -= 1
+        bodies.insert(i, body)
+
+    def remove(self, body):
+        """Removes body
+
+        Precondition: body was added"""
+        self._bodies.remove(body)
+
+    def clear(self):
+        """Removes every body"""
+        del self._bodies[:]
+
+    def sort(self):
+        """Sorts the bodies by x again, after they have moved
+
+        This is an insertion sort, which is stable and takes time close to
+        linear when the bodies have only moved a little since the last sort."""
+        bodies = self._bodies
+        swaps = 0
+        for i in range(1, len(bodies)):
+            body = bodies[i]
+            x = body.x
+            j = i
+            while j > 0 and bodies[j-1].x > x:
+                bodies[j] = bodies[j-1]
+                j -= 1
+            if j < i:
+                bodies[j] = body
+                swaps += i - j
+        self._swaps = swaps
+
+    def pairs(self):
+        """Returns: a list of the pairs (a, b) of bodies that overlap, after sorting the bodies
+
+        Bodies overlap if their insides do; bodies that only touch along an
+        edge do not.  In each pair, a is left of (or level with) b.  The
+        pairs come in the order of the sweep, so the same bodies in the same
+        places always give the same list."""
+        self.sort()
+        bodies = self._bodies
+        count = len(bodies)
+        result = []
+        tests = 0
+        for i in range(count):
+            a = bodies[i]
+            right = a.x + a.width
+            bottom = a.y
+            top = bottom + a.height
+            for j in range(i+1, count):
+                b = bodies[j]
+                if b.x >= right:
+                    break
+                tests += 1
+                if b.y < top and bottom < b.y + b.height:
+                    result.append((a, b))
+        self._tests = tests
+        return result
+
+
+class FixedStep(object):
+    """Instance turns the variable time between display frames into fixed physics steps.
+
+    Every call to `advance` adds the time since the last display frame to an
+    accumulator, and returns how many whole physics steps fit in it.  The
+    time left over is kept for the next call, and `alpha` gives it as a
+    fraction of a step, for interpolating between the last two physics
+    states when drawing.  So the game runs at the same speed whatever the
+    display rate.
+
+    If the display falls far behind, at most `limit` steps are taken for one
+    frame and the rest of the time is dropped.  The game then slows down
+    instead of spending ever more time catching up."""
+    # FIELDS.
+
+    # Number of physics steps per second
+    # Invariant: Value is a number > 0
+    _rate = PHYSICS_RATE
+
+    # Most steps returned by a single call to advance
+    # Invariant: Value is an int > 0
+    _limit = MAX_CATCHUP_STEPS
+
+    # Time accumulated but not yet stepped, in seconds
+    # Invariant: Value is a float between 0 and 1.0/_rate
+    _accumulator = 0.0
+
+    # Number of steps dropped because of the limit
+    # Invariant: Value is an int >= 0
+    _dropped = 0
+
+    @property
+    def rate(self):
+        """The number of physics steps per second"""
+        return self._rate
+
+    @property
+    def frames(self):
+        """The length of one physics step, in animation frames (1/FRAME_RATE s)
+
+        This is the value to pass to Game.step."""
+        return FRAME_RATE / float(self._rate)
+
+    @property
+    def alpha(self):
+        """The time left over after the last advance, as a fraction of a step (0 <= alpha < 1)"""
+        return self._accumulator * self._rate
+
+    @property
+    def dropped(self):
+        """The number of steps dropped so far because the display fell behind"""
+        return self._dropped
+
+    def __init__(self, rate=PHYSICS_RATE, limit=MAX_CATCHUP_STEPS):
+        """Constructor: an empty accumulator taking rate steps a second, at most limit at once
+
+        Precondition: rate is a number > 0, limit is an int > 0"""
+        self._rate = rate
+        self._limit = limit
+        self.reset()
+
+    def reset(self):
+        """Throws away any accumulated time"""
+        self._accumulator = 0.0
+
+    def advance(self, dt):
+        """Returns: the number of physics steps to take for a display frame dt seconds long
+
+        Precondition: dt is a number >= 0"""
+        self._accumulator += dt
+        steps = int(self._accumulator * self._rate)
+        self._accumulator -= steps / float(self._rate)
+        if self._accumulator < 0:
+            # Round off error when dt is an exact multiple of the step
+            self._accumulator = 0.0
+        if steps > self._limit:
+            self._dropped += steps - self._limit
+            steps = self._limit
+        return steps
+
+
+class Game(object):
+    """Instance is a single game of Breakout, with no graphics attached.
+
+        Method start lays out the bricks and the paddle.
+
+        Method serve puts new balls into play.
+
+        Method step advances the balls by one animation frame.
+
+        Method move_paddle moves the paddle.
+
+    The state fields can be read through properties, but should only be
+    changed through these methods.  A game starts in STATE_INACTIVE, goes to
+    STATE_PAUSED when started and STATE_ACTIVE when a ball is served.  It ends
+    in STATE_COMPLETE, either because all bricks are gone (see `won`) or
+    because all lives are lost.
+
+    A game may have many balls in play at once (see the constructor).  A
+    life is only lost when the last of them leaves the screen.  Balls bounce
+    off each other; the pairs to test are found by a SweepAndPrune, so that
+    dozens of balls cost little more than one."""
+    # FIELDS.
+
+    # Current play state of the game
+    # Invariant: One of STATE_INACTIVE, STATE_PAUSED, STATE_ACTIVE, STATE_COMPLETE
+    _state = STATE_INACTIVE
+
+    # The bricks of the board
+    # Invariant: A BrickField, or None if state is STATE_INACTIVE
+    _bricks = None
+
+    # The player paddle
+    # Invariant: A Box, or None if state is STATE_INACTIVE
+    _paddle = None
+
+    # The balls in play, oldest first
+    # Invariant: A list of Body objects; empty if state is not STATE_ACTIVE
+    # (except when the game was won, which leaves the balls where they were)
+    _balls = None
+
+    # The broadphase for collisions between the balls
+    # Invariant: A SweepAndPrune over exactly the balls in _balls
+    _broadphase = None
+
+    # Number of balls put into play by each serve
+    # Invariant: Value is an int > 0
+    _serving = 1
+
+    # Player lives
+    # Invariant: Value is an int between 0 and NUMBER_TURNS
+    _lives = NUMBER_TURNS
+
+    # Number of frames stepped since the game was started
+    # Invariant: Value is an int >= 0
+    _frames = 0
+
+    # Number of times a ball has bounced off the paddle since the game was started
+    # Invariant: Value is an int >= 0
+    _paddlehits = 0
+
+    # Number of times two balls have bounced off each other since the game was started
+    # Invariant: Value is an int >= 0
+    _ballhits = 0
+
+    # Number of bricks in a row
+    # Invariant: Value is an int > 0
+    _columns = BRICKS_IN_ROW
+
+    # Number of rows of bricks
+    # Invariant: Value is an int > 0
+    _rows = BRICK_ROWS
+
+    # Width of a brick
+    # Invariant: Value is a number > 0
+    _brickwidth = BRICK_WIDTH
+
+    # The level the board is laid out from
+    # Invariant: A levels.Level, or None for the board of ROW_COLORS
+    _level = None
+
+    # Whether the ball is moved with swept collision detection (see step)
+    # Invariant: Value is a bool
+    _swept = False
+
+    # The random numbers for serving the ball
+    # Invariant: An object that is an instance of random.Random
+    _random = None
+
+    @property
+    def state(self):
+        """The current play state, one of the STATE constants"""
+        return self._state
+
+    @property
+    def bricks(self):
+        """The BrickField of the board, or None if the game has not started"""
+        return self._bricks
+
+    @property
+    def remaining(self):
+        """The number of bricks still in play"""
+        return 0 if self._bricks is None else len(self._bricks)
+
+    @property
+    def paddle(self):
+        """The paddle (a Box), or None if the game has not started"""
+        return self._paddle
+
+    @property
+    def ball(self):
+        """The oldest ball in play (a Body), or None if no ball is in play"""
+        return self._balls[0] if self._balls else None
+
+    @property
+    def balls(self):
+        """The list of balls in play (Body objects), oldest first
+
+        This list is owned by the game; do not change it."""
+        return self._balls
+
+    @property
+    def serving(self):
+        """The number of balls put into play by each serve"""
+        return self._serving
+
+    @property
+    def lives(self):
+        """The number of lives remaining"""
+        return self._lives
+
+    @property
+    def frames(self):
+        """The number of frames stepped since the game was started"""
+        return self._frames
+
+    @property
+    def paddle_hits(self):
+        """The number of times a ball has bounced off the paddle since the game was started"""
+        return self._paddlehits
+
+    @property
+    def ball_hits(self):
+        """The number of times two balls have bounced off each other since the game was started"""
+        return self._ballhits
+
+    @property
+    def won(self):
+        """True if the game is over because every brick was removed"""
+        return self._state == STATE_COMPLETE and self.remaining == 0
+
+    def __init__(self, columns=None, rows=None, brick_width=None, swept=False, seed=None, level=None, balls=1):
+        """Constructor: a new, inactive game on a board of the given size
+
+        The board arguments default to BRICKS_IN_ROW, BRICK_ROWS and
+        BRICK_WIDTH.  Pass them explicitly when those constants have been
+        changed elsewhere (for example by fix_bricks in __main__.py).  If
+        swept is True, the ball is moved with swept collision detection, so
+        that fast balls and large steps cannot pass through bricks.
+
+        If level is given, the board is laid out from it: the columns and
+        rows are those of the level, and the brick width fills the display
+        (as fix_bricks computes it) unless brick_width is given.
+
+        The serves are random, drawn from a random.Random made from seed.
+        Two games with the same seed and the same paddle moves play out
+        exactly the same way.  If seed is None, the game is not repeatable.
+
+        Each serve puts balls balls into play at once.  With the default of
+        one ball, the game is the same as a game from before there were
+        multi-ball games.
+
+        Precondition: columns and rows are ints > 0, brick_width is a number > 0,
+        swept is a bool, seed is None or a hashable value (usually an int),
+        level is None or a levels.Level, balls is an int > 0"""
+        assert type(balls) == int and balls > 0, `balls` + ' is not a number of balls'
+        if not level is None:
+            columns = level.columns
+            rows = level.rows
+            if brick_width is None:
+                brick_width = GAME_WIDTH / columns - BRICK_SEP_H
+        self._level = level
+        self._columns = BRICKS_IN_ROW if columns is None else columns
+        self._rows = BRICK_ROWS if rows is None else rows
+        self._brickwidth = BRICK_WIDTH if brick_width is None else brick_width
+        self._swept = swept
+        self._serving = balls
+        self._random = random.Random(seed)
+        self._balls = []
+        self._broadphase = SweepAndPrune()
+        self.reset()
+
+    def reset(self):
+        """Returns the game to STATE_INACTIVE with full lives and an empty board"""
+        self._state = STATE_INACTIVE
+        self._bricks = None
+        self._paddle = None
+        self._clearBalls()
+        self._lives = NUMBER_TURNS
+        self._frames = 0
+        self._paddlehits = 0
+        self._ballhits = 0
+
+    def start(self):
+        """Lays out the bricks and the paddle, and waits for a ball to be served
+
+        Precondition: state is STATE_INACTIVE"""
+        self._setBricks()
+        self._paddle = Box(GAME_WIDTH/2-PADDLE_WIDTH/2, PADDLE_OFFSET, PADDLE_WIDTH, PADDLE_HEIGHT)
+        self._lives = NUMBER_TURNS
+        self._frames = 0
+        self._paddlehits = 0
+        self._ballhits = 0
+        self._state = STATE_PAUSED
+
+    def serve(self):
+        """Puts new balls into play and sets the state to STATE_ACTIVE
+
+        Each ball moves down, with a random horizontal speed between 1 and 5
+        in either direction.  The first ball starts in the middle of the
+        screen.  The others (for a multi-ball game) start in a row to either
+        side of it, BALL_SERVE_GAP apart, and in more rows below that if they
+        do not fit across the screen.
+
+        Precondition: state is STATE_PAUSED"""
+        space = BALL_DIAMETER + BALL_SERVE_GAP
+        center = GAME_WIDTH/2-BALL_DIAMETER/2
+        across = 2*(center/space) + 1
+        for number in range(self._serving):
+            vx = self._random.uniform(1.0, 5.0)
+            vx = vx * self._random.choice([-1,1])
+            place = number % across
+            slot = (place+1)/2 if place % 2 == 1 else -(place/2)
+            ball = Body(center + slot*space, BALL_SERVE_Y - (number/across)*space, BALL_DIAMETER, vx, BALL_SERVE_VY)
+            self._balls.append(ball)
+            self._broadphase.add(ball)
+        self._state = STATE_ACTIVE
+
+    def move_paddle(self, x):
+        """Moves the left edge of the paddle to x, kept inside the game display
+
+        Precondition: x is a number; the game has a paddle"""
+        self._paddle.x = min(max(x, 0), GAME_WIDTH-PADDLE_WIDTH)
+
+    def step(self, dt=1.0):
+        """Returns: the list of bricks removed while animating dt frames
+
+        Moves each ball by its velocity (times dt) and resolves collisions
+        with the walls, the paddle and the bricks, in the order the balls
+        were served.  A ball that leaves the bottom of the screen is taken
+        out of play, and then the balls still in play that overlap bounce off
+        each other.  If the lost ball was the last one, the player loses a
+        life and the state becomes either STATE_PAUSED or (if no lives are
+        left) STATE_COMPLETE.  If the last brick is removed, the state becomes
+        STATE_COMPLETE.
+
+        By default each ball jumps to its new position and only collisions at
+        that position are found, so dt should not be much larger than 1.  If
+        the game was made with swept=True, the path of each ball is tested
+        instead (see `sweep`), so any dt is safe.  Collisions between balls
+        are only found at their new positions either way.
+
+        Does nothing (and returns an empty list) unless state is STATE_ACTIVE.
+
+        Precondition: dt is a number > 0"""
+        removed = []
+        if self._state != STATE_ACTIVE:
+            return removed
+        self._frames += 1
+        lost = False
+        for ball in self._balls:
+            ball.px = ball.x
+            ball.py = ball.y
+            if self._swept:
+                self._moveSwept(ball, dt, removed)
+            else:
+                self._move(ball, dt, removed)
+            lost = lost or ball.y <= 0
+
+        if lost: #check bottom boundary
+            for ball in [ball for ball in self._balls if ball.y <= 0]:
+                self._balls.remove(ball)
+                self._broadphase.remove(ball)
+        if len(self._balls) > 1:
+            self._collideBalls()
+        if len(self._balls) == 0:
+            self._lives -= 1
+            self._state = STATE_PAUSED if self._lives > 0 else STATE_COMPLETE
+        elif len(self._bricks) == 0:
+            self._state = STATE_COMPLETE
+        return removed
+
+    # HELPER METHODS
+    def _setBricks(self):
+        """Lays out the bricks of the board from the level, or with the row colors of ROW_COLORS (see layout)"""
+        self._bricks = layout(self._columns, self._rows, self._brickwidth, level=self._level)
+
+    def _clearBalls(self):
+        """Takes every ball out of play"""
+        del self._balls[:]
+        self._broadphase.clear()
+
+    def _collideBalls(self):
+        """Bounces off each other the balls that overlap
+
+        The balls are treated as squares, like everywhere else in the rules.
+        Two balls bounce along the axis on which they overlap the least, by
+        swapping their velocities along that axis (as two equal masses do).
+        They only bounce if they are moving towards each other on that axis,
+        so a pair that still overlaps after a bounce is left to move apart."""
+        for (a, b) in self._broadphase.pairs():
+            dx = b.x - a.x
+            dy = b.y - a.y
+            if abs(dx) >= abs(dy):
+                if (b.vx - a.vx)*dx < 0:
+                    a.vx, b.vx = b.vx, a.vx
+                    self._ballhits += 1
+            elif (b.vy - a.vy)*dy < 0:
+                a.vy, b.vy = b.vy, a.vy
+                self._ballhits += 1
+
+    def _move(self, ball, dt, removed):
+        """Moves ball dt frames, testing for collisions only at its new position
+
+        Bricks that are hit lose a hit point; those left with none are removed
+        and appended to the list removed.
+
+        Precondition: ball is a ball in play; dt is a number > 0; removed is
+        a list; state is STATE_ACTIVE"""
+        vx = ball.vx
+        vy = ball.vy
+        x = ball.x + vx*dt
+        y = ball.y + vy*dt
+
+        if y <= 0: #ball is lost, so no collisions
+            ball.y = y
+            return
+        if y + BALL_DIAMETER >= GAME_HEIGHT: #check top boundary
+            vy = -vy
+            y = ball.y + vy*dt
+        if x + BALL_DIAMETER >= GAME_WIDTH: #check right boundary
+            vx = -vx
+            x = ball.x + vx*dt
+        if x <= 0: #check left boundary
+            vx = -vx
+            x = ball.x + vx*dt
+        if self._getCollidingObject(x, y, vy) is self._paddle: #check paddle
+            vy = -vy
+            y = ball.y + vy*dt
+            self._paddlehits += 1
+        brick = self._getCollidingObject(x, y, vy)
+        if not brick is None and not brick is self._paddle: #check bricks
+            if self._bricks.hit(brick.index):
+                removed.append(brick)
+            vy = -vy
+            y = ball.y + vy*dt
+
+        ball.x = x
+        ball.y = y
+        ball.vx = vx
+        ball.vy = vy
+
+    def _moveSwept(self, ball, dt, removed):
+        """Moves ball dt frames along its path, bouncing at every contact on the way
+
+        Each pass finds the first wall, paddle or brick face that the ball
+        touches in the rest of the step, moves the ball there, and reflects
+        the velocity off that face.  At most SWEEP_LIMIT contacts are handled
+        in one step.  Bricks that are hit lose a hit point; those left with
+        none are removed and appended to the list removed.  The bottom of
+        the screen is not a wall.
+
+        Precondition: ball is a ball in play; dt is a number > 0; removed is
+        a list; state is STATE_ACTIVE"""
+        paddle = self._paddle
+        rest = 1.0
+        for contact in range(SWEEP_LIMIT):
+            dx = ball.vx*dt*rest
+            dy = ball.vy*dt*rest
+            t = 1.0
+            face = None
+            index = -1
+            onpaddle = False
+
+            if dx > 0 and ball.x + dx + BALL_DIAMETER >= GAME_WIDTH: #right boundary
+                t = (GAME_WIDTH - BALL_DIAMETER - ball.x) / dx
+                face = 'left'
+            elif dx < 0 and ball.x + dx <= 0: #left boundary
+                t = -ball.x / dx
+                face = 'right'
+            if dy > 0 and ball.y + dy + BALL_DIAMETER >= GAME_HEIGHT: #top boundary
+                ty = (GAME_HEIGHT - BALL_DIAMETER - ball.y) / dy
+                if face is None or ty < t:
+                    t = ty
+                    face = 'bottom'
+            if dy < 0: #paddle, only when moving down
+                hit = sweep(ball.x, ball.y, dx, dy, BALL_DIAMETER, paddle)
+                if not hit is None and (face is None or hit[0] < t):
+                    t, face = hit
+                    onpaddle = True
+            hit = self._bricks.sweep(ball.x, ball.y, dx, dy, BALL_DIAMETER)
+            if not hit is None and (face is None or hit[1] < t):
+                index, t, face = hit
+                onpaddle = False
+
+            t = max(t, 0.0)
+            ball.x += dx*t
+            ball.y += dy*t
+            if face is None:
+                return
+            if face in ('left', 'right'):
+                ball.vx = -ball.vx
+            else:
+                ball.vy = -ball.vy
+            if index >= 0:
+                if self._bricks.hit(index):
+                    removed.append(self._bricks[index])
+            elif onpaddle:
+                self._paddlehits += 1
+            rest *= 1.0 - t
+
+    def _getCollidingObject(self, x, y, vy):
+        """Returns: the paddle or brick that a ball at (x,y) has collided with
+
+        The paddle is tested against the two bottom corners of the ball, and
+        only counts when the ball is moving down.  Otherwise, the bricks are
+        tested against all four corners, and the first brick (in layout
+        order) that contains a corner is returned.  Returns None if there is
+        no collision.
+
+        Each corner is only tested against the bricks in the grid cells
+        around it (see BrickField.first_hit), so this does not slow down on
+        large boards.
+
+        Precondition: x, y and vy are numbers"""
+        paddle = self._paddle
+        if paddle.collide_point(x, y) or paddle.collide_point(x+BALL_DIAMETER, y):
+            if vy >= 0:
+                return None
+            return paddle
+        index = self._bricks.first_hit(x, y, BALL_DIAMETER)
+        return None if index < 0 else self._bricks[index]
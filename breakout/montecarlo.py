@@ -0,0 +1,276 @@
+# montecarlo.py
+# Tech Kuo(thk42) and Charles Lai(cjl223)
+# 10-18-26
+"""Monte Carlo module for Breakout
+
+This module plays large numbers of seeded, headless games of Breakout across
+a pool of processes, to answer questions such as "how long does a paddle that
+follows the ball take to clear a 20x15 board?"
+
+A board is given by the same three values that fix_bricks in __main__.py sets
+(BRICKS_IN_ROW, BRICK_ROWS and BRICK_WIDTH), and a policy is a function that
+takes a model.Game and returns where the left edge of the paddle should go.
+Policies are sent to the worker processes by name, so they must be defined at
+the top level of a module.
+
+Usage from the command line:
+
+    python montecarlo.py columns rows games [processes]
+
+Games are timed in frames of play; the 3 second wait before each serve in
+the real game is not counted.
+
+    python montecarlo.py --scaling columns rows games
+
+plays the same games with 1, 2 and 4 processes (see SCALING_PROCESSES) and
+prints the games per second, speedup and efficiency of each, to check how
+well a run scales on the machine at hand."""
+import multiprocessing
+import sys
+import timeit
+from model import *
+
+# CONSTANTS
+
+# Number of seeds played by a worker before it reports back
+CHUNK_SIZE = 64
+# Most frames a single game may last before it is given up on
+FRAME_LIMIT = 200000
+# Numbers of processes timed by scaling
+SCALING_PROCESSES = (1, 2, 4)
+
+
+# FUNCTIONS
+def board(columns, rows):
+    """Returns: the board tuple (columns, rows, brick_width) for a board of the given size
+
+    The brick width is computed as in fix_bricks in __main__.py, except that
+    it is at least 1 (as in benchmark.board).
+
+    Precondition: columns and rows are ints > 0"""
+    return (columns, rows, max(GAME_WIDTH / columns - BRICK_SEP_H, 1))
+
+
+def follow(game):
+    """Returns: the paddle position that centers the paddle under the ball
+
+    This is a simple policy for `run`.  It keeps the paddle where it is while
+    there is no ball.
+
+    Precondition: game is a started model.Game"""
+    if game.ball is None:
+        return game.paddle.x
+    return game.ball.x + BALL_DIAMETER/2 - PADDLE_WIDTH/2
+
+
+def play(board, policy, seed, limit=FRAME_LIMIT, swept=False):
+    """Returns: the result of one headless game, as a tuple (won, frames, lives, remaining)
+
+    The game is a model.Game on board with the given seed.  The paddle is
+    moved to policy(game) before every frame, and a new ball is served as
+    soon as one is lost.  The game stops when it is over, or after limit
+    frames.
+
+    Precondition: board is a tuple (columns, rows, brick_width); policy is a
+    function from a Game to a number; seed is an int; limit is an int > 0;
+    swept is a bool"""
+    game = Game(board[0], board[1], board[2], swept=swept, seed=seed)
+    game.start()
+    while game.state != STATE_COMPLETE and game.frames < limit:
+        if game.state == STATE_PAUSED:
+            game.serve()
+        game.move_paddle(policy(game))
+        game.step()
+    return (game.won, game.frames, game.lives, game.remaining)
+
+
+def run(board, policy, seeds, processes=None, limit=FRAME_LIMIT, swept=False):
+    """Plays one game for every seed across a pool of processes, yielding the results so far
+
+    This is a generator.  Each time a worker finishes a chunk of CHUNK_SIZE
+    seeds, it yields a Summary of every game finished up to then.  The last
+    Summary yielded covers all of the seeds.  Workers only send summaries
+    back, never individual games, so the processes share no work other
+    than merging summaries and the run should scale with the number of
+    processes, up to the number of cores.  Use `scaling` to check this.
+
+    See `play` for the meaning of board, policy, limit and swept.
+
+    Precondition: seeds is an xrange (or list) of ints; processes is None
+    (one per CPU) or an int > 0; policy is defined at the top level of a
+    module"""
+    seeds = list(seeds)
+    name = (policy.__module__, policy.__name__)
+    chunks = [(board, name, seeds[i:i+CHUNK_SIZE], limit, swept) for i in range(0, len(seeds), CHUNK_SIZE)]
+    pool = multiprocessing.Pool(processes)
+    try:
+        total = Summary()
+        for part in pool.imap_unordered(_playChunk, chunks):
+            total.merge(part)
+            yield total
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def scaling(board, games, counts=SCALING_PROCESSES):
+    """Returns: a list of the timings of playing the same games with each number of processes in counts
+
+    Each timing is a dictionary with the keys processes, seconds,
+    games_per_second, speedup (games_per_second over that of the first
+    count) and efficiency (speedup per process, relative to the first
+    count).  The games are seeds 0 to games-1 with the policy `follow`.
+    The numbers only mean something on a machine with at least as many
+    free cores as the largest count; multiprocessing.cpu_count() is in
+    each timing as cores.  Work is handed out CHUNK_SIZE games at a time,
+    so games should be at least CHUNK_SIZE times the largest count, or
+    some processes are left with nothing to do.
+
+    Precondition: board is a board tuple (see `board`); games is an int > 0;
+    counts is a non-empty sequence of ints > 0"""
+    clock = timeit.default_timer
+    timings = []
+    for processes in counts:
+        start = clock()
+        for summary in run(board, follow, xrange(games), processes):
+            pass
+        seconds = clock() - start
+        timing = {'processes': processes, 'seconds': seconds, 'games_per_second': games / seconds,
+                  'cores': multiprocessing.cpu_count()}
+        first = timings[0] if timings else timing
+        timing['speedup'] = timing['games_per_second'] / first['games_per_second']
+        timing['efficiency'] = timing['speedup'] * first['processes'] / float(processes)
+        timings.append(timing)
+    return timings
+
+
+def _playChunk(task):
+    """Returns: the Summary of playing every seed in a chunk of work
+
+    This runs in a worker process.  The policy is looked up by module and
+    function name, as functions cannot always be sent between processes.
+
+    Precondition: task is a tuple (board, (module, name), seeds, limit, swept)"""
+    board, name, seeds, limit, swept = task
+    __import__(name[0])
+    policy = getattr(sys.modules[name[0]], name[1])
+    summary = Summary()
+    for seed in seeds:
+        summary.add(play(board, policy, seed, limit, swept))
+    return summary
+
+
+# CLASSES
+class Summary(object):
+    """Instance is the aggregate of the results of many games.
+
+    Summaries are small, so they can be sent between processes and merged."""
+    # FIELDS.  They are public, as this is plain data.
+
+    # Number of games
+    # Invariant: Value is an int >= 0
+    games = 0
+
+    # Number of games won (every brick removed)
+    # Invariant: Value is an int between 0 and games
+    wins = 0
+
+    # Total frames played, over all games
+    # Invariant: Value is an int >= 0
+    frames = 0
+
+    # Total and total of squares of the frames taken by the games won
+    # Invariant: Values are numbers >= 0
+    winframes = 0
+    winframes2 = 0
+
+    # Total bricks left at the end, over all games
+    # Invariant: Value is an int >= 0
+    remaining = 0
+
+    # Total lives left at the end, over all games
+    # Invariant: Value is an int >= 0
+    lives = 0
+
+    def __init__(self):
+        """Constructor: an empty summary"""
+        self.games = 0
+        self.wins = 0
+        self.frames = 0
+        self.winframes = 0
+        self.winframes2 = 0
+        self.remaining = 0
+        self.lives = 0
+
+    def add(self, result):
+        """Adds the result of one game to this summary
+
+        Precondition: result is a tuple (won, frames, lives, remaining) as returned by `play`"""
+        won, frames, lives, remaining = result
+        self.games += 1
+        self.frames += frames
+        self.lives += lives
+        self.remaining += remaining
+        if won:
+            self.wins += 1
+            self.winframes += frames
+            self.winframes2 += frames*frames
+
+    def merge(self, other):
+        """Adds every game of the summary other to this summary
+
+        Precondition: other is a Summary"""
+        self.games += other.games
+        self.wins += other.wins
+        self.frames += other.frames
+        self.winframes += other.winframes
+        self.winframes2 += other.winframes2
+        self.remaining += other.remaining
+        self.lives += other.lives
+
+    @property
+    def win_rate(self):
+        """The fraction of games won, or 0.0 if there are no games"""
+        return self.wins / float(self.games) if self.games else 0.0
+
+    @property
+    def mean_clear_frames(self):
+        """The average number of frames taken to clear the board in the games won
+
+        This is None if no game was won."""
+        return self.winframes / float(self.wins) if self.wins else None
+
+    @property
+    def stdev_clear_frames(self):
+        """The standard deviation of the frames taken to clear the board in the games won
+
+        This is None if no game was won."""
+        if not self.wins:
+            return None
+        mean = self.winframes / float(self.wins)
+        return max(self.winframes2 / float(self.wins) - mean*mean, 0.0) ** 0.5
+
+    def __str__(self):
+        """Returns: Readable string representation of this summary"""
+        clear = self.mean_clear_frames
+        seconds = 'n/a' if clear is None else '%.1f s' % (clear / FRAME_RATE)
+        return ('%d games, %.1f%% won, mean time to clear %s, mean bricks left %.1f' %
+                (self.games, 100*self.win_rate, seconds, self.remaining / float(max(self.games, 1))))
+
+
+# Application code
+if __name__ == '__main__':
+    if len(sys.argv) == 5 and sys.argv[1] == '--scaling':
+        for timing in scaling(board(int(sys.argv[2]), int(sys.argv[3])), int(sys.argv[4])):
+            print ('%(processes)d processes: %(seconds).2f s, %(games_per_second).1f games/s, '
+                   'speedup %(speedup).2f, efficiency %(efficiency).2f (%(cores)d cores)' % timing)
+        sys.exit(0)
+    if len(sys.argv) < 4:
+        print 'Usage: python montecarlo.py columns rows games [processes]'
+        print '       python montecarlo.py --scaling columns rows games'
+        sys.exit(1)
+    procs = int(sys.argv[4]) if len(sys.argv) > 4 else None
+    result = None
+    for result in run(board(int(sys.argv[1]), int(sys.argv[2])), follow, xrange(int(sys.argv[3])), procs):
+        print result
@@ -0,0 +1,323 @@
+# replay.py
+# Tech Kuo(thk42) and Charles Lai(cjl223)
+# 10-18-26
+"""Replay module for Breakout
+
+This module records the input of a game of Breakout to a compact binary file,
+and plays such a file back through the controller as fast as possible.  A game
+is fixed by its seed, its board and its input, so a replay takes exactly the
+same physics steps as the original game.  This makes it possible to reproduce
+bug reports and to check that a change to the physics changes nothing.
+
+A recording is a header followed by records.  The header is
+
+    magic 'BKRP', version (1 byte), seed (4 bytes), columns and rows
+    (2 bytes each) and brick width (8 byte float)
+
+Each record is a kind byte followed by the physics step it happened at, as
+the number of steps since the previous record.  Touch down and touch move
+records then hold the touch position in 1/TOUCH_RESOLUTION pixels, as the
+change from the previous touch position.  The numbers after the kind byte
+are varints (7 bits a byte, low bits first), and changes are zigzag encoded,
+so that most records take 2 to 4 bytes.  The last record, END, holds a CRC of
+the final state of the game, so a replay can check that it ended the same way.
+
+Usage from the command line:
+
+    python replay.py recording
+
+plays a recording back and says whether it ended in the same state."""
+import struct
+import sys
+import zlib
+
+# CONSTANTS
+
+# The header of a recording
+MAGIC = 'BKRP'
+VERSION = 1
+HEADER = struct.Struct('<4sBIHHd')
+
+# The kinds of record
+RECORD_DOWN  = 0
+RECORD_MOVE  = 1
+RECORD_UP    = 2
+RECORD_SERVE = 3
+RECORD_END   = 4
+
+# Must match TOUCH_RESOLUTION in module controller
+TOUCH_RESOLUTION = 8
+
+
+# FUNCTIONS
+def checksum(steps, game):
+    """Returns: a CRC of the state of game after steps physics steps
+
+    This covers the state, lives, bricks, paddle and ball, with every float
+    exact (repr is used, which round trips).
+
+    Precondition: steps is an int >= 0; game is a model.Game"""
+    ball = game.ball
+    paddle = game.paddle
+    state = (steps, game.state, game.lives, game.remaining, game.frames,
+             None if paddle is None else paddle.x,
+             None if ball is None else (ball.x, ball.y, ball.vx, ball.vy))
+    return zlib.crc32(repr(state)) & 0xffffffff
+
+
+def _putVarint(data, value):
+    """Appends value to data as a varint
+
+    Precondition: data is a bytearray; value is an int >= 0"""
+    while value >= 0x80:
+        data.append((value & 0x7f) | 0x80)
+        value >>= 7
+    data.append(value)
+
+
+def _getVarint(data, pos):
+    """Returns: a tuple (value, pos) of the varint at pos in data and the position after it
+
+    Precondition: data is a bytearray; pos is the index of a varint in data"""
+    value = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return (value, pos)
+        shift += 7
+
+
+def _zigzag(value):
+    """Returns: the int value as an int >= 0 (0, -1, 1, -2, ... go to 0, 1, 2, 3, ...)
+
+    Precondition: value is an int"""
+    return value*2 if value >= 0 else -value*2-1
+
+
+def _unzigzag(value):
+    """Returns: the int that _zigzag turns into value
+
+    Precondition: value is an int >= 0"""
+    return value >> 1 if value & 1 == 0 else -((value+1) >> 1)
+
+
+# CLASSES
+class Recorder(object):
+    """Instance writes the input of one game of Breakout to a file.
+
+    Give a Recorder to the controller.Breakout constructor; the controller
+    calls the methods of this class.  The records are kept in memory and
+    written out by `end`."""
+    # FIELDS.  They are all hidden.
+
+    # The name of the file to write
+    # Invariant: Value is a string
+    _filename = None
+
+    # The encoded header and records so far
+    # Invariant: A bytearray, or None before begin is called
+    _data = None
+
+    # The step of the last record
+    # Invariant: Value is an int >= 0
+    _step = 0
+
+    # The position of the last touch record, in 1/TOUCH_RESOLUTION pixels
+    # Invariant: Values are ints
+    _x = 0
+    _y = 0
+
+    def __init__(self, filename):
+        """Constructor: a recorder that writes to the file filename
+
+        Precondition: filename is a string"""
+        self._filename = filename
+
+    def begin(self, seed, columns, rows, brick_width):
+        """Starts a recording of a game with the given seed and board
+
+        Precondition: seed is an int between 0 and 2**32-1; columns, rows and
+        brick_width are the board of the game (ints > 0, and a number)"""
+        self._data = bytearray(HEADER.pack(MAGIC, VERSION, seed, columns, rows, brick_width))
+        self._step = 0
+        self._x = 0
+        self._y = 0
+
+    def touch_down(self, step, x, y):
+        """Records a touch down at (x, y) before physics step step
+
+        Precondition: step is an int >= the step of the last record; x and y
+        are numbers on the 1/TOUCH_RESOLUTION pixel grid"""
+        self._put(RECORD_DOWN, step)
+        self._putPosition(x, y)
+
+    def touch_move(self, step, x, y):
+        """Records a touch move to (x, y) before physics step step
+
+        Precondition: as for touch_down"""
+        self._put(RECORD_MOVE, step)
+        self._putPosition(x, y)
+
+    def touch_up(self, step):
+        """Records a touch up before physics step step
+
+        Precondition: step is an int >= the step of the last record"""
+        self._put(RECORD_UP, step)
+
+    def serve(self, step):
+        """Records a serve before physics step step
+
+        Precondition: step is an int >= the step of the last record"""
+        self._put(RECORD_SERVE, step)
+
+    def end(self, step, game):
+        """Ends the recording after step physics steps of game, and writes the file
+
+        Precondition: step is an int >= the step of the last record; game is
+        the model.Game that was recorded"""
+        self._put(RECORD_END, step)
+        self._data.extend(struct.pack('<I', checksum(step, game)))
+        with open(self._filename, 'wb') as f:
+            f.write(self._data)
+
+    # HELPER METHODS
+    def _put(self, kind, step):
+        """Appends the kind byte and step change of a record
+
+        Precondition: kind is a RECORD constant; step is an int >= _step"""
+        self._data.append(kind)
+        _putVarint(self._data, step - self._step)
+        self._step = step
+
+    def _putPosition(self, x, y):
+        """Appends the change in touch position of a record
+
+        Precondition: x and y are numbers on the 1/TOUCH_RESOLUTION pixel grid"""
+        x = int(round(x*TOUCH_RESOLUTION))
+        y = int(round(y*TOUCH_RESOLUTION))
+        _putVarint(self._data, _zigzag(x - self._x))
+        _putVarint(self._data, _zigzag(y - self._y))
+        self._x = x
+        self._y = y
+
+
+class Replayer(object):
+    """Instance is a recording read from a file, that can be played back.
+
+    The recording is decoded when the file is read.  `play` builds a new
+    controller.Breakout and feeds every record to it, stepping the game in
+    between with exactly one physics step per update."""
+    # FIELDS.  They are public, as this is plain data.
+
+    # The seed of the game
+    # Invariant: Value is an int between 0 and 2**32-1
+    seed = 0
+
+    # The board of the game
+    # Invariant: A tuple (columns, rows, brick_width)
+    board = None
+
+    # The records, in order
+    # Invariant: A list of tuples (kind, step, x, y); x and y are None for
+    # records that are not touch downs or moves, and the END record is last
+    records = None
+
+    # The CRC of the final state of the recorded game
+    # Invariant: Value is an int
+    checksum = 0
+
+    def __init__(self, filename):
+        """Constructor: the recording in the file filename
+
+        Precondition: filename is the name of a file written by a Recorder"""
+        with open(filename, 'rb') as f:
+            data = bytearray(f.read())
+        magic, version, seed, columns, rows, width = HEADER.unpack_from(str(data[:HEADER.size]))
+        assert magic == MAGIC and version == VERSION, `filename` + ' is not a Breakout recording'
+        self.seed = seed
+        self.board = (columns, rows, width)
+        self.records = []
+        pos = HEADER.size
+        step = 0
+        x = 0
+        y = 0
+        while True:
+            kind = data[pos]
+            delta, pos = _getVarint(data, pos + 1)
+            step += delta
+            if kind == RECORD_DOWN or kind == RECORD_MOVE:
+                dx, pos = _getVarint(data, pos)
+                dy, pos = _getVarint(data, pos)
+                x += _unzigzag(dx)
+                y += _unzigzag(dy)
+                self.records.append((kind, step, x/float(TOUCH_RESOLUTION), y/float(TOUCH_RESOLUTION)))
+            else:
+                self.records.append((kind, step, None, None))
+            if kind == RECORD_END:
+                self.checksum = struct.unpack_from('<I', str(data[pos:pos+4]))[0]
+                return
+
+    def play(self):
+        """Returns: the controller.Breakout after playing back every record
+
+        Nothing is drawn on screen and nothing waits on a clock, so this runs
+        as fast as the game can step.  Use `verify` to check the result.
+
+        This needs Kivy, as the controller makes widgets; the window is
+        created (but not shown in a loop) to give the widgets a GL context."""
+        # Imported here so that a Recorder can be made without Kivy
+        from kivy.core.window import Window
+        import controller
+        controller.BRICKS_IN_ROW, controller.BRICK_ROWS, controller.BRICK_WIDTH = self.board
+        breakout = controller.Breakout(self.seed, replaying=True)
+        breakout.initialize()
+        dt = 1.0/controller.PHYSICS_RATE
+        touch = _Touch()
+        for (kind, step, x, y) in self.records:
+            while breakout.steps < step:
+                assert breakout.model.state == controller.STATE_ACTIVE, 'the recording does not match the game'
+                breakout.update(dt)
+            if kind == RECORD_DOWN:
+                touch.x, touch.y = x, y
+                breakout.on_touch_down(breakout.view, touch)
+            elif kind == RECORD_MOVE:
+                touch.x, touch.y = x, y
+                breakout.on_touch_move(breakout.view, touch)
+            elif kind == RECORD_UP:
+                breakout.on_touch_up(breakout.view, touch)
+            elif kind == RECORD_SERVE:
+                # At least one frame passes while the game waits for a serve
+                breakout.update(0)
+                breakout.serve()
+        return breakout
+
+    def verify(self, game):
+        """Returns: True if game ended in the same state as the recorded game
+
+        Precondition: game is the controller returned by `play`"""
+        return checksum(game.steps, game.model) == self.checksum
+
+
+class _Touch(object):
+    """Instance is a stand-in for a Kivy MotionEvent, with just a position"""
+    # The touch position
+    # Invariant: Values are floats
+    x = 0.0
+    y = 0.0
+
+
+# Application code
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print 'Usage: python replay.py recording'
+        sys.exit(1)
+    replayer = Replayer(sys.argv[1])
+    result = replayer.play()
+    if replayer.verify(result):
+        print 'Replay matches: %d steps, seed %d' % (result.steps, replayer.seed)
+    else:
+        print 'Replay DIFFERS from the recording'
+        sys.exit(1)
@@ -0,0 +1,66 @@
+# test_model.py
+# Tech Kuo(thk42) and Charles Lai(cjl223)
+# 10-18-26
+"""Unit tests for the board layout in module model
+
+These lay out very wide boards, as fix_bricks in __main__.py makes them,
+and check that games on them can be played, not just laid out.  Past
+GAME_WIDTH columns fix_bricks gives bricks a width of -5, so the columns do
+not advance and the board has no grid index.
+
+This needs only NumPy.  Run it with
+
+    python test_model.py"""
+import unittest
+from model import *
+
+
+class WideBoardTest(unittest.TestCase):
+    """Tests of games on boards of 500 columns"""
+
+    def play(self, columns, rows, brick_width, swept):
+        """Returns: a game on the given board after a serve and 60 steps"""
+        game = Game(columns, rows, brick_width, swept=swept, seed=1)
+        game.start()
+        game.serve()
+        for x in range(60):
+            game.step()
+        return game
+
+    def test_fix_bricks_board(self):
+        """A 500x500 board with the fix_bricks width is laid out without a grid, and steps"""
+        width = GAME_WIDTH / 500 - BRICK_SEP_H
+        for swept in (False, True):
+            game = self.play(500, 500, width, swept)
+            self.assertEqual(game.bricks.size, 250000)
+            self.assertTrue(game.bricks.grid is None)
+            self.assertEqual(game.frames, 60)
+
+    def test_clamped_board(self):
+        """A 500 column board with bricks a pixel wide keeps its grid, and steps"""
+        for swept in (False, True):
+            game = self.play(500, 10, 1, swept)
+            self.assertFalse(game.bricks.grid is None)
+            self.assertEqual(game.frames, 60)
+
+
+class LostBallTest(unittest.TestCase):
+    """Tests of balls that leave the bottom of the screen in a multi-ball game"""
+
+    def test_lost_ball_does_not_bounce(self):
+        """A ball lost in a step does not bounce another ball in the same step"""
+        game = Game(swept=False, seed=1, balls=2)
+        game.start()
+        game.serve()
+        (lost, kept) = game.balls
+        (lost.x, lost.y, lost.vx, lost.vy) = (20, 2, 0, -5)
+        (kept.x, kept.y, kept.vx, kept.vy) = (20, 12, 0, -8)
+        game.step()
+        self.assertEqual(game.balls, [kept])
+        self.assertEqual(kept.vy, -8)
+        self.assertEqual(game.ball_hits, 0)
+
+
+# Application code
+if __name__ == '__main__':
+    unittest.main()
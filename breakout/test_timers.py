@@ -0,0 +1,72 @@
+# test_timers.py
+# Tech Kuo(thk42) and Charles Lai(cjl223)
+# 10-18-26
+"""Unit tests for the timer queue in module graphics
+
+These check that timers cancelled (or the whole queue cleared) by a callback
+while the queue is calling its due timers are dropped properly: the count of
+waiting timers stays right, and cancelled timers are still compacted away
+afterwards.
+
+This needs Kivy, as module graphics imports it.  Run it with
+
+    python test_timers.py"""
+import unittest
+from graphics import TimerQueue
+
+
+class TimerQueueTest(unittest.TestCase):
+    """Tests of TimerQueue when callbacks change the queue during advance"""
+
+    def setUp(self):
+        """Makes an empty queue and a list of the callbacks called"""
+        self.queue = TimerQueue()
+        self.called = []
+
+    def record(self, name):
+        """Callback that records that the timer name was called"""
+        self.called.append(name)
+
+    def test_cancel_in_callback(self):
+        """Timers cancelled by a callback are never called, and are not counted"""
+        later = [self.queue.schedule(self.record, 2 + i, i) for i in range(3)]
+        kept = self.queue.schedule(self.record, 5, 'kept')
+        def cancel():
+            for timer in later:
+                timer.cancel()
+        self.queue.schedule(cancel, 1)
+        self.queue.advance(3)
+        self.assertEqual(self.called, [])
+        self.assertEqual(len(self.queue), 1)
+        self.assertTrue(kept.active)
+        self.queue.advance(10)
+        self.assertEqual(self.called, ['kept'])
+        self.assertEqual(len(self.queue), 0)
+        self.assertEqual(self.queue._stale, 0)
+        self.assertEqual(self.queue.next_deadline, None)
+
+    def test_compaction_after_cancel_in_callback(self):
+        """Cancelled timers are still dropped from the heap after a callback cancelled some"""
+        later = [self.queue.schedule(self.record, 2, i) for i in range(3)]
+        self.queue.schedule(lambda: [timer.cancel() for timer in later], 1)
+        self.queue.advance(3)
+        for x in range(100):
+            self.queue.schedule(self.record, 50, x).cancel()
+        self.assertTrue(len(self.queue._heap) <= 2)
+        self.assertEqual(len(self.queue), 0)
+
+    def test_clear_in_callback(self):
+        """Clearing the queue in a callback stops the timers due in the same advance"""
+        self.queue.schedule(self.queue.clear, 1)
+        self.queue.schedule(self.record, 2, 'dropped')
+        self.queue.advance(3)
+        self.assertEqual(self.called, [])
+        self.assertEqual(len(self.queue), 0)
+        self.queue.schedule(self.record, 1, 'after')
+        self.queue.advance(1)
+        self.assertEqual(self.called, ['after'])
+
+
+# Application code
+if __name__ == '__main__':
+    unittest.main()